@@ -3,3 +3,10 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        """
+        Регистрация шрифтов PDF при запуске процесса.
+        """
+        from .utils import register_fonts
+        register_fonts()
@@ -0,0 +1,152 @@
+import hashlib
+import threading
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework.response import Response
+
+from recipes.models import Ingredient, Recipe, TableVersion, Tag
+from .instrumentation import METRIC_PREFIX
+
+# Параметры запроса, от которых зависит ответ анонимному пользователю.
+CACHED_PARAMS = (
+    'author',
+    'page',
+    'limit',
+    'pagination',
+    'cursor',
+    'count',
+    'tags_mode',
+    'ordering',
+)
+# Сортировки по счетчику избранного: он меняется UPDATE с F() без
+# сигналов и без новой версии рецептов при каждом добавлении, поэтому
+# такие ответы не кэшируются, иначе порядок устаревал бы до
+# RECIPE_CACHE_TIMEOUT.
+UNCACHED_ORDERINGS = ('popular',)
+STATS_KEYS = ('hit', 'miss')
+
+_stats_lock = threading.Lock()
+_process_stats = Counter()
+
+
+def get_cache():
+    return caches[settings.RECIPE_CACHE_ALIAS]
+
+
+def generation():
+    """
+    Поколение кэша: версии рецептов и справочников. Счетчики
+    хранятся в базе и общие для всех процессов gunicorn.
+    """
+    versions = TableVersion.objects.versions(Recipe, Tag, Ingredient)
+    return tuple(version for version, _ in versions.values())
+
+
+def cache_key(request, action, kwargs):
+    """
+    Ключ кэша по нормализованным параметрам запроса.
+    """
+    params = request.query_params
+    normalized = (
+        request.get_host(),
+        action,
+        tuple(sorted(kwargs.items())),
+        tuple(sorted(params.getlist('tags'))),
+        tuple(params.get(name, '') for name in CACHED_PARAMS),
+        generation(),
+    )
+    digest = hashlib.md5(repr(normalized).encode()).hexdigest()
+    return f'recipes:{action}:{digest}'
+
+
+def shared_cache():
+    """
+    Общий ли кэш для всех процессов. Локальный кэш (locmem) у каждого
+    воркера gunicorn и у команды manage.py свой.
+    """
+    return not isinstance(get_cache(), (LocMemCache, DummyCache))
+
+
+def record(event):
+    """
+    Учет попаданий и промахов кэша: в памяти процесса для
+    /api/metrics/ и, если кэш общий, в самом кэше.
+    """
+    with _stats_lock:
+        _process_stats[event] += 1
+    if not shared_cache():
+        return
+    cache = get_cache()
+    key = f'stats:{event}'
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def stats():
+    """
+    Число попаданий и промахов кэша по всем процессам.
+    Доступно только для общего кэша.
+    """
+    cache = get_cache()
+    return {event: cache.get(f'stats:{event}', 0) for event in STATS_KEYS}
+
+
+def reset_stats():
+    get_cache().delete_many([f'stats:{event}' for event in STATS_KEYS])
+
+
+def render_stats():
+    """
+    Попадания и промахи кэша в этом процессе в формате Prometheus.
+    """
+    name = f'{METRIC_PREFIX}_recipe_cache_requests_total'
+    lines = [
+        f'# HELP {name} Ответы анонимным пользователям из кэша и мимо него.',
+        f'# TYPE {name} counter',
+    ]
+    with _stats_lock:
+        for event in STATS_KEYS:
+            lines.append(
+                f'{name}{{result="{event}"}} {_process_stats[event]}'
+            )
+    return '\n'.join(lines) + '\n'
+
+
+def anonymous_cache(action):
+    """
+    Кэширование ответов анонимным пользователям.
+    Для них признаки избранного и корзины всегда False,
+    поэтому ответ зависит только от параметров запроса.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if (
+                request.user.is_authenticated
+                or request.query_params.get('ordering') in UNCACHED_ORDERINGS
+            ):
+                return method(self, request, *args, **kwargs)
+            cache = get_cache()
+            key = cache_key(request, action, kwargs)
+            data = cache.get(key)
+            if data is not None:
+                record('hit')
+                response = Response(data)
+                response['X-Cache'] = 'HIT'
+                return response
+            record('miss')
+            response = method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data)
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
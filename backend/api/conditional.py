@@ -0,0 +1,109 @@
+import hashlib
+from functools import wraps
+
+from django.db.models import Exists, OuterRef
+from django.views.decorators.http import condition
+
+from recipes.models import Ingredient, Recipe, Subscribe, TableVersion, Tag
+
+
+def memoize_on_request(func):
+    """
+    Результат вычисляется один раз за запрос: его используют
+    и функция ETag, и функция Last-Modified.
+    """
+    @wraps(func)
+    def wrapper(request, *args, **kwargs):
+        cache = request.__dict__.setdefault('_conditional_cache', {})
+        key = (func, args, tuple(sorted(kwargs.items())))
+        if key not in cache:
+            cache[key] = func(request, *args, **kwargs)
+        return cache[key]
+    return wrapper
+
+
+def make_etag(*parts):
+    """
+    Хэш частей состояния ответа для заголовка ETag.
+    """
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def table_condition(model):
+    """
+    ETag и Last-Modified ответа по счетчику версий таблицы модели.
+    """
+    @memoize_on_request
+    def table_version(request, *args, **kwargs):
+        return TableVersion.objects.versions(model)[model]
+
+    def etag(request, *args, **kwargs):
+        version, _ = table_version(request, *args, **kwargs)
+        return make_etag(
+            model._meta.db_table,
+            version,
+            request.get_full_path()
+        )
+
+    def last_modified(request, *args, **kwargs):
+        _, updated_at = table_version(request, *args, **kwargs)
+        return updated_at
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
+
+
+@memoize_on_request
+def recipe_state(request, pk):
+    """
+    Состояние рецепта, от которого зависит ответ: дата изменения,
+    версии справочников и признаки текущего пользователя.
+    Для id не числом возвращается None: ответ 404 дает представление.
+    """
+    try:
+        pk = int(pk)
+    except (TypeError, ValueError):
+        return None
+    user = request.user
+    queryset = Recipe.objects.filter(pk=pk).with_user_flags(user)
+    fields = ['updated_at']
+    if user.is_authenticated:
+        queryset = queryset.annotate(
+            author_subscribed=Exists(Subscribe.objects.filter(
+                user=user,
+                following=OuterRef('author')
+            ))
+        )
+        fields += ['is_favorited', 'is_in_shopping_cart', 'author_subscribed']
+    state = queryset.values_list(*fields).first()
+    if state is None:
+        return None
+    versions = TableVersion.objects.versions(Tag, Ingredient)
+    return state, versions
+
+
+def recipe_etag(request, pk):
+    state = recipe_state(request, pk)
+    if state is None:
+        return None
+    return make_etag(pk, state, request.get_full_path())
+
+
+def recipe_last_modified(request, pk):
+    """
+    Last-Modified рецепта только для анонимных пользователей:
+    признаки избранного и корзины меняются без изменения рецепта.
+    """
+    state = recipe_state(request, pk)
+    if state is None or request.user.is_authenticated:
+        return None
+    (updated_at, *_), versions = state
+    return max(
+        [updated_at]
+        + [changed for _, changed in versions.values() if changed]
+    )
+
+
+recipe_condition = condition(
+    etag_func=recipe_etag,
+    last_modified_func=recipe_last_modified
+)
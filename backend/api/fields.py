@@ -0,0 +1,103 @@
+import base64
+import binascii
+import tempfile
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django_filters.fields import ModelMultipleChoiceField
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
+from rest_framework.fields import ImageField
+from rest_framework.relations import PrimaryKeyRelatedField
+
+
+class StreamingBase64ImageField(Base64ImageField):
+    """
+    Изображение в base64, которое декодируется частями во временный
+    файл: в памяти не держится вторая, декодированная копия.
+    """
+    # Кратно 4, чтобы каждая часть была корректной строкой base64.
+    CHUNK_SIZE = 64 * 1024
+    MAX_MEMORY_SIZE = 2 * 1024 * 1024
+    PILLOW_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif'}
+
+    def to_internal_value(self, base64_data):
+        if base64_data in self.EMPTY_VALUES:
+            return None
+        if not isinstance(base64_data, str):
+            raise ValidationError(self.INVALID_FILE_MESSAGE)
+        _, _, payload = base64_data.rpartition(';base64,')
+        if any(char.isspace() for char in payload[:self.CHUNK_SIZE]):
+            payload = ''.join(payload.split())
+        output = tempfile.SpooledTemporaryFile(
+            max_size=self.MAX_MEMORY_SIZE
+        )
+        try:
+            for start in range(0, len(payload), self.CHUNK_SIZE):
+                output.write(base64.b64decode(
+                    payload[start:start + self.CHUNK_SIZE],
+                    validate=True
+                ))
+            output.seek(0)
+            extension = self.PILLOW_FORMATS.get(Image.open(output).format)
+        except (binascii.Error, ValueError, OSError):
+            output.close()
+            raise ValidationError(self.INVALID_FILE_MESSAGE)
+        if extension is None:
+            output.close()
+            raise ValidationError(self.INVALID_TYPE_MESSAGE)
+        size = output.seek(0, 2)
+        output.seek(0)
+        return ImageField.to_internal_value(self, UploadedFile(
+            file=output,
+            name=f'{uuid.uuid4()}.{extension}',
+            size=size
+        ))
+
+
+class CatalogPrimaryKeyRelatedField(PrimaryKeyRelatedField):
+    """
+    Ссылка на объект справочника по id: объект берется из кэша
+    справочника, запрос выполняется только при промахе.
+    """
+
+    def __init__(self, cache=None, **kwargs):
+        self.cache = cache
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        obj = self.cache.get('id', pk)
+        if obj is None:
+            self.fail('does_not_exist', pk_value=data)
+        return obj
+
+
+class CatalogMultipleChoiceField(ModelMultipleChoiceField):
+    """
+    Поле фильтра по нескольким объектам справочника: значения
+    проверяются по кэшу справочника, а не запросом к базе.
+    """
+
+    def __init__(self, cache=None, **kwargs):
+        self.cache = cache
+        super().__init__(**kwargs)
+
+    def _check_values(self, value):
+        key = self.to_field_name or 'id'
+        value = set(value)
+        found = self.cache.get_many(key, value)
+        for item in value:
+            if item not in found:
+                raise ValidationError(
+                    self.error_messages['invalid_choice'],
+                    code='invalid_choice',
+                    params={'value': item},
+                )
+        return list(found.values())
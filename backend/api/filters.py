@@ -1,8 +1,28 @@
+from django.conf import settings
+from django.db.models import Count
 from django_filters import rest_framework as django_filter
 from rest_framework import filters
 
-from recipes.models import Recipe, Tag
+from recipes.catalog import tag_cache
+from recipes.models import Recipe, Tag, TagRecipe
+from recipes.search import search_ingredients
 from users.models import User
+from .fields import CatalogMultipleChoiceField
+
+# Сортировки ленты рецептов, каждая обслуживается своим индексом.
+RECIPE_ORDERINGS = {
+    'popular': ('-favorites_count', '-id'),
+    'trending': ('-trending_score', '-id'),
+    'quick': ('cooking_time', '-id'),
+}
+
+
+class CatalogMultipleChoiceFilter(django_filter.ModelMultipleChoiceFilter):
+    """
+    Фильтр по нескольким объектам справочника, значения которого
+    проверяются по кэшу справочника.
+    """
+    field_class = CatalogMultipleChoiceField
 
 
 class RecipeFilters(django_filter.FilterSet):
@@ -10,10 +30,24 @@ class RecipeFilters(django_filter.FilterSet):
     Настройка фильтров модели рецептов.
     """
     author = django_filter.ModelChoiceFilter(queryset=User.objects.all())
-    tags = django_filter.ModelMultipleChoiceFilter(
+    tags = CatalogMultipleChoiceFilter(
         field_name='tags__slug',
         to_field_name='slug',
         queryset=Tag.objects.all(),
+        cache=tag_cache,
+        method='filter_tags'
+    )
+    tags_mode = django_filter.ChoiceFilter(
+        choices=(('any', 'Любой из тегов'), ('all', 'Все теги')),
+        method='filter_tags_mode'
+    )
+    ordering = django_filter.ChoiceFilter(
+        choices=(
+            ('popular', 'Популярные'),
+            ('trending', 'Популярные сейчас'),
+            ('quick', 'Быстрые'),
+        ),
+        method='filter_ordering'
     )
     is_favorited = django_filter.BooleanFilter(method='get_is_favorited')
     is_in_shopping_cart = django_filter.BooleanFilter(
@@ -25,7 +59,45 @@ class RecipeFilters(django_filter.FilterSet):
         Параметры фильтров модели рецептов.
         """
         model = Recipe
-        fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'author',
+            'tags',
+            'tags_mode',
+            'ordering',
+            'is_favorited',
+            'is_in_shopping_cart'
+        )
+
+    def filter_tags(self, queryset, name, value):
+        """
+        Фильтр по тегам полусоединением id IN (подзапрос к TagRecipe),
+        без JOIN и DISTINCT по строкам рецептов. С tags_mode=all
+        остаются рецепты со всеми тегами: GROUP BY рецепту
+        и HAVING COUNT по числу тегов.
+        """
+        if not value:
+            return queryset
+        tag_recipes = TagRecipe.objects.filter(tag__in=value)
+        if self.form.cleaned_data.get('tags_mode') == 'all':
+            tag_recipes = tag_recipes.values('recipe_id').annotate(
+                matched=Count('tag_id')
+            ).filter(matched=len(set(value)))
+        return queryset.filter(id__in=tag_recipes.values('recipe_id'))
+
+    def filter_tags_mode(self, queryset, name, value):
+        """
+        Режим учитывается в filter_tags.
+        """
+        return queryset
+
+    def filter_ordering(self, queryset, name, value):
+        """
+        Сортировка ленты по сохраненным в рецепте значениям,
+        без агрегации по таблицам избранного и корзины.
+        """
+        if not value:
+            return queryset
+        return queryset.order_by(*RECIPE_ORDERINGS[value])
 
     def get_is_favorited(self, queryset, name, value):
         """
@@ -44,8 +116,19 @@ class RecipeFilters(django_filter.FilterSet):
         return queryset.all()
 
 
-class IngredientSearchFilter(filters.SearchFilter):
+class IngredientSearchFilter(filters.BaseFilterBackend):
     """
-    Фильтр поиска модели продуктов.
+    Фильтр поиска модели продуктов: сначала совпадения по началу
+    названия, затем по вхождению, не больше INGREDIENT_SEARCH_LIMIT.
     """
     search_param = 'name'
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, '').strip()
+        if not term:
+            return queryset
+        return search_ingredients(
+            queryset,
+            term,
+            settings.INGREDIENT_SEARCH_LIMIT
+        )
@@ -0,0 +1,277 @@
+import bisect
+import threading
+import time
+from contextlib import ExitStack
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import BasePermission
+from rest_framework.serializers import BaseSerializer
+
+# Границы корзин гистограммы времени ответа в секундах.
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+METRIC_PREFIX = 'foodgram'
+
+_local = threading.local()
+
+
+class RequestMetrics:
+    """
+    Показатели одного запроса: время, запросы к базе,
+    время сериализации и размер ответа.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.view = 'unknown'
+        self.db_count = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        # Глубина вложенных вызовов BaseSerializer.data.
+        self.serializer_depth = 0
+        self.response_size = 0
+        self.duration = 0.0
+
+    def server_timing(self):
+        """
+        Значение заголовка Server-Timing в миллисекундах.
+        """
+        return (
+            f'total;dur={self.duration * 1000:.1f}, '
+            f'db;dur={self.db_time * 1000:.1f};'
+            f'desc="{self.db_count} queries", '
+            f'serializer;dur={self.serializer_time * 1000:.1f}'
+        )
+
+
+def current():
+    """
+    Показатели текущего запроса или None вне запроса.
+    """
+    return getattr(_local, 'metrics', None)
+
+
+class EndpointStats:
+    """
+    Накопленная статистика эндпоинта: гистограмма времени
+    ответа и суммы остальных показателей.
+    """
+
+    def __init__(self):
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.count = 0
+        self.duration = 0.0
+        self.db_count = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.response_size = 0
+
+    def observe(self, metrics):
+        index = bisect.bisect_left(DURATION_BUCKETS, metrics.duration)
+        if index < len(self.buckets):
+            self.buckets[index] += 1
+        self.count += 1
+        self.duration += metrics.duration
+        self.db_count += metrics.db_count
+        self.db_time += metrics.db_time
+        self.serializer_time += metrics.serializer_time
+        self.response_size += metrics.response_size
+
+
+class Registry:
+    """
+    Статистика эндпоинтов в памяти процесса. У каждого воркера
+    gunicorn своя, Prometheus собирает их по отдельности.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def observe(self, metrics):
+        with self._lock:
+            stats = self._stats.get(metrics.view)
+            if stats is None:
+                stats = self._stats[metrics.view] = EndpointStats()
+            stats.observe(metrics)
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+    def render(self):
+        """
+        Статистика в текстовом формате Prometheus.
+        """
+        name = f'{METRIC_PREFIX}_request_duration_seconds'
+        lines = [
+            f'# HELP {name} Время обработки запроса.',
+            f'# TYPE {name} histogram',
+        ]
+        totals = (
+            ('db_queries', 'db_count', 'Число запросов к базе.'),
+            ('db_seconds', 'db_time', 'Время запросов к базе.'),
+            ('serializer_seconds', 'serializer_time',
+             'Время сериализации ответа.'),
+            ('response_bytes', 'response_size', 'Размер ответов.'),
+        )
+        with self._lock:
+            stats = sorted(self._stats.items())
+            for view, endpoint in stats:
+                label = f'view="{view}"'
+                cumulative = 0
+                for bound, value in zip(DURATION_BUCKETS, endpoint.buckets):
+                    cumulative += value
+                    lines.append(
+                        f'{name}_bucket{{{label},le="{bound}"}} {cumulative}'
+                    )
+                lines.append(
+                    f'{name}_bucket{{{label},le="+Inf"}} {endpoint.count}'
+                )
+                lines.append(f'{name}_sum{{{label}}} {endpoint.duration}')
+                lines.append(f'{name}_count{{{label}}} {endpoint.count}')
+            for suffix, attribute, description in totals:
+                total = f'{METRIC_PREFIX}_request_{suffix}_total'
+                lines.append(f'# HELP {total} {description}')
+                lines.append(f'# TYPE {total} counter')
+                for view, endpoint in stats:
+                    lines.append(
+                        f'{total}{{view="{view}"}} '
+                        f'{getattr(endpoint, attribute)}'
+                    )
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def view_action(view_func, method):
+    """
+    Класс DRF и действие обработчика, для функции - (None, None).
+    """
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return None, None
+    actions = getattr(view_func, 'actions', None) or {}
+    return cls, actions.get(method.lower(), method.lower())
+
+
+def view_name(view_func, method):
+    """
+    Имя обработчика: класс DRF и действие, например
+    RecipeViewSet.list, либо имя функции представления.
+    """
+    cls, action = view_action(view_func, method)
+    if cls is None:
+        return getattr(view_func, '__name__', 'unknown')
+    return f'{cls.__name__}.{action}'
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Обертка выполнения SQL: число и время запросов к базе.
+    """
+    metrics = current()
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if metrics is not None:
+            metrics.db_count += 1
+            metrics.db_time += time.perf_counter() - start
+
+
+def instrument_serializers():
+    """
+    Учет времени сериализации: BaseSerializer.data может вызываться
+    внутри другой сериализации, например в SerializerMethodField
+    подписок, поэтому время считается только у внешнего вызова.
+    """
+    data = BaseSerializer.data
+    if getattr(data.fget, 'instrumented', False):
+        return
+
+    @wraps(data.fget)
+    def timed_data(self):
+        metrics = current()
+        if metrics is None or hasattr(self, '_data'):
+            return data.fget(self)
+        metrics.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return data.fget(self)
+        finally:
+            metrics.serializer_depth -= 1
+            if not metrics.serializer_depth:
+                metrics.serializer_time += time.perf_counter() - start
+
+    timed_data.instrumented = True
+    BaseSerializer.data = property(timed_data)
+
+
+class InstrumentationMiddleware:
+    """
+    Сбор показателей каждого запроса, заголовок Server-Timing
+    и статистика эндпоинтов для /api/metrics/.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrument_serializers()
+
+    def __call__(self, request):
+        metrics = _local.metrics = RequestMetrics()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(record_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            _local.metrics = None
+        metrics.duration = time.perf_counter() - metrics.start
+        if not response.streaming:
+            metrics.response_size = len(response.content)
+        response['Server-Timing'] = metrics.server_timing()
+        registry.observe(metrics)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = current()
+        if metrics is not None:
+            metrics.view = view_name(view_func, request.method)
+
+
+class MetricsPermission(BasePermission):
+    """
+    Доступ к метрикам для администраторов и адресов
+    из METRICS_ALLOWED_IPS, с которых их собирает Prometheus.
+    """
+
+    def has_permission(self, request, view):
+        return (
+            request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+            or request.user.is_staff
+        )
+
+
+@api_view(['GET'])
+@permission_classes([MetricsPermission])
+def metrics_view(request):
+    """
+    Статистика эндпоинтов и кэша ответов рецептов в текстовом
+    формате Prometheus.
+    """
+    # api.cache сам импортирует этот модуль.
+    from .cache import render_stats
+
+    return HttpResponse(
+        registry.render() + render_stats(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -0,0 +1,141 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import Favorite, Recipe, TagRecipe
+from users.models import User
+
+# Шаблоны полного чтения таблицы в плане запроса.
+SEQ_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (?:TABLE )?(\w+)(?!.*\bUSING\b)'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN ANALYZE запросов основных эндпоинтов API. '
+        'Завершается ошибкой, если какой-либо запрос читает таблицу '
+        'целиком (Seq Scan).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-rows', type=int, default=1000,
+            help='Не учитывать полное чтение таблиц меньше этого размера.'
+        )
+        parser.add_argument(
+            '--verbose-plans', action='store_true',
+            help='Выводить планы всех запросов.'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor not in SEQ_SCAN_PATTERNS:
+            raise CommandError(
+                f'База {connection.vendor} не поддерживается.'
+            )
+        favorite = Favorite.objects.values('user').annotate(
+            total=Count('id')
+        ).order_by('-total').first()
+        recipe = Recipe.objects.order_by('-pub_date', '-id').first()
+        tag_recipe = TagRecipe.objects.select_related('tag').first()
+        if favorite is None or recipe is None or tag_recipe is None:
+            raise CommandError(
+                'Нет данных для проверки, заполните базу рецептами, '
+                'тегами и избранным.'
+            )
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=favorite['user']))
+        feed = '/api/recipes/?pagination=cursor'
+        endpoints = (
+            feed,
+            f'{feed}&tags={tag_recipe.tag.slug}',
+            f'{feed}&author={recipe.author_id}',
+            f'{feed}&is_favorited=1',
+            f'{feed}&is_in_shopping_cart=1',
+            f'/api/recipes/{recipe.id}/',
+            '/api/users/subscriptions/?recipes_limit=3',
+            '/api/recipes/download_shopping_cart/?format=txt',
+        )
+        self.table_names = set(connection.introspection.table_names())
+        sizes = {}
+        failures = []
+        for url in endpoints:
+            for sql in self.capture(client, url):
+                plan = self.explain(sql)
+                tables = self.seq_scans(plan, sizes, options['min_rows'])
+                if options['verbose_plans'] or tables:
+                    self.stdout.write(f'{url}\n{sql}\n{plan}\n')
+                if tables:
+                    failures.append((url, tables))
+        if failures:
+            raise CommandError('\n'.join(
+                f'{url}: Seq Scan on {", ".join(sorted(tables))}'
+                for url, tables in failures
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено эндпоинтов: {len(endpoints)}, Seq Scan не найден.'
+        ))
+
+    def capture(self, client, url):
+        """
+        SELECT-запросы, выполненные при обработке url.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+            b''.join(getattr(response, 'streaming_content', []))
+        if response.status_code != 200:
+            raise CommandError(f'{url}: {response.status_code}')
+        return [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].lstrip().upper().startswith('SELECT')
+        ]
+
+    def explain(self, sql):
+        prefix = (
+            'EXPLAIN ANALYZE' if connection.vendor == 'postgresql'
+            else 'EXPLAIN QUERY PLAN'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}')
+            return '\n'.join(
+                ' '.join(str(column) for column in row)
+                for row in cursor.fetchall()
+            )
+
+    def seq_scans(self, plan, sizes, min_rows):
+        """
+        Таблицы, которые план читает целиком, не меньше min_rows строк.
+        """
+        tables = set()
+        pattern = SEQ_SCAN_PATTERNS[connection.vendor]
+        for table in pattern.findall(plan):
+            if table not in self.table_names:
+                continue
+            if table not in sizes:
+                sizes[table] = self.table_rows(table)
+            if sizes[table] >= min_rows:
+                tables.add(table)
+        return tables
+
+    def table_rows(self, table):
+        """
+        Размер таблицы: оценка планировщика PostgreSQL или COUNT(*).
+        """
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class '
+                    'WHERE relname = %s',
+                    [table]
+                )
+                row = cursor.fetchone()
+                return row[0] if row else 0
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}'
+            )
+            return cursor.fetchone()[0]
@@ -0,0 +1,102 @@
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api.utils import (
+    prune_shopping_cart_cache,
+    shopping_cart_path,
+    write_shopping_cart
+)
+from recipes.models import ShoppingCartJob
+
+
+class Command(BaseCommand):
+    help = (
+        'Фоновая генерация PDF списков покупок из очереди задач в базе. '
+        'Отрисовка выполняется в пуле процессов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=2,
+            help='Количество процессов отрисовки.'
+        )
+        parser.add_argument(
+            '--batch', type=int, default=10,
+            help='Сколько задач забирать из очереди за раз.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Пауза между опросами пустой очереди, в секундах.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Обработать текущую очередь и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                self.cleanup()
+                jobs = self.claim(options['batch'])
+                if jobs:
+                    self.process(pool, jobs)
+                    continue
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+
+    def claim(self, batch):
+        """
+        Захват задач из очереди, параллельные воркеры пропускают
+        уже заблокированные строки.
+        """
+        with transaction.atomic():
+            jobs = list(
+                ShoppingCartJob.objects.select_for_update(
+                    skip_locked=True
+                ).filter(status=ShoppingCartJob.PENDING)[:batch]
+            )
+            ShoppingCartJob.objects.filter(
+                id__in=[job.id for job in jobs]
+            ).update(status=ShoppingCartJob.RUNNING)
+        return jobs
+
+    def process(self, pool, jobs):
+        """
+        Отрисовка PDF в пуле процессов и сохранение статуса задач.
+        """
+        futures = {
+            job.id: pool.submit(
+                write_shopping_cart,
+                json.loads(job.rows),
+                shopping_cart_path(job.key)
+            )
+            for job in jobs
+        }
+        for job_id, future in futures.items():
+            status = ShoppingCartJob.DONE
+            if future.exception() is not None:
+                status = ShoppingCartJob.FAILED
+                self.stderr.write(f'{job_id}: {future.exception()!r}')
+            ShoppingCartJob.objects.filter(id=job_id).update(
+                status=status,
+                finished=timezone.now()
+            )
+
+    def cleanup(self):
+        """
+        Удаление устаревших задач и файлов кэша.
+        """
+        ShoppingCartJob.objects.filter(
+            created__lt=timezone.now() - timedelta(
+                seconds=settings.SHOPPING_CART_JOB_TIMEOUT
+            )
+        ).delete()
+        prune_shopping_cart_cache(settings.SHOPPING_CART_CACHE_DIR)
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.cache import reset_stats, shared_cache, stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Статистика попаданий в кэш ответов рецептов по всем процессам. '
+        'Нужен общий кэш (Redis, memcached, файлы), для locmem '
+        'статистика каждого воркера доступна в /api/metrics/.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Обнулить счетчики после вывода.'
+        )
+
+    def handle(self, *args, **options):
+        if not shared_cache():
+            raise CommandError(
+                f'Кэш {settings.RECIPE_CACHE_ALIAS} локальный для процесса, '
+                'команда не видит его счетчики. Настройте общий кэш '
+                'в RECIPE_CACHE_BACKEND или смотрите /api/metrics/.'
+            )
+        counters = stats()
+        total = sum(counters.values())
+        ratio = counters['hit'] / total if total else 0
+        self.stdout.write(
+            f'hit {counters["hit"]}  miss {counters["miss"]}  '
+            f'hit ratio {ratio:.1%}'
+        )
+        if options['reset']:
+            reset_stats()
@@ -1,4 +1,14 @@
-from rest_framework.pagination import PageNumberPagination
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from collections import OrderedDict
+
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class LimitPageNumberPagination(PageNumberPagination):
@@ -6,3 +16,162 @@ class LimitPageNumberPagination(PageNumberPagination):
     Пагинатор, ограничивающий количество результатов в выдаче.
     """
     page_size_query_param = 'limit'
+
+
+class KeysetPagination(BasePagination):
+    """
+    Пагинация по ключу (дата, id) без OFFSET: следующая страница
+    начинается после последней строки текущей, поэтому глубокие
+    страницы не медленнее первой. Поля ключа по умолчанию
+    (pub_date, pk), лента может передать свои. Общее число строк
+    по запросу: count=exact считает COUNT(*), count=estimate берет
+    оценку планировщика из pg_class.reltuples.
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Неверный курсор.'
+    fields = ('pub_date', 'pk')
+
+    def __init__(self, page_size, fields=None):
+        self.page_size = page_size
+        if fields is not None:
+            self.fields = fields
+
+    def decode_cursor(self, request):
+        """
+        Позиция курсора: направление, дата публикации и id рецепта.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            reverse, pub_date, pk = (
+                urlsafe_b64decode(encoded.encode()).decode().split('|')
+            )
+            pub_date, pk = parse_datetime(pub_date), int(pk)
+        except (BinasciiError, UnicodeDecodeError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if pub_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return reverse == 'r', pub_date, pk
+
+    def encode_cursor(self, reverse, recipe):
+        date_field, id_field = self.fields
+        position = (
+            f'{"r" if reverse else "f"}|'
+            f'{getattr(recipe, date_field).isoformat()}|'
+            f'{getattr(recipe, id_field)}'
+        )
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            urlsafe_b64encode(position.encode()).decode()
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.count = self.get_count(queryset, request)
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor[0]
+        date_field, id_field = self.fields
+        if cursor is not None:
+            _, pub_date, pk = cursor
+            lookup = 'gt' if reverse else 'lt'
+            queryset = queryset.filter(
+                Q(**{f'{date_field}__{lookup}': pub_date})
+                | Q(**{date_field: pub_date, f'{id_field}__{lookup}': pk})
+            )
+        if reverse:
+            ordering = self.fields
+        else:
+            ordering = tuple(f'-{field}' for field in self.fields)
+        page = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(page) > self.page_size
+        page = page[:self.page_size]
+        if reverse:
+            page.reverse()
+        self.next = self.previous = None
+        if not page:
+            return page
+        if reverse:
+            # Назад пришли со следующей страницы, она точно есть.
+            self.next = self.encode_cursor(False, page[-1])
+            if has_more:
+                self.previous = self.encode_cursor(True, page[0])
+            return page
+        if has_more:
+            self.next = self.encode_cursor(False, page[-1])
+        if cursor is not None:
+            self.previous = self.encode_cursor(True, page[0])
+        return page
+
+    def get_count(self, queryset, request):
+        """
+        Число строк выборки, если оно запрошено параметром count.
+        """
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return queryset.count()
+        if mode == 'estimate':
+            estimate = self.estimate_count(queryset)
+            if estimate is None:
+                return queryset.count()
+            return estimate
+        return None
+
+    def estimate_count(self, queryset):
+        """
+        Оценка числа строк таблицы по статистике PostgreSQL.
+        Для выборки с фильтрами оценка не подходит, возвращается None.
+        """
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql' or queryset.query.where:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        if row is None or row[0] < 0:
+            return None
+        return row[0]
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.next),
+            ('previous', self.previous),
+            ('results', data),
+        ]))
+
+
+class RecipePagination(LimitPageNumberPagination):
+    """
+    Пагинатор ленты рецептов: по умолчанию постраничный,
+    с параметром pagination=cursor — по ключу (pub_date, id)
+    или по полям keyset_fields представления.
+    """
+    mode_query_param = 'pagination'
+    ordering_query_param = 'ordering'
+    keyset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get(self.mode_query_param) == 'cursor':
+            if request.query_params.get(self.ordering_query_param):
+                raise ValidationError({
+                    self.mode_query_param: 'Пагинация по курсору доступна '
+                                           'только для сортировки по дате.'
+                })
+            self.keyset = KeysetPagination(
+                self.get_page_size(request),
+                getattr(view, 'keyset_fields', None)
+            )
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,147 @@
+import logging
+import re
+import sys
+import threading
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.serializers import BaseSerializer
+
+from .instrumentation import view_action, view_name
+
+logger = logging.getLogger(__name__)
+
+# Литералы, которые заменяются при сравнении запросов.
+LITERALS = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\bIN \((?:\?|%s)(?:, (?:\?|%s))*\)'), 'IN (...)'),
+    (re.compile(r'\s+'), ' '),
+)
+SERIALIZER_METHODS = ('to_representation', 'data', 'get_attribute')
+
+_local = threading.local()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    Превышен бюджет запросов представления или найден N+1.
+    """
+
+
+def fingerprint(sql):
+    """
+    Нормализованный текст запроса без значений литералов.
+    """
+    for pattern, replacement in LITERALS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def serializer_source():
+    """
+    Поле сериализатора, при обработке которого выполняется запрос,
+    например SubscriptionSerializer.get_recipes.
+    """
+    frame = sys._getframe(2)
+    while frame is not None:
+        instance = frame.f_locals.get('self')
+        if isinstance(instance, BaseSerializer):
+            name = type(instance).__name__
+            function = frame.f_code.co_name
+            if function not in SERIALIZER_METHODS:
+                return f'{name}.{function}'
+            field = frame.f_locals.get('field')
+            if field is not None and getattr(field, 'field_name', None):
+                return f'{name}.{field.field_name}'
+        frame = frame.f_back
+    return None
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Обертка выполнения SQL: отпечаток запроса и его источник.
+    """
+    queries = getattr(_local, 'queries', None)
+    if queries is not None:
+        queries.append((fingerprint(sql), serializer_source()))
+    return execute(sql, params, many, context)
+
+
+def query_budget(view_func, method):
+    """
+    Бюджет запросов из атрибута query_budget вьюсета: число для всех
+    действий или словарь по действиям.
+    """
+    cls, action = view_action(view_func, method)
+    budget = getattr(cls, 'query_budget', None)
+    if isinstance(budget, dict):
+        budget = budget.get(action)
+    return budget
+
+
+class QueryCheckMiddleware:
+    """
+    Поиск N+1 и контроль бюджета запросов в разработке и тестах.
+    QUERY_CHECK: off - выключено, warn - предупреждение в лог,
+    raise - исключение QueryBudgetExceeded, которое роняет тест.
+    """
+
+    def __init__(self, get_response):
+        if settings.QUERY_CHECK not in ('warn', 'raise'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _local.queries = queries = []
+        _local.view = ('unknown', None)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(record_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            view, budget = _local.view
+            _local.queries = None
+        problems = self.check(queries, budget)
+        if problems:
+            self.report(view, request, problems)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _local.view = (
+            view_name(view_func, request.method),
+            query_budget(view_func, request.method)
+        )
+
+    def check(self, queries, budget):
+        """
+        Повторяющиеся запросы и превышение бюджета.
+        """
+        problems = []
+        if budget is not None and len(queries) > budget:
+            problems.append(f'{len(queries)} запросов при бюджете {budget}')
+        counts = Counter(sql for sql, _ in queries)
+        sources = defaultdict(set)
+        for sql, source in queries:
+            if source is not None:
+                sources[sql].add(source)
+        for sql, count in counts.most_common():
+            if count <= settings.QUERY_REPEAT_LIMIT:
+                break
+            where = ', '.join(sorted(sources[sql])) or 'вне сериализатора'
+            problems.append(f'{count} раз ({where}): {sql}')
+        return problems
+
+    def report(self, view, request, problems):
+        message = f'{view} {request.method} {request.path}: ' + '; '.join(
+            problems
+        )
+        if settings.QUERY_CHECK == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -0,0 +1,165 @@
+import csv
+import io
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework import renderers
+
+from .utils import canvas_method, render_shopping_cart
+
+
+def export_row(item):
+    """
+    Строка списка покупок в формате выгрузки JSON.
+    """
+    return {
+        'name': item['ingredient__name'],
+        'measurement_unit': item['ingredient__measurement_unit'],
+        'amount': item['ingredient_total'],
+    }
+
+
+class ShoppingCartRenderer(renderers.BaseRenderer):
+    """
+    Базовый рендерер списка покупок.
+    Строки агрегата отдаются потоком по мере чтения из базы.
+    """
+    charset = 'utf-8'
+    extension = None
+
+    def lines(self, rows):
+        """
+        Строки файла списка покупок.
+        """
+        raise NotImplementedError(
+            'ShoppingCartRenderer.lines() must be implemented.'
+        )
+
+    def stream(self, rows):
+        """
+        Содержимое файла списка покупок по частям.
+        """
+        for line in self.lines(rows):
+            yield line.encode(self.charset)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return b''.join(self.stream(data))
+
+    def response(self, rows):
+        """
+        Потоковый ответ со списком покупок в формате рендерера.
+        """
+        response = StreamingHttpResponse(
+            self.stream(rows),
+            content_type=f'{self.media_type}; charset={self.charset}'
+        )
+        response['Content-Disposition'] = (
+            'attachment; filename='
+            f'"shopping_cart.{self.extension or self.format}"'
+        )
+        return response
+
+
+class PDFShoppingCartRenderer(ShoppingCartRenderer):
+    """
+    Список покупок в формате PDF.
+    """
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        output = io.BytesIO()
+        render_shopping_cart(data, output)
+        return output.getvalue()
+
+    def stream(self, rows):
+        yield self.render(list(rows))
+
+    def response(self, rows):
+        return canvas_method(rows)
+
+
+class TextShoppingCartRenderer(ShoppingCartRenderer):
+    """
+    Список покупок в виде простого текста.
+    """
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def lines(self, rows):
+        yield 'Список покупок:\n'
+        for number, item in enumerate(rows, start=1):
+            yield (
+                f'{number}. {item["ingredient__name"]} - '
+                f'{item["ingredient_total"]} '
+                f'{item["ingredient__measurement_unit"]}\n'
+            )
+
+
+class CSVShoppingCartRenderer(ShoppingCartRenderer):
+    """
+    Список покупок в формате CSV.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def lines(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(('name', 'measurement_unit', 'amount'))
+        for item in rows:
+            writer.writerow((
+                item['ingredient__name'],
+                item['ingredient__measurement_unit'],
+                item['ingredient_total']
+            ))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+
+class JSONShoppingCartRenderer(ShoppingCartRenderer):
+    """
+    Список покупок в формате JSON.
+    """
+    media_type = 'application/json'
+    format = 'json'
+
+    def lines(self, rows):
+        separator = '['
+        for item in rows:
+            yield separator + json.dumps(
+                export_row(item), ensure_ascii=False
+            )
+            separator = ','
+        yield '[]' if separator == '[' else ']'
+
+
+class MarkdownShoppingCartRenderer(ShoppingCartRenderer):
+    """
+    Список покупок в формате Markdown со списком задач.
+    """
+    media_type = 'text/markdown'
+    format = 'markdown'
+    extension = 'md'
+
+    def lines(self, rows):
+        yield '# Список покупок\n\n'
+        for item in rows:
+            yield (
+                f'- [ ] {item["ingredient__name"]} - '
+                f'{item["ingredient_total"]} '
+                f'{item["ingredient__measurement_unit"]}\n'
+            )
+
+
+# Реестр форматов списка покупок, первый используется по умолчанию.
+SHOPPING_CART_RENDERERS = [
+    PDFShoppingCartRenderer,
+    TextShoppingCartRenderer,
+    CSVShoppingCartRenderer,
+    JSONShoppingCartRenderer,
+    MarkdownShoppingCartRenderer,
+]
@@ -1,3 +1,6 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
 from djoser.serializers import UserCreateSerializer
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
@@ -8,11 +11,17 @@ from recipes.models import (
     Ingredient,
     IngredientRecipe,
     Recipe,
+    ShoppingCartJob,
     Subscribe,
     Tag,
-    TagRecipe
+    TagRecipe,
+    normalize_name
 )
+from recipes.catalog import attach_catalog, ingredient_cache, tag_cache
+from recipes.images import variant_name
+from recipes.shopping_list import apply_deltas
 from users.models import User
+from .fields import CatalogPrimaryKeyRelatedField, StreamingBase64ImageField
 
 
 class CommonSubscribed(metaclass=serializers.SerializerMetaclass):
@@ -28,6 +37,8 @@ class CommonSubscribed(metaclass=serializers.SerializerMetaclass):
         request = self.context.get('request')
         if request.user.is_anonymous:
             return False
+        if hasattr(obj, 'subscribed'):
+            return obj.subscribed
         return Subscribe.objects.filter(
             user=request.user,
             following__id=obj.id
@@ -49,6 +60,8 @@ class CommonRecipe(metaclass=serializers.SerializerMetaclass):
         request = self.context.get('request')
         if request.user.is_anonymous:
             return False
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         return Favorite.objects.filter(
             user=request.user,
             recipe__id=obj.id
@@ -61,6 +74,8 @@ class CommonRecipe(metaclass=serializers.SerializerMetaclass):
         request = self.context.get('request')
         if request.user.is_anonymous:
             return False
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         return Cart.objects.filter(
             user=request.user,
             recipe__id=obj.id
@@ -75,9 +90,29 @@ class CommonCount(metaclass=serializers.SerializerMetaclass):
 
     def get_recipes_count(self, obj):
         """
-        Подсчет количества рецептов автора.
+        Количество рецептов автора из денормализованного счетчика.
         """
-        return Recipe.objects.filter(author__id=obj.id).count()
+        return obj.recipes_count
+
+
+class CommonThumbnail(metaclass=serializers.SerializerMetaclass):
+    """
+    Класс для ссылки на уменьшенную копию изображения рецепта.
+    """
+    thumbnail = serializers.SerializerMethodField()
+    thumbnail_width = settings.RECIPE_CARD_IMAGE_WIDTH
+
+    def get_thumbnail(self, obj):
+        """
+        Ссылка на копию изображения ширины thumbnail_width.
+        """
+        if not obj.image:
+            return None
+        url = default_storage.url(variant_name(obj, self.thumbnail_width))
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
 
 
 class RegistrationSerializer(UserCreateSerializer, CommonSubscribed):
@@ -126,6 +161,25 @@ class IngredientSerializer(serializers.ModelSerializer):
             'measurement_unit': {'required': False}
         }
 
+    def validate(self, data):
+        """
+        Проверка, что продукта с тем же ключом названия и единицей
+        измерения еще нет.
+        """
+        name = data.get('name', getattr(self.instance, 'name', ''))
+        unit = data.get(
+            'measurement_unit',
+            getattr(self.instance, 'measurement_unit', '')
+        )
+        if Ingredient.objects.filter(
+            name_key=normalize_name(name),
+            measurement_unit=unit
+        ).exclude(pk=getattr(self.instance, 'pk', None)).exists():
+            raise serializers.ValidationError(
+                'Такой продукт с этой единицей уже есть.'
+            )
+        return data
+
 
 class IngredientAmountSerializer(serializers.ModelSerializer):
     """
@@ -149,7 +203,7 @@ class IngredientAmountRecipeSerializer(serializers.ModelSerializer):
     """
     Сериализатор продуктов с количеством для записи.
     """
-    id = serializers.IntegerField(source='ingredient.id')
+    id = serializers.IntegerField(source='ingredient_id')
 
     class Meta:
         """
@@ -196,12 +250,40 @@ class CartSerializer(serializers.Serializer):
     image = Base64ImageField(max_length=None, use_url=False,)
 
 
-class RecipeSerializer(serializers.ModelSerializer, CommonRecipe):
+class ShoppingCartJobSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор задачи генерации списка покупок.
+    """
+    class Meta:
+        """
+        Мета параметры сериализатора задачи списка покупок.
+        """
+        model = ShoppingCartJob
+        fields = ('id', 'status', 'created', 'finished')
+
+
+class RecipeListSerializer(serializers.ListSerializer):
+    """
+    Сериализатор списка рецептов: теги и продукты всей страницы
+    берутся из кэша справочников одним вызовом.
+    """
+
+    def to_representation(self, data):
+        recipes = list(data)
+        attach_catalog(recipes)
+        return super().to_representation(recipes)
+
+
+class RecipeSerializer(
+    serializers.ModelSerializer,
+    CommonRecipe,
+    CommonThumbnail
+):
     """
     Сериализатор модели рецептов.
     """
     author = RegistrationSerializer(read_only=True)
-    tags = TagSerializer(many=True)
+    tags = TagSerializer(source='catalog_tags', many=True)
     ingredients = IngredientAmountSerializer(
         source='ingredientrecipes',
         many=True
@@ -213,11 +295,13 @@ class RecipeSerializer(serializers.ModelSerializer, CommonRecipe):
         Мета параметры сериализатора модели рецептов.
         """
         model = Recipe
+        list_serializer_class = RecipeListSerializer
         fields = (
             'id',
             'author',
             'name',
             'image',
+            'thumbnail',
             'text',
             'ingredients',
             'tags',
@@ -226,21 +310,26 @@ class RecipeSerializer(serializers.ModelSerializer, CommonRecipe):
             'is_favorited'
         )
 
+    def to_representation(self, instance):
+        attach_catalog([instance])
+        return super().to_representation(instance)
+
 
 class RecipeSerializerPost(serializers.ModelSerializer, CommonRecipe):
     """
     Сериализатор модели рецептов.
     """
     author = RegistrationSerializer(read_only=True)
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = CatalogPrimaryKeyRelatedField(
         queryset=Tag.objects.all(),
+        cache=tag_cache,
         many=True
     )
     ingredients = IngredientAmountRecipeSerializer(
         source='ingredientrecipes',
         many=True
     )
-    image = Base64ImageField(max_length=None, use_url=False,)
+    image = StreamingBase64ImageField(max_length=None, use_url=False,)
 
     class Meta:
         """
@@ -263,115 +352,154 @@ class RecipeSerializerPost(serializers.ModelSerializer, CommonRecipe):
     def validate_ingredients(self, value):
         """
         Валидация продуктов в рецепте.
+        Наличие всех продуктов проверяется по кэшу справочника.
         """
-        ingredients_list = []
-        ingredients = value
-        for ingredient in ingredients:
+        ingredient_ids = set()
+        for ingredient in value:
             if ingredient['amount'] < 1:
                 raise serializers.ValidationError(
                     'Количество должно быть равным или больше 1!'
                 )
-            id_to_check = ingredient['ingredient']['id']
-            ingredient_to_check = Ingredient.objects.filter(id=id_to_check)
-            if not ingredient_to_check.exists():
-                raise serializers.ValidationError(
-                    'Данного продукта нет в базе!'
-                )
-            if ingredient_to_check in ingredients_list:
+            id_to_check = ingredient['ingredient_id']
+            if id_to_check in ingredient_ids:
                 raise serializers.ValidationError(
                     'Данные продукты повторяются в рецепте!'
                 )
-            ingredients_list.append(ingredient_to_check)
+            ingredient_ids.add(id_to_check)
+        existing = ingredient_cache.get_many('id', ingredient_ids)
+        if len(existing) != len(ingredient_ids):
+            raise serializers.ValidationError(
+                'Данного продукта нет в базе!'
+            )
         return value
 
-    def add_tags(self, tags_data, recipe):
+    def set_tags(self, tags_data, recipe):
         """
-        Метод добавления тегов к рецепту.
+        Метод установки тегов рецепта: удаляются только лишние теги,
+        недостающие добавляются одним запросом.
         """
-        for tag_data in tags_data:
-            recipe.tags.add(tag_data)
-            recipe.save()
+        tag_ids = {tag.id for tag in tags_data}
+        existing = set(
+            TagRecipe.objects.filter(recipe=recipe).values_list(
+                'tag_id', flat=True
+            )
+        )
+        if existing - tag_ids:
+            TagRecipe.objects.filter(
+                recipe=recipe,
+                tag_id__in=existing - tag_ids
+            ).delete()
+        TagRecipe.objects.bulk_create(
+            TagRecipe(tag_id=tag_id, recipe=recipe)
+            for tag_id in tag_ids - existing
+        )
         return recipe
 
-    def add_ingredients(self, ingredients, recipe):
+    def set_ingredients(self, ingredients, recipe):
         """
-        Метод добавления ингредиетнов к рецепту.
+        Метод установки продуктов рецепта: сравнение с текущими
+        строками, удаление, добавление и изменение пачками.
+        Разница переносится в списки покупок пользователей,
+        у которых рецепт в корзине.
         """
-        for ingredient in ingredients:
-            if not IngredientRecipe.objects.filter(
-                    ingredient_id=ingredient['ingredient']['id'],
-                    recipe=recipe
-            ).exists():
-                ingredientrecipe = IngredientRecipe.objects.create(
-                    ingredient_id=ingredient['ingredient']['id'],
-                    recipe=recipe
-                )
-                ingredientrecipe.amount = ingredient['amount']
-                ingredientrecipe.save()
-            else:
-                IngredientRecipe.objects.filter(
-                    recipe=recipe
-                ).delete()
-                recipe.delete()
-                raise serializers.ValidationError(
-                    'Данные продукты повторяются в рецепте!'
-                )
+        amounts = {
+            ingredient['ingredient_id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        existing = {
+            ingredientrecipe.ingredient_id: ingredientrecipe
+            for ingredientrecipe in IngredientRecipe.objects.filter(
+                recipe=recipe
+            )
+        }
+        deltas = {
+            ingredient_id: amounts.get(ingredient_id, 0) - (
+                existing[ingredient_id].amount
+                if ingredient_id in existing else 0
+            )
+            for ingredient_id in amounts.keys() | existing.keys()
+        }
+        removed = existing.keys() - amounts.keys()
+        if removed:
+            IngredientRecipe.objects.filter(
+                recipe=recipe,
+                ingredient_id__in=removed
+            ).delete()
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
+                ingredient_id=ingredient_id,
+                recipe=recipe,
+                amount=amount
+            )
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id not in existing
+        )
+        changed = []
+        for ingredient_id, ingredientrecipe in existing.items():
+            amount = amounts.get(ingredient_id)
+            if amount is not None and amount != ingredientrecipe.amount:
+                ingredientrecipe.amount = amount
+                changed.append(ingredientrecipe)
+        if changed:
+            IngredientRecipe.objects.bulk_update(changed, ['amount'])
+        if any(deltas.values()):
+            apply_deltas(
+                list(recipe.carts.values_list('user_id', flat=True)),
+                deltas
+            )
         return recipe
 
+    @transaction.atomic
     def create(self, validated_data):
         """
         Метод создания рецептов.
         """
-        author = validated_data.get('author')
         tags_data = validated_data.pop('tags')
-        name = validated_data.get('name')
-        image = validated_data.get('image')
-        text = validated_data.get('text')
-        cooking_time = validated_data.get('cooking_time')
         ingredients = validated_data.pop('ingredientrecipes')
-        recipe = Recipe.objects.create(
-            author=author,
-            name=name,
-            image=image,
-            text=text,
-            cooking_time=cooking_time,
+        recipe = Recipe.objects.create(**validated_data)
+        TagRecipe.objects.bulk_create(
+            TagRecipe(tag=tag, recipe=recipe) for tag in tags_data
+        )
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
+                ingredient_id=ingredient['ingredient_id'],
+                recipe=recipe,
+                amount=ingredient['amount']
+            )
+            for ingredient in ingredients
         )
-        recipe = self.add_tags(tags_data, recipe)
-        recipe = self.add_ingredients(ingredients, recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         """
-        Метод редактирования рецептов.
+        Метод редактирования рецептов. При частичном изменении
+        теги и продукты, которых нет в запросе, не меняются.
         """
-        tags_data = validated_data.pop('tags')
-        ingredients = validated_data.pop('ingredientrecipes')
-        TagRecipe.objects.filter(recipe=instance).delete()
-        IngredientRecipe.objects.filter(recipe=instance).delete()
-        instance = self.add_tags(
-            tags_data,
-            instance
-        )
-        instance = self.add_ingredients(
-            ingredients,
-            instance
-        )
-        super().update(instance, validated_data)
-        instance.save()
-        return instance
+        tags_data = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('ingredientrecipes', None)
+        if tags_data is not None:
+            self.set_tags(tags_data, instance)
+        if ingredients is not None:
+            self.set_ingredients(ingredients, instance)
+        if 'image' in validated_data:
+            validated_data['image_variants'] = ''
+        return super().update(instance, validated_data)
 
 
-class RecipeMinifieldSerializer(serializers.ModelSerializer):
+class RecipeMinifieldSerializer(serializers.ModelSerializer, CommonThumbnail):
     """
     Сериализатор для упрощенного отображения модели рецептов.
     """
+    thumbnail_width = settings.RECIPE_PREVIEW_IMAGE_WIDTH
+
     class Meta:
         """
         Мета параметры сериализатора упрощенного
         отображения модели рецептов.
         """
         model = Recipe
-        fields = ('id', 'name', 'cooking_time', 'image')
+        fields = ('id', 'name', 'cooking_time', 'image', 'thumbnail')
 
 
 class SubscriptionSerializer(
@@ -405,6 +533,11 @@ class SubscriptionSerializer(
         Метод получения данных рецептов автора,
         в зависимости от параметра recipes_limit.
         """
+        if hasattr(obj, 'recipes_preview'):
+            return RecipeMinifieldSerializer(
+                obj.recipes_preview,
+                many=True
+            ).data
         request = self.context.get('request')
         if request.GET.get('recipes_limit'):
             recipes_limit = int(request.GET.get('recipes_limit'))
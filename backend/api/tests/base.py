@@ -0,0 +1,114 @@
+import shutil
+import tempfile
+
+from django.core.cache import caches
+from django.test import override_settings
+from rest_framework.test import APIClient, APITestCase
+
+from recipes.catalog import catalog_versions
+from recipes.models import (
+    Ingredient,
+    IngredientRecipe,
+    Recipe,
+    TableVersion,
+    Tag,
+    TagRecipe
+)
+from recipes.search import ingredient_index
+from users.models import User
+
+# Однопиксельный GIF для полей изображения.
+IMAGE = (
+    'data:image/gif;base64,'
+    'R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7'
+)
+
+
+@override_settings(QUERY_CHECK='raise', CATALOG_CACHE_CHECK_INTERVAL=3600)
+class RecipeAPITestCase(APITestCase):
+    """
+    Рецепты нескольких авторов с тегами и продуктами. Перед каждым
+    тестом кэши процесса сбрасываются, бюджеты запросов представлений
+    проверяются QueryCheckMiddleware.
+    """
+    recipes_total = 60
+    tags_per_recipe = 3
+    ingredients_per_recipe = 4
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(
+                username=f'user{number}',
+                email=f'user{number}@example.com',
+                password='password',
+                first_name='Имя',
+                last_name='Фамилия'
+            )
+            for number in range(3)
+        ]
+        cls.user = cls.users[0]
+        cls.tags = [
+            Tag.objects.create(
+                name=f'Тег {number}', color=f'#00000{number}',
+                slug=f'tag{number}'
+            )
+            for number in range(5)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'Продукт {number}', measurement_unit='г'
+            )
+            for number in range(10)
+        ]
+        Recipe.objects.bulk_create(
+            Recipe(
+                author=cls.users[number % len(cls.users)],
+                name=f'Рецепт {number}',
+                image='recipes/image/test.gif',
+                text='Описание',
+                cooking_time=number + 1
+            )
+            for number in range(cls.recipes_total)
+        )
+        cls.recipes = list(Recipe.objects.order_by('id'))
+        TagRecipe.objects.bulk_create(
+            TagRecipe(recipe=recipe, tag=cls.tags[(number + shift) % 5])
+            for number, recipe in enumerate(cls.recipes)
+            for shift in range(cls.tags_per_recipe)
+        )
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
+                recipe=recipe,
+                ingredient=cls.ingredients[(number + shift) % 10],
+                amount=shift + 1
+            )
+            for number, recipe in enumerate(cls.recipes)
+            for shift in range(cls.ingredients_per_recipe)
+        )
+        TableVersion.objects.bump(Recipe)
+
+    def setUp(self):
+        catalog_versions.reset()
+        ingredient_index.clear()
+        caches['recipes'].clear()
+        self.anonymous = APIClient()
+        self.client = self.client_for(self.user)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
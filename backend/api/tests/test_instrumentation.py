@@ -0,0 +1,43 @@
+import itertools
+from unittest import mock
+
+from django.test import SimpleTestCase
+from rest_framework import serializers
+
+from api import instrumentation
+from api.instrumentation import RequestMetrics, instrument_serializers
+
+
+class InnerSerializer(serializers.Serializer):
+    name = serializers.CharField()
+
+
+class OuterSerializer(serializers.Serializer):
+    inner = serializers.SerializerMethodField()
+
+    def get_inner(self, obj):
+        return InnerSerializer(obj).data
+
+
+class SerializerTimeTest(SimpleTestCase):
+    """
+    Время вложенной сериализации не прибавляется ко времени внешней.
+    """
+
+    def setUp(self):
+        instrument_serializers()
+        self.metrics = instrumentation._local.metrics = RequestMetrics()
+        self.addCleanup(setattr, instrumentation._local, 'metrics', None)
+
+    def test_nested_data_counted_once(self):
+        # Каждое чтение часов на секунду позже предыдущего. Внешний
+        # вызов читает их первым и последним, вложенный между ними
+        # только при входе: его время входит во время внешнего.
+        clock = itertools.count()
+        with mock.patch.object(
+            instrumentation.time, 'perf_counter', lambda: next(clock)
+        ):
+            data = OuterSerializer({'name': 'Капуста'}).data
+        self.assertEqual(data, {'inner': {'name': 'Капуста'}})
+        self.assertEqual(self.metrics.serializer_time, 2)
+        self.assertEqual(self.metrics.serializer_depth, 0)
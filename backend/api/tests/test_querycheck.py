@@ -0,0 +1,60 @@
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework import serializers
+
+from api.querycheck import QueryBudgetExceeded, QueryCheckMiddleware
+from recipes.models import Recipe
+from users.models import User
+
+
+class AuthorSerializer(serializers.Serializer):
+    username = serializers.CharField()
+    recipes = serializers.SerializerMethodField()
+
+    def get_recipes(self, obj):
+        return Recipe.objects.filter(author=obj).count()
+
+
+def authors_view(request):
+    """
+    Представление с N+1: число рецептов каждого автора отдельным
+    запросом.
+    """
+    AuthorSerializer(User.objects.order_by('id'), many=True).data
+    return HttpResponse()
+
+
+@override_settings(QUERY_CHECK='raise', QUERY_REPEAT_LIMIT=5)
+class QueryCheckTest(TestCase):
+    """
+    QueryCheckMiddleware находит повторяющийся запрос и называет поле
+    сериализатора, в котором он выполняется.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create(
+            User(username=f'author{number}', email=f'a{number}@example.com')
+            for number in range(6)
+        )
+
+    def request(self):
+        return QueryCheckMiddleware(authors_view)(
+            RequestFactory().get('/api/authors/')
+        )
+
+    def test_repeated_query_raises(self):
+        with self.assertRaisesMessage(
+            QueryBudgetExceeded, '6 раз (AuthorSerializer.get_recipes)'
+        ):
+            self.request()
+
+    def test_repeat_limit(self):
+        User.objects.filter(username='author0').delete()
+        self.assertEqual(self.request().status_code, 200)
+
+    @override_settings(QUERY_CHECK='warn')
+    def test_warn_logs(self):
+        with self.assertLogs('api.querycheck', 'WARNING') as logs:
+            self.assertEqual(self.request().status_code, 200)
+        self.assertIn('AuthorSerializer.get_recipes', logs.output[0])
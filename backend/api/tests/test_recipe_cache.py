@@ -0,0 +1,45 @@
+from django.urls import reverse
+
+from recipes.trending import refresh_trending
+from .base import RecipeAPITestCase
+
+LIST_URL = reverse('api:recipes-list')
+
+
+class AnonymousCacheOrderingTest(RecipeAPITestCase):
+    """
+    Кэш ответов анонимным пользователям не отдает устаревший порядок
+    сортировок по избранному и рейтингу.
+    """
+
+    def setUp(self):
+        super().setUp()
+        # У всех рецептов пока нет избранного: первым идет последний.
+        self.recipe = self.recipes[0]
+
+    def first_id(self, ordering):
+        response = self.anonymous.get(
+            LIST_URL, {'ordering': ordering, 'limit': 6}
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.get('X-Cache'), response.data['results'][0]['id']
+
+    def favorite(self):
+        response = self.client.post(
+            reverse('api:favorite', args=[self.recipe.id])
+        )
+        self.assertLess(response.status_code, 300)
+
+    def test_popular_after_favorite(self):
+        self.assertNotEqual(self.first_id('popular')[1], self.recipe.id)
+        self.favorite()
+        self.assertEqual(self.first_id('popular'), (None, self.recipe.id))
+
+    def test_trending_after_refresh(self):
+        self.first_id('trending')
+        self.assertEqual(self.first_id('trending')[0], 'HIT')
+        self.favorite()
+        refresh_trending()
+        self.assertEqual(
+            self.first_id('trending'), ('MISS', self.recipe.id)
+        )
@@ -0,0 +1,68 @@
+from django.test import override_settings
+from django.urls import reverse
+
+from recipes.models import Recipe, TimelineEntry
+from .base import IMAGE, RecipeAPITestCase
+
+FEED_URL = reverse('api:recipes-feed')
+
+
+@override_settings(RECIPE_FEED_STRATEGY='timeline', RECIPE_TIMELINE_BACKFILL=5)
+class TimelineFeedTest(RecipeAPITestCase):
+    """
+    Лента в режиме timeline: подписка добавляет последние рецепты
+    автора, новый рецепт попадает в ленты подписчиков, отписка
+    удаляет рецепты автора из ленты.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.follower = self.users[1]
+        self.follower_client = self.client_for(self.follower)
+        self.subscribe_url = reverse('api:subscribe', args=[self.user.id])
+
+    def timeline(self):
+        return set(TimelineEntry.objects.filter(
+            user=self.follower
+        ).values_list('recipe_id', flat=True))
+
+    def feed(self):
+        response = self.follower_client.get(
+            FEED_URL, {'limit': self.recipes_total}
+        )
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def latest_recipes(self, count):
+        return list(Recipe.objects.filter(author=self.user).order_by(
+            '-pub_date', '-id'
+        ).values_list('id', flat=True)[:count])
+
+    def test_follow_and_unfollow(self):
+        response = self.follower_client.post(self.subscribe_url)
+        self.assertLess(response.status_code, 300)
+        latest = self.latest_recipes(5)
+        self.assertEqual(self.timeline(), set(latest))
+        self.assertEqual(self.feed(), latest)
+        response = self.follower_client.delete(self.subscribe_url)
+        self.assertLess(response.status_code, 300)
+        self.assertEqual(self.timeline(), set())
+        self.assertEqual(self.feed(), [])
+
+    def test_new_recipe_fanned_out(self):
+        self.follower_client.post(self.subscribe_url)
+        response = self.client.post(
+            reverse('api:recipes-list'),
+            {
+                'name': 'Новый рецепт',
+                'text': 'Описание',
+                'cooking_time': 10,
+                'image': IMAGE,
+                'tags': [self.tags[0].id],
+                'ingredients': [{'id': self.ingredients[0].id, 'amount': 1}],
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(response.data['id'], self.timeline())
+        self.assertEqual(self.feed()[0], response.data['id'])
@@ -0,0 +1,68 @@
+from collections import defaultdict
+
+from django.urls import reverse
+
+from recipes.models import TagRecipe
+from .base import RecipeAPITestCase
+
+LIST_URL = reverse('api:recipes-list')
+
+
+class RecipeTagFilterTest(RecipeAPITestCase):
+    """
+    Фильтр по тегам: рецепт с несколькими подходящими тегами попадает
+    в выдачу один раз, tags_mode=all оставляет рецепты со всеми тегами.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.recipe_tags = defaultdict(set)
+        for recipe_id, slug in TagRecipe.objects.values_list(
+            'recipe_id', 'tag__slug'
+        ):
+            self.recipe_tags[recipe_id].add(slug)
+
+    def filtered(self, slugs, mode=None):
+        params = {'tags': slugs, 'limit': self.recipes_total}
+        if mode is not None:
+            params['tags_mode'] = mode
+        response = self.client.get(LIST_URL, params)
+        self.assertEqual(response.status_code, 200)
+        ids = [recipe['id'] for recipe in response.data['results']]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(response.data['count'], len(ids))
+        return set(ids)
+
+    def test_any_mode(self):
+        for slugs in (['tag0'], ['tag0', 'tag1', 'tag2']):
+            with self.subTest(tags=slugs):
+                self.assertEqual(self.filtered(slugs), {
+                    recipe_id
+                    for recipe_id, tags in self.recipe_tags.items()
+                    if tags & set(slugs)
+                })
+
+    def test_all_mode(self):
+        for slugs in (['tag0', 'tag1'], ['tag0', 'tag1', 'tag2']):
+            with self.subTest(tags=slugs):
+                ids = self.filtered(slugs, 'all')
+                self.assertTrue(ids)
+                self.assertEqual(ids, {
+                    recipe_id
+                    for recipe_id, tags in self.recipe_tags.items()
+                    if tags >= set(slugs)
+                })
+
+    def test_recipe_with_all_matching_tags_listed_once(self):
+        slugs = ['tag0', 'tag1', 'tag2']
+        recipe = self.recipes[0]
+        self.assertEqual(self.recipe_tags[recipe.id], set(slugs))
+        for mode in ('any', 'all'):
+            with self.subTest(mode=mode):
+                self.assertIn(recipe.id, self.filtered(slugs, mode))
+
+    def test_all_mode_repeated_tag(self):
+        self.assertEqual(
+            self.filtered(['tag0', 'tag0'], 'all'),
+            self.filtered(['tag0'])
+        )
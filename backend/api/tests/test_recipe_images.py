@@ -0,0 +1,90 @@
+import io
+import json
+from base64 import b64encode
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.urls import reverse
+from PIL import Image
+
+from recipes.models import Recipe
+from .base import IMAGE, RecipeAPITestCase
+
+LIST_URL = reverse('api:recipes-list')
+
+
+def image_data_uri(width, height):
+    output = io.BytesIO()
+    Image.new('RGB', (width, height), 'green').save(output, 'PNG')
+    return 'data:image/png;base64,' + b64encode(output.getvalue()).decode()
+
+
+class RecipeImageVariantsTest(RecipeAPITestCase):
+    """
+    Фоновая обработка изображения нового рецепта: уменьшенные копии
+    всех ширин в WebP и JPEG, ссылка на копию в карточке рецепта,
+    сброс копий при замене изображения.
+    """
+
+    def setUp(self):
+        super().setUp()
+        response = self.client.post(
+            LIST_URL,
+            {
+                'name': 'Рецепт с изображением',
+                'text': 'Описание',
+                'cooking_time': 10,
+                'image': image_data_uri(1600, 800),
+                'tags': [self.tags[0].id],
+                'ingredients': [{'id': self.ingredients[0].id, 'amount': 1}],
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.recipe = Recipe.objects.get(id=response.data['id'])
+        # У рецептов из setUpTestData нет файлов изображений.
+        Recipe.objects.exclude(id=self.recipe.id).update(image_variants='{}')
+        self.url = reverse('api:recipes-detail', args=[self.recipe.id])
+
+    def process_images(self):
+        errors = io.StringIO()
+        call_command(
+            'process_recipe_images', once=True, workers=1, stderr=errors
+        )
+        self.assertEqual(errors.getvalue(), '')
+        self.recipe.refresh_from_db()
+
+    def test_variants(self):
+        self.assertEqual(self.recipe.image_variants, '')
+        self.process_images()
+        variants = json.loads(self.recipe.image_variants)
+        self.assertEqual(
+            set(variants),
+            {str(width) for width in settings.RECIPE_IMAGE_WIDTHS}
+        )
+        for width in settings.RECIPE_IMAGE_WIDTHS:
+            for extension, pillow_format in (
+                ('webp', 'WEBP'), ('jpeg', 'JPEG')
+            ):
+                with self.subTest(width=width, extension=extension):
+                    with default_storage.open(
+                        variants[str(width)][extension]
+                    ) as variant:
+                        image = Image.open(variant)
+                        self.assertEqual(image.format, pillow_format)
+                        self.assertEqual(image.size, (width, width // 2))
+        response = self.client.get(self.url)
+        self.assertTrue(response.data['thumbnail'].endswith(
+            variants[str(settings.RECIPE_CARD_IMAGE_WIDTH)]['webp']
+        ))
+
+    def test_new_image_resets_variants(self):
+        self.process_images()
+        self.assertNotEqual(self.recipe.image_variants, '')
+        response = self.client.patch(
+            self.url, {'image': IMAGE}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_variants, '')
@@ -0,0 +1,60 @@
+from base64 import urlsafe_b64encode
+
+from django.urls import reverse
+
+from recipes.models import Recipe
+from .base import RecipeAPITestCase
+
+LIST_URL = reverse('api:recipes-list')
+
+
+class RecipeCursorPaginationTest(RecipeAPITestCase):
+    """
+    Пагинация по курсору: страницы вперед и назад проходят все рецепты
+    без пропусков и повторов, неверный курсор дает 404.
+    """
+    page_size = 7
+
+    def page(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_round_trip(self):
+        expected = list(Recipe.objects.order_by(
+            '-pub_date', '-id'
+        ).values_list('id', flat=True))
+        pages = []
+        data = self.page(
+            LIST_URL, {'pagination': 'cursor', 'limit': self.page_size}
+        )
+        self.assertIsNone(data['previous'])
+        while True:
+            pages.append([recipe['id'] for recipe in data['results']])
+            if data['next'] is None:
+                break
+            data = self.page(data['next'])
+        self.assertEqual(
+            [recipe_id for page in pages for recipe_id in page], expected
+        )
+        self.assertTrue(all(
+            len(page) == self.page_size for page in pages[:-1]
+        ))
+        back = []
+        while data['previous'] is not None:
+            data = self.page(data['previous'])
+            back.append([recipe['id'] for recipe in data['results']])
+        self.assertEqual(back, pages[-2::-1])
+
+    def test_invalid_cursor(self):
+        for cursor in (
+            'не курсор',
+            urlsafe_b64encode(b'f|1').decode(),
+            urlsafe_b64encode(b'f|not a date|1').decode(),
+            urlsafe_b64encode(b'f|2023-01-01T00:00:00|abc').decode(),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(
+                    LIST_URL, {'pagination': 'cursor', 'cursor': cursor}
+                )
+                self.assertEqual(response.status_code, 404)
@@ -0,0 +1,97 @@
+from django.urls import reverse
+
+from recipes.catalog import catalog_versions
+
+from .base import RecipeAPITestCase
+
+LIST_URL = reverse('api:recipes-list')
+
+
+class RecipeQueriesTest(RecipeAPITestCase):
+    """
+    Число запросов ленты и страницы рецепта не зависит от размера
+    страницы, числа тегов и продуктов.
+    """
+    # Число рецептов, страница рецептов, авторы, теги рецептов,
+    # продукты рецептов. Страница рецепта вместо числа рецептов
+    # проверяет его состояние и версии справочников для ETag.
+    list_queries = 5
+    detail_queries = 6
+    # Анонимный ответ дополнительно читает версию таблицы рецептов
+    # для ключа кэша ответов.
+    anonymous_queries = 1
+
+    def warm_up(self, client, **params):
+        """
+        Запрос всех рецептов загружает их теги и продукты в кэш
+        справочников процесса.
+        """
+        response = client.get(
+            LIST_URL, {'limit': self.recipes_total, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def detail_url(self, recipe):
+        return reverse('api:recipes-detail', args=[recipe.id])
+
+    def test_list(self):
+        for client, queries in (
+            (self.anonymous, self.list_queries + self.anonymous_queries),
+            (self.client, self.list_queries),
+        ):
+            self.warm_up(client)
+            for limit in (6, 50):
+                with self.subTest(client=client, limit=limit):
+                    with self.assertNumQueries(queries):
+                        response = client.get(LIST_URL, {'limit': limit})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(len(response.data['results']), limit)
+
+    def test_list_filtered_by_tags(self):
+        tags = {'tags': ['tag0', 'tag1']}
+        self.warm_up(self.client, **tags)
+        with self.assertNumQueries(self.list_queries):
+            response = self.client.get(LIST_URL, {'limit': 50, **tags})
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail(self):
+        recipe = self.recipes[0]
+        for client, queries in (
+            (self.anonymous, self.detail_queries + self.anonymous_queries),
+            (self.client, self.detail_queries),
+        ):
+            self.warm_up(client)
+            with self.subTest(client=client):
+                with self.assertNumQueries(queries):
+                    response = client.get(self.detail_url(recipe))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    len(response.data['tags']), self.tags_per_recipe
+                )
+                self.assertEqual(
+                    len(response.data['ingredients']),
+                    self.ingredients_per_recipe
+                )
+
+    def test_anonymous_cache_hit(self):
+        self.warm_up(self.anonymous)
+        self.anonymous.get(LIST_URL, {'limit': 6})
+        # Только версия таблицы рецептов для ключа кэша.
+        with self.assertNumQueries(self.anonymous_queries):
+            response = self.anonymous.get(LIST_URL, {'limit': 6})
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_cold_start_within_budget(self):
+        # Бюджеты QueryCheckMiddleware учитывают загрузку справочников.
+        response = self.client.get(LIST_URL, {'limit': 50})
+        self.assertEqual(response.status_code, 200)
+        catalog_versions.reset()
+        response = self.client.get(self.detail_url(self.recipes[0]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_not_found(self):
+        for client in (self.anonymous, self.client):
+            for recipe_id in ('abc', '0', str(self.recipes[-1].id + 1)):
+                with self.subTest(client=client, recipe_id=recipe_id):
+                    response = client.get(f'{LIST_URL}{recipe_id}/')
+                    self.assertEqual(response.status_code, 404)
@@ -0,0 +1,119 @@
+from django.urls import reverse
+
+from recipes.models import IngredientRecipe, Recipe, TagRecipe
+from .base import IMAGE, RecipeAPITestCase
+
+LIST_URL = reverse('api:recipes-list')
+
+
+class RecipeWriteTest(RecipeAPITestCase):
+    """
+    Создание и изменение рецепта: число запросов не зависит от числа
+    тегов и продуктов, частичное изменение не трогает не переданные
+    поля.
+    """
+    create_queries = 14
+    # Изменение с удалением, добавлением и изменением строк тегов
+    # и продуктов.
+    update_queries = 22
+
+    def setUp(self):
+        super().setUp()
+        # Справочники загружаются в кэш процесса до замеров.
+        self.client.get(LIST_URL, {'limit': self.recipes_total})
+        self.recipe = self.recipes[0]
+        self.url = reverse('api:recipes-detail', args=[self.recipe.id])
+
+    def payload(self, tags, ingredients):
+        return {
+            'name': 'Новый рецепт',
+            'text': 'Описание',
+            'cooking_time': 10,
+            'image': IMAGE,
+            'tags': [tag.id for tag in tags],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': amount}
+                for amount, ingredient in enumerate(ingredients, 1)
+            ],
+        }
+
+    def recipe_tags(self, recipe):
+        return set(TagRecipe.objects.filter(recipe=recipe).values_list(
+            'tag_id', flat=True
+        ))
+
+    def recipe_ingredients(self, recipe):
+        return dict(IngredientRecipe.objects.filter(
+            recipe=recipe
+        ).values_list('ingredient_id', 'amount'))
+
+    def test_create(self):
+        for tags, ingredients in (
+            (self.tags[:1], self.ingredients[:1]),
+            (self.tags, self.ingredients),
+        ):
+            with self.subTest(ingredients=len(ingredients)):
+                with self.assertNumQueries(self.create_queries):
+                    response = self.client.post(
+                        LIST_URL,
+                        self.payload(tags, ingredients),
+                        format='json'
+                    )
+                self.assertEqual(response.status_code, 201)
+                recipe = Recipe.objects.get(id=response.data['id'])
+                self.assertEqual(
+                    self.recipe_tags(recipe), {tag.id for tag in tags}
+                )
+                self.assertEqual(
+                    len(self.recipe_ingredients(recipe)), len(ingredients)
+                )
+
+    def test_update(self):
+        for tags, ingredients in (
+            (self.tags[3:], self.ingredients[2:5]),
+            (self.tags[:2], self.ingredients[4:]),
+        ):
+            with self.subTest(ingredients=len(ingredients)):
+                payload = self.payload(tags, ingredients)
+                del payload['image']
+                with self.assertNumQueries(self.update_queries):
+                    response = self.client.patch(
+                        self.url, payload, format='json'
+                    )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    self.recipe_tags(self.recipe), {tag.id for tag in tags}
+                )
+                self.assertEqual(
+                    self.recipe_ingredients(self.recipe),
+                    {
+                        ingredient.id: amount
+                        for amount, ingredient in enumerate(ingredients, 1)
+                    }
+                )
+
+    def test_partial_update_keeps_tags_and_ingredients(self):
+        tags = self.recipe_tags(self.recipe)
+        ingredients = self.recipe_ingredients(self.recipe)
+        response = self.client.patch(
+            self.url, {'name': 'Другое название'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.name, 'Другое название')
+        self.assertEqual(self.recipe_tags(self.recipe), tags)
+        self.assertEqual(self.recipe_ingredients(self.recipe), ingredients)
+
+    def test_partial_update_ingredients_only(self):
+        tags = self.recipe_tags(self.recipe)
+        response = self.client.patch(
+            self.url,
+            {'ingredients': [{'id': self.ingredients[9].id, 'amount': 7}]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.recipe_tags(self.recipe), tags)
+        self.assertEqual(
+            self.recipe_ingredients(self.recipe),
+            {self.ingredients[9].id: 7}
+        )
@@ -0,0 +1,257 @@
+import io
+
+from django.contrib.admin import site
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.forms.models import model_to_dict
+from django.test import RequestFactory
+from django.urls import reverse
+
+from recipes.models import (
+    Cart,
+    Ingredient,
+    IngredientRecipe,
+    Recipe,
+    ShoppingListItem
+)
+from recipes.shopping_list import apply_deltas, cart_totals
+from users.models import User
+from .base import RecipeAPITestCase
+
+
+class ShoppingListTestCase(RecipeAPITestCase):
+    """
+    Рецепты автора self.user и корзина другого пользователя.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.buyer = self.users[1]
+        self.buyer_client = self.client_for(self.buyer)
+        self.recipe = self.recipes[0]
+        self.other_recipe = self.recipes[3]
+
+    def cart_url(self, recipe):
+        return reverse('api:cart', args=[recipe.id])
+
+    def add_to_cart(self, *recipes):
+        for recipe in recipes:
+            response = self.buyer_client.post(self.cart_url(recipe))
+            self.assertLess(response.status_code, 300)
+
+    def recipe_amounts(self, *recipes):
+        amounts = {}
+        for ingredient_id, amount in IngredientRecipe.objects.filter(
+            recipe__in=recipes
+        ).values_list('ingredient_id', 'amount'):
+            amounts[ingredient_id] = amounts.get(ingredient_id, 0) + amount
+        return amounts
+
+    def shopping_list(self):
+        return dict(ShoppingListItem.objects.filter(
+            user=self.buyer
+        ).values_list('ingredient_id', 'amount'))
+
+    def assert_lists_match_carts(self):
+        self.assertEqual(
+            {
+                (user_id, ingredient_id): amount
+                for user_id, ingredient_id, amount in
+                ShoppingListItem.objects.values_list(
+                    'user_id', 'ingredient_id', 'amount'
+                )
+            },
+            {
+                (user_id, ingredient_id): total
+                for user_id, ingredient_id, total in cart_totals()
+            }
+        )
+
+
+class ShoppingListTest(ShoppingListTestCase):
+    """
+    Таблица списков покупок меняется вместе с корзинами и рецептами
+    и совпадает с суммами, посчитанными заново по корзинам.
+    """
+
+    def test_add_and_remove(self):
+        self.add_to_cart(self.recipe, self.other_recipe)
+        self.assertEqual(
+            self.shopping_list(),
+            self.recipe_amounts(self.recipe, self.other_recipe)
+        )
+        response = self.buyer_client.delete(self.cart_url(self.recipe))
+        self.assertLess(response.status_code, 300)
+        self.assertEqual(
+            self.shopping_list(), self.recipe_amounts(self.other_recipe)
+        )
+        self.buyer_client.delete(self.cart_url(self.other_recipe))
+        self.assertEqual(self.shopping_list(), {})
+
+    def test_recipe_update(self):
+        self.add_to_cart(self.recipe, self.other_recipe)
+        response = self.client.patch(
+            reverse('api:recipes-detail', args=[self.recipe.id]),
+            {
+                'ingredients': [
+                    {'id': self.ingredients[0].id, 'amount': 100},
+                    {'id': self.ingredients[9].id, 'amount': 5},
+                ]
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.shopping_list(),
+            self.recipe_amounts(self.recipe, self.other_recipe)
+        )
+        self.assert_lists_match_carts()
+
+    def test_recipe_destroy(self):
+        self.add_to_cart(self.recipe, self.other_recipe)
+        response = self.client.delete(
+            reverse('api:recipes-detail', args=[self.recipe.id])
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(
+            self.shopping_list(), self.recipe_amounts(self.other_recipe)
+        )
+        self.assert_lists_match_carts()
+
+    def test_shopping_list_view(self):
+        self.add_to_cart(self.recipe)
+        response = self.buyer_client.get(reverse('api:shopping_list'))
+        self.assertEqual(response.status_code, 200)
+        names = {
+            ingredient.id: ingredient.name for ingredient in self.ingredients
+        }
+        for row in response.data:
+            self.assertEqual(
+                set(row), {'name', 'measurement_unit', 'amount'}
+            )
+        self.assertEqual(
+            {row['name']: row['amount'] for row in response.data},
+            {
+                names[ingredient_id]: amount
+                for ingredient_id, amount in
+                self.recipe_amounts(self.recipe).items()
+            }
+        )
+
+    def test_download_merges_units(self):
+        # Тот же продукт в килограммах: 1 г из self.recipe и 2 кг.
+        ingredient = self.ingredients[0]
+        recipe = Recipe.objects.create(
+            author=self.user,
+            name='Рецепт в килограммах',
+            image='recipes/image/test.gif',
+            text='Описание',
+            cooking_time=1
+        )
+        IngredientRecipe.objects.create(
+            recipe=recipe,
+            ingredient=Ingredient.objects.create(
+                name=ingredient.name, measurement_unit='кг'
+            ),
+            amount=2
+        )
+        self.add_to_cart(self.recipe, recipe)
+        response = self.buyer_client.get(
+            reverse('api:download'), {'format': 'txt'}
+        )
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [line for line in lines if ingredient.name in line],
+            [f'1. {ingredient.name} - 2.001 кг']
+        )
+        self.assertEqual(
+            len(lines), len(self.recipe_amounts(self.recipe)) + 1
+        )
+
+    def test_check_command(self):
+        self.add_to_cart(self.recipe, self.other_recipe)
+        out = io.StringIO()
+        call_command('check_shopping_lists', stdout=out)
+        self.assertIn('пользователей с расхождениями 0', out.getvalue())
+        items = ShoppingListItem.objects.filter(user=self.buyer)
+        items.filter(ingredient=self.ingredients[0]).update(amount=999)
+        items.filter(ingredient=self.ingredients[3]).delete()
+        with self.assertRaises(CommandError):
+            call_command('check_shopping_lists', stdout=io.StringIO())
+        out = io.StringIO()
+        call_command('check_shopping_lists', fix=True, stdout=out)
+        self.assertIn('пересоздано списков 1', out.getvalue())
+        self.assert_lists_match_carts()
+
+    def test_apply_deltas_to_existing_rows(self):
+        # Строка, вставленная параллельной транзакцией: вставка
+        # пропускается, количество прибавляется одним UPDATE.
+        first, second = self.ingredients[0].id, self.ingredients[9].id
+        ShoppingListItem.objects.create(
+            user=self.buyer, ingredient_id=first, amount=5
+        )
+        apply_deltas([self.buyer.id], {first: 2, second: 3})
+        self.assertEqual(self.shopping_list(), {first: 7, second: 3})
+        apply_deltas([self.buyer.id], {first: -7, second: 0})
+        self.assertEqual(self.shopping_list(), {second: 3})
+
+
+class ShoppingListAdminTest(ShoppingListTestCase):
+    """
+    Изменения корзин и рецептов в админ зоне пересоздают списки
+    покупок затронутых пользователей.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.add_to_cart(self.recipe, self.other_recipe)
+        self.request = RequestFactory().post('/admin/')
+        self.request.user = self.user
+
+    def model_admin(self, model):
+        return site._registry[model]
+
+    def test_recipe_ingredients_changed(self):
+        # Строки продуктов из формы инлайна сохраняются мимо API.
+        IngredientRecipe.objects.filter(recipe=self.recipe).update(amount=50)
+        model_admin = self.model_admin(Recipe)
+        recipe = Recipe.objects.get(id=self.recipe.id)
+        form_class = model_admin.get_form(self.request, recipe)
+        form = form_class(
+            instance=recipe,
+            data={
+                name: value
+                for name, value in model_to_dict(recipe).items()
+                if name in form_class.base_fields
+            }
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        recipe = form.save(commit=False)
+        model_admin.save_model(self.request, recipe, form, True)
+        model_admin.save_related(self.request, form, [], True)
+        self.assert_lists_match_carts()
+
+    def test_recipe_deleted(self):
+        # Удаление меняет объект: общий объект класса не трогаем.
+        self.model_admin(Recipe).delete_model(
+            self.request, Recipe.objects.get(id=self.recipe.id)
+        )
+        self.assertEqual(
+            self.shopping_list(), self.recipe_amounts(self.other_recipe)
+        )
+        self.assert_lists_match_carts()
+
+    def test_carts_deleted(self):
+        self.model_admin(Cart).delete_queryset(
+            self.request, Cart.objects.filter(recipe=self.other_recipe)
+        )
+        self.assertEqual(
+            self.shopping_list(), self.recipe_amounts(self.recipe)
+        )
+
+    def test_author_deleted(self):
+        self.model_admin(User).delete_model(
+            self.request, User.objects.get(id=self.user.id)
+        )
+        self.assertEqual(self.shopping_list(), {})
@@ -1,6 +1,7 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from .instrumentation import metrics_view
 from .views import (
     CartViewSet,
     CreateUserView,
@@ -23,6 +24,7 @@ router.register('ingredients', IngredientViewSet, basename='ingredients')
 
 
 urlpatterns = [
+    path('metrics/', metrics_view, name='metrics'),
     path(
         'users/subscriptions/',
         SubscribeViewSet.as_view({'get': 'list'}),
@@ -30,9 +32,19 @@ urlpatterns = [
     ),
     path(
         'recipes/download_shopping_cart/',
-        DownloadCart.as_view({'get': 'download'}),
+        DownloadCart.as_view({'get': 'download', 'post': 'enqueue'}),
         name='download'
     ),
+    path(
+        'recipes/shopping_list/',
+        DownloadCart.as_view({'get': 'shopping_list'}),
+        name='shopping_list'
+    ),
+    path(
+        'recipes/download_shopping_cart/<uuid:job_id>/',
+        DownloadCart.as_view({'get': 'job'}),
+        name='download_job'
+    ),
     path(
         'users/<users_id>/subscribe/',
         SubscribeViewSet.as_view({'post': 'create', 'delete': 'delete'}),
@@ -1,34 +1,64 @@
-from django.http import HttpResponse
+import hashlib
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.http import FileResponse
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfgen import canvas
 
+FONT_NAME = 'FreeSans'
+FONT_PATH = os.path.join(settings.BASE_DIR, 'data', 'FreeSans.ttf')
+# Меняется при изменении верстки PDF, чтобы не отдавать старые файлы.
+PDF_LAYOUT_VERSION = '1'
 
-def canvas_method(dictionary):
+
+def register_fonts():
     """
-    Сохранение списка покупок в формате PDF.
+    Регистрация шрифтов ReportLab, выполняется один раз при старте.
+    """
+    if FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
+
+
+def shopping_cart_key(rows):
+    """
+    Ключ кэша списка покупок: хэш агрегированных строк
+    (продукт, единица измерения, количество).
+    """
+    digest = hashlib.sha256(PDF_LAYOUT_VERSION.encode())
+    for item in rows:
+        digest.update(
+            f'{item["ingredient__name"]}\t'
+            f'{item["ingredient__measurement_unit"]}\t'
+            f'{item["ingredient_total"]}\n'.encode()
+        )
+    return digest.hexdigest()
+
+
+def render_shopping_cart(rows, output):
     """
-    response = HttpResponse(content_type='application/pdf')
-    response[
-        'Content-Disposition'
-    ] = 'attachment; filename = "shopping_cart.pdf"'
+    Отрисовка списка покупок в формате PDF в файловый объект.
+    """
+    register_fonts()
     begin_position_x, begin_position_y = 40, 650
-    sheet = canvas.Canvas(response, pagesize=A4)
-    pdfmetrics.registerFont(TTFont('FreeSans', 'data/FreeSans.ttf'))
-    sheet.setFont('FreeSans', 50)
+    sheet = canvas.Canvas(output, pagesize=A4)
+    sheet.setFont(FONT_NAME, 50)
     sheet.setTitle('Список покупок')
     sheet.drawString(
         begin_position_x,
         begin_position_y + 40,
         'Список покупок: '
     )
-    sheet.setFont('FreeSans', 24)
-    for number, item in enumerate(dictionary, start=1):
+    sheet.setFont(FONT_NAME, 24)
+    for number, item in enumerate(rows, start=1):
         if begin_position_y < 100:
             begin_position_y = 700
             sheet.showPage()
-            sheet.setFont('FreeSans', 24)
+            sheet.setFont(FONT_NAME, 24)
         sheet.drawString(
             begin_position_x,
             begin_position_y,
@@ -39,4 +69,67 @@ def canvas_method(dictionary):
         begin_position_y -= 30
     sheet.showPage()
     sheet.save()
-    return response
+
+
+def prune_shopping_cart_cache(cache_dir):
+    """
+    Удаление файлов кэша старше SHOPPING_CART_CACHE_TIMEOUT секунд.
+    """
+    if not os.path.isdir(cache_dir):
+        return
+    expired = time.time() - settings.SHOPPING_CART_CACHE_TIMEOUT
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and entry.stat().st_mtime < expired:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+def shopping_cart_path(key):
+    """
+    Путь к PDF списка покупок в кэше по ключу содержимого.
+    """
+    return os.path.join(settings.SHOPPING_CART_CACHE_DIR, f'{key}.pdf')
+
+
+def write_shopping_cart(rows, path):
+    """
+    Отрисовка PDF списка покупок и атомарная запись в кэш.
+    """
+    cache_dir = os.path.dirname(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=cache_dir, suffix='.tmp', delete=False
+    ) as output:
+        render_shopping_cart(rows, output)
+    os.replace(output.name, path)
+    return path
+
+
+def shopping_cart_file(rows):
+    """
+    Путь к PDF списка покупок в кэше, адресуемом по содержимому.
+    Файл отрисовывается только если такого списка еще не было.
+    """
+    rows = list(rows)
+    path = shopping_cart_path(shopping_cart_key(rows))
+    if os.path.exists(path):
+        os.utime(path)
+        return path
+    write_shopping_cart(rows, path)
+    prune_shopping_cart_cache(os.path.dirname(path))
+    return path
+
+
+def canvas_method(dictionary):
+    """
+    Сохранение списка покупок в формате PDF.
+    Файл отдается с диска по частям, не занимая память воркера.
+    """
+    return FileResponse(
+        open(shopping_cart_file(dictionary), 'rb'),
+        as_attachment=True,
+        filename='shopping_cart.pdf',
+        content_type='application/pdf'
+    )
@@ -1,24 +1,49 @@
+import json
+import os
+from collections import defaultdict
 from http import HTTPStatus
 
-from django.db.models import Sum
-from django.shortcuts import get_list_or_404, get_object_or_404
+from django.db import transaction
+from django.db.models import F, Prefetch
+from django.db.models.functions import Greatest
+from django.http import FileResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.decorators import method_decorator
 from djoser.views import UserViewSet
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
+from recipes.feed import (
+    fan_out,
+    feed_keyset,
+    feed_queryset,
+    follow,
+    unfollow
+)
 from recipes.models import (
     Cart,
     Favorite,
     Ingredient,
-    IngredientRecipe,
     Recipe,
+    ShoppingCartJob,
+    ShoppingListItem,
     Subscribe,
-    Tag
+    Tag,
+    recipe_write
 )
+from recipes.shopping_list import apply_deltas, recipe_deltas
+from recipes.units import base_totals, display_rows
 from users.models import User
-from .utils import canvas_method
+from .cache import anonymous_cache
+from .conditional import recipe_condition, table_condition
 from .filters import IngredientSearchFilter, RecipeFilters
+from .pagination import RecipePagination
+from .renderers import SHOPPING_CART_RENDERERS, export_row
 from .serializers import (
     CartSerializer,
     FavoriteSerializer,
@@ -26,9 +51,19 @@ from .serializers import (
     RecipeSerializer,
     RecipeSerializerPost,
     RegistrationSerializer,
+    ShoppingCartJobSerializer,
     SubscriptionSerializer,
     TagSerializer
 )
+from .utils import shopping_cart_key, shopping_cart_path
+
+
+def change_counter(queryset, field, delta):
+    """
+    Атомарное изменение денормализованного счетчика выражением F()
+    в одном UPDATE, без чтения строки и гонок между запросами.
+    """
+    return queryset.update(**{field: Greatest(F(field) + delta, 0)})
 
 
 class CreateUserView(UserViewSet):
@@ -36,9 +71,10 @@ class CreateUserView(UserViewSet):
     Обработка моделей пользователя.
     """
     serializer_class = RegistrationSerializer
+    query_budget = 4
 
     def get_queryset(self):
-        return User.objects.all()
+        return User.objects.with_subscribed(self.request.user)
 
 
 class SubscribeViewSet(viewsets.ModelViewSet):
@@ -47,9 +83,60 @@ class SubscribeViewSet(viewsets.ModelViewSet):
     """
     serializer_class = SubscriptionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 8
 
     def get_queryset(self):
-        return get_list_or_404(User, following__user=self.request.user)
+        return User.objects.filter(
+            following__user=self.request.user
+        ).with_subscribed(self.request.user).order_by('id')
+
+    def paginate_queryset(self, queryset):
+        """
+        Загрузка рецептов для всех авторов страницы одним запросом,
+        с учетом параметра recipes_limit.
+        """
+        page = super().paginate_queryset(queryset)
+        if not page:
+            return page
+        recipes = Recipe.objects.filter(
+            author__in=[author.id for author in page]
+        ).only(
+            'id',
+            'name',
+            'image',
+            'image_variants',
+            'cooking_time',
+            'author_id'
+        )
+        recipes_limit = self.get_recipes_limit()
+        if recipes_limit is not None:
+            recipes = recipes.first_by_author(recipes_limit)
+        else:
+            recipes = recipes.order_by('author_id', 'id')
+        recipes_by_author = defaultdict(list)
+        for recipe in recipes:
+            recipes_by_author[recipe.author_id].append(recipe)
+        for author in page:
+            author.recipes_preview = recipes_by_author[author.id]
+        return page
+
+    def get_recipes_limit(self):
+        """
+        Значение параметра recipes_limit: None, если он не задан,
+        иначе целое неотрицательное число.
+        """
+        value = self.request.query_params.get('recipes_limit')
+        if not value:
+            return None
+        try:
+            limit = int(value)
+        except ValueError:
+            limit = -1
+        if limit < 0:
+            raise ValidationError({
+                'recipes_limit': 'Укажите целое неотрицательное число.'
+            })
+        return limit
 
     def create(self, request, *args, **kwargs):
         """
@@ -57,7 +144,12 @@ class SubscribeViewSet(viewsets.ModelViewSet):
         """
         user_id = self.kwargs.get('users_id')
         user = get_object_or_404(User, id=user_id)
-        Subscribe.objects.create(user=request.user, following=user)
+        with transaction.atomic():
+            Subscribe.objects.create(user=request.user, following=user)
+            change_counter(
+                User.objects.filter(id=user.id), 'followers_count', 1
+            )
+            follow(request.user.id, user.id)
         return Response(HTTPStatus.CREATED)
 
     def delete(self, request, *args, **kwargs):
@@ -70,10 +162,17 @@ class SubscribeViewSet(viewsets.ModelViewSet):
             Subscribe, user__id=user_id,
             following__id=author_id
         )
-        subscribe.delete()
+        with transaction.atomic():
+            subscribe.delete()
+            change_counter(
+                User.objects.filter(id=author_id), 'followers_count', -1
+            )
+            unfollow(user_id, subscribe.following_id)
         return Response(HTTPStatus.NO_CONTENT)
 
 
+@method_decorator(table_condition(Tag), name='list')
+@method_decorator(table_condition(Tag), name='retrieve')
 class TagViewSet(viewsets.ReadOnlyModelViewSet):
     """
     Обработка моделей тэгов.
@@ -81,8 +180,10 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
+    query_budget = 4
 
 
+@method_decorator(recipe_condition, name='retrieve')
 class RecipeViewSet(viewsets.ModelViewSet):
     """
     Обработка моделей рецептов.
@@ -91,12 +192,93 @@ class RecipeViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     filter_class = RecipeFilters
     filter_backends = [DjangoFilterBackend, ]
+    pagination_class = RecipePagination
+    # Холодный старт: проверка версий справочников и загрузка
+    # тегов и продуктов в кэш процесса добавляют до трех запросов.
+    query_budget = {
+        'list': 9,
+        'retrieve': 10,
+        'feed': 9,
+        'create': 20,
+        'update': 35,
+        'partial_update': 35,
+        'destroy': 30,
+    }
+
+    def get_queryset(self):
+        """
+        Выборка рецептов с предзагрузкой связанных объектов,
+        чтобы число запросов не зависело от размера страницы.
+        Теги и продукты подставляются из кэша справочников.
+        """
+        user = self.request.user
+        queryset = Recipe.objects.with_user_flags(user)
+        return queryset.prefetch_related(
+            Prefetch('author', queryset=User.objects.with_subscribed(user)),
+            'tagrecipe_set',
+            'ingredientrecipes'
+        )
+
+    @anonymous_cache('list')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @anonymous_cache('retrieve')
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @action(
+        detail=False,
+        permission_classes=[permissions.IsAuthenticated]
+    )
+    def feed(self, request):
+        """
+        Лента рецептов авторов, на которых подписан пользователь.
+        Способ выборки задается настройкой RECIPE_FEED_STRATEGY.
+        """
+        self.keyset_fields = feed_keyset()
+        queryset = feed_queryset(self.get_queryset(), request.user)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     def perform_create(self, serializer):
         """
         Подстановка параметров автора при создании рецепта.
         """
-        serializer.save(author=self.request.user)
+        with transaction.atomic():
+            recipe = serializer.save(author=self.request.user)
+            change_counter(
+                User.objects.filter(id=self.request.user.id),
+                'recipes_count',
+                1
+            )
+            fan_out(recipe)
+
+    def perform_update(self, serializer):
+        """
+        Изменение рецепта, его тегов и продуктов с одним увеличением
+        версии рецептов.
+        """
+        with transaction.atomic(), recipe_write():
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        """
+        Удаление рецепта с уменьшением счетчика рецептов автора
+        и вычитанием его продуктов из списков покупок.
+        """
+        with transaction.atomic(), recipe_write():
+            apply_deltas(
+                list(instance.carts.values_list('user_id', flat=True)),
+                recipe_deltas(instance.id, -1)
+            )
+            instance.delete()
+            change_counter(
+                User.objects.filter(id=instance.author_id),
+                'recipes_count',
+                -1
+            )
 
     def get_serializer_class(self):
         """
@@ -107,6 +289,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return RecipeSerializerPost
 
 
+@method_decorator(table_condition(Ingredient), name='list')
+@method_decorator(table_condition(Ingredient), name='retrieve')
 class IngredientViewSet(viewsets.ModelViewSet):
     """
     Обработка модели продуктов.
@@ -116,7 +300,7 @@ class IngredientViewSet(viewsets.ModelViewSet):
     serializer_class = IngredientSerializer
     filter_backends = (DjangoFilterBackend, IngredientSearchFilter)
     pagination_class = None
-    search_fields = ['^name', ]
+    query_budget = 6
 
 
 class BaseFavoriteCartViewSet(viewsets.ModelViewSet):
@@ -124,6 +308,8 @@ class BaseFavoriteCartViewSet(viewsets.ModelViewSet):
     Базовый вьюсет обработки модели корзины и избранных рецептов.
     """
     permission_classes = [permissions.IsAuthenticated]
+    counter = None
+    query_budget = 7
 
     def create(self, request, *args, **kwargs):
         """
@@ -131,7 +317,12 @@ class BaseFavoriteCartViewSet(viewsets.ModelViewSet):
         """
         recipe_id = int(self.kwargs['recipes_id'])
         recipe = get_object_or_404(Recipe, id=recipe_id)
-        self.model.objects.create(user=request.user, recipe=recipe)
+        with transaction.atomic():
+            self.model.objects.create(user=request.user, recipe=recipe)
+            change_counter(
+                Recipe.objects.filter(id=recipe.id), self.counter, 1
+            )
+            self.recipe_changed(request.user.id, recipe.id, 1)
         return Response(HTTPStatus.CREATED)
 
     def delete(self, request, *args, **kwargs):
@@ -145,9 +336,20 @@ class BaseFavoriteCartViewSet(viewsets.ModelViewSet):
             user__id=user_id,
             recipe__id=recipe_id
         )
-        object.delete()
+        with transaction.atomic():
+            object.delete()
+            change_counter(
+                Recipe.objects.filter(id=recipe_id), self.counter, -1
+            )
+            self.recipe_changed(user_id, object.recipe_id, -1)
         return Response(HTTPStatus.NO_CONTENT)
 
+    def recipe_changed(self, user_id, recipe_id, sign):
+        """
+        Дополнительные изменения в той же транзакции при добавлении
+        (sign=1) или удалении (sign=-1) рецепта.
+        """
+
 
 class CartViewSet(BaseFavoriteCartViewSet):
     """
@@ -156,6 +358,14 @@ class CartViewSet(BaseFavoriteCartViewSet):
     serializer_class = CartSerializer
     queryset = Cart.objects.all()
     model = Cart
+    counter = 'carts_count'
+    query_budget = 10
+
+    def recipe_changed(self, user_id, recipe_id, sign):
+        """
+        Изменение списка покупок пользователя на продукты рецепта.
+        """
+        apply_deltas([user_id], recipe_deltas(recipe_id, sign))
 
 
 class FavoriteViewSet(BaseFavoriteCartViewSet):
@@ -165,22 +375,100 @@ class FavoriteViewSet(BaseFavoriteCartViewSet):
     serializer_class = FavoriteSerializer
     queryset = Favorite.objects.all()
     model = Favorite
+    counter = 'favorites_count'
 
 
 class DownloadCart(viewsets.ModelViewSet):
     """
     Сохранение файла списка покупок.
+    Формат выбирается параметром format или заголовком Accept.
+    PDF можно также сгенерировать в фоне через очередь задач.
     """
     permission_classes = [permissions.IsAuthenticated]
+    serializer_class = ShoppingCartJobSerializer
+    query_budget = 6
+
+    def get_renderers(self):
+        """
+        Форматы списка покупок доступны только при скачивании.
+        """
+        if getattr(self, 'action', None) == 'download':
+            return [renderer() for renderer in SHOPPING_CART_RENDERERS]
+        return super().get_renderers()
+
+    def handle_exception(self, exc):
+        """
+        Ошибки возвращаются в JSON, а не в формате списка покупок.
+        """
+        self.request.accepted_renderer = JSONRenderer()
+        self.request.accepted_media_type = JSONRenderer.media_type
+        return super().handle_exception(exc)
+
+    def get_queryset(self):
+        """
+        Готовые суммы из списка покупок пользователя, без группировки
+        продуктов всех рецептов корзины. Граммы и килограммы,
+        миллилитры и литры одного продукта складываются.
+        """
+        return base_totals(
+            ShoppingListItem.objects.filter(user=self.request.user)
+        )
+
+    def rows(self):
+        """
+        Строки списка покупок в наиболее удобных единицах.
+        """
+        return display_rows(self.get_queryset().iterator())
+
+    def shopping_list(self, request):
+        """
+        Текущий список покупок в JSON, строки как в выгрузке
+        ?format=json.
+        """
+        return Response([export_row(row) for row in self.rows()])
 
     def download(self, request):
         """
         Создания списка покупок.
         """
-        result = IngredientRecipe.objects.filter(
-            recipe__carts__user=request.user
-        ).values(
-            'ingredient__name',
-            'ingredient__measurement_unit'
-        ).order_by('ingredient__name').annotate(ingredient_total=Sum('amount'))
-        return canvas_method(result)
+        return request.accepted_renderer.response(self.rows())
+
+    def enqueue(self, request):
+        """
+        Постановка генерации PDF списка покупок в очередь.
+        Если такой список уже есть в кэше, задача сразу готова.
+        """
+        rows = list(self.rows())
+        key = shopping_cart_key(rows)
+        job = ShoppingCartJob(
+            user=request.user,
+            rows=json.dumps(rows, ensure_ascii=False),
+            key=key
+        )
+        if os.path.exists(shopping_cart_path(key)):
+            job.status = ShoppingCartJob.DONE
+            job.finished = timezone.now()
+        job.save()
+        return Response(
+            self.get_serializer(job).data,
+            status=HTTPStatus.ACCEPTED
+        )
+
+    def job(self, request, job_id):
+        """
+        Статус задачи генерации, а после завершения - сам файл.
+        """
+        job = get_object_or_404(
+            ShoppingCartJob,
+            id=job_id,
+            user=request.user
+        )
+        path = shopping_cart_path(job.key)
+        if job.status == ShoppingCartJob.DONE and os.path.exists(path):
+            return FileResponse(
+                open(path, 'rb'),
+                as_attachment=True,
+                filename='shopping_cart.pdf',
+                content_type='application/pdf'
+            )
+        return Response(self.get_serializer(job).data)
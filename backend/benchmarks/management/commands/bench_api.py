@@ -0,0 +1,177 @@
+import json
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import URLError
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.scenarios import (
+    SCENARIOS,
+    ClientTransport,
+    HttpTransport,
+    ScenarioData
+)
+from benchmarks.utils import percentile
+
+# Показатели, сравниваемые с базовой линией: рост больше допуска -
+# регрессия.
+COMPARED = ('p95', 'queries')
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест API по сценариям на данных seed_benchmark: '
+        'перцентили времени ответа, пропускная способность и число '
+        'запросов к базе, сравнение с сохраненной базовой линией.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenarios', nargs='+', choices=SCENARIOS,
+            default=list(SCENARIOS)
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Число прогонов каждого сценария.'
+        )
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument(
+            '--url',
+            help=(
+                'Адрес запущенного сервера, например http://127.0.0.1:8000. '
+                'Без него запросы идут через тестовый клиент.'
+            )
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--baseline', help='JSON с результатами для сравнения.'
+        )
+        parser.add_argument(
+            '--save-baseline', help='Сохранить результаты в JSON.'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=20,
+            help='Допустимый рост p95 и числа запросов, в процентах.'
+        )
+
+    def handle(self, *args, **options):
+        data = ScenarioData()
+        if not data.users or not data.ingredients or not data.tags:
+            raise CommandError('База не засеяна, запустите seed_benchmark.')
+        results = {}
+        for name in options['scenarios']:
+            try:
+                results[name] = self.run_scenario(name, data, options)
+            except URLError as error:
+                raise CommandError(
+                    f'Сервер {options["url"]} недоступен: {error.reason}'
+                )
+            self.report(name, results[name])
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w') as baseline:
+                json.dump(results, baseline, indent=2, sort_keys=True)
+        if options['baseline']:
+            with open(options['baseline']) as baseline:
+                regressions = self.compare(
+                    json.load(baseline), results, options['tolerance']
+                )
+            if regressions:
+                raise CommandError(
+                    f'Регрессии относительно {options["baseline"]}: '
+                    + ', '.join(regressions)
+                )
+
+    def transport(self, user, options):
+        if options['url']:
+            return HttpTransport(options['url'], user)
+        return ClientTransport(user)
+
+    def run_scenario(self, name, data, options):
+        """
+        Прогоны сценария в несколько потоков. У каждого потока
+        свой пользователь и свой генератор случайных чисел.
+        """
+        scenario, authenticated = SCENARIOS[name]
+
+        def worker(number):
+            generator = random.Random(f'{options["seed"]}-{name}-{number}')
+            user = generator.choice(data.users) if authenticated else None
+            transport = self.transport(user, options)
+            samples = []
+            try:
+                runs = range(number, options['requests'],
+                             options['concurrency'])
+                for _ in runs:
+                    steps = scenario(data, generator)
+                    response = None
+                    while True:
+                        try:
+                            method, path, body = steps.send(
+                                response and response.data
+                            )
+                        except StopIteration:
+                            break
+                        start = time.perf_counter()
+                        response = transport.request(method, path, body)
+                        samples.append((
+                            (time.perf_counter() - start) * 1000,
+                            response.queries,
+                            response.status
+                        ))
+            finally:
+                transport.close()
+            return samples
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            results = list(pool.map(worker, range(options['concurrency'])))
+        elapsed = time.perf_counter() - start
+        samples = [sample for result in results for sample in result]
+        timings = [timing for timing, _, _ in samples]
+        queries = [count for _, count, _ in samples if count is not None]
+        return {
+            'requests': len(samples),
+            'rps': len(samples) / elapsed,
+            'p50': percentile(timings, 50),
+            'p95': percentile(timings, 95),
+            'p99': percentile(timings, 99),
+            'queries': statistics.mean(queries) if queries else None,
+            'errors': sum(status >= 400 for _, _, status in samples),
+        }
+
+    def report(self, name, result):
+        queries = result['queries']
+        queries = '-' if queries is None else f'{queries:.1f}'
+        self.stdout.write(
+            f'{name:<21} {result["requests"]:>6} req '
+            f'{result["rps"]:8.1f} rps  '
+            f'p50 {result["p50"]:8.2f} ms  '
+            f'p95 {result["p95"]:8.2f} ms  '
+            f'p99 {result["p99"]:8.2f} ms  '
+            f'queries {queries:>5}  errors {result["errors"]}'
+        )
+
+    def compare(self, baseline, results, tolerance):
+        """
+        Изменение показателей относительно базовой линии.
+        Возвращает список регрессий сверх допуска.
+        """
+        regressions = []
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            changes = []
+            for metric in COMPARED:
+                old, new = baseline[name].get(metric), result[metric]
+                if not old or new is None:
+                    continue
+                change = (new - old) / old * 100
+                changes.append(f'{metric} {change:+.1f}%')
+                if change > tolerance:
+                    regressions.append(f'{name} {metric} {change:+.1f}%')
+            if result['errors'] > baseline[name].get('errors', 0):
+                regressions.append(f'{name} errors {result["errors"]}')
+            self.stdout.write(f'{name:<21} ' + '  '.join(changes))
+        return regressions
@@ -0,0 +1,58 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from benchmarks.utils import measure, summary
+from recipes.models import Ingredient
+from recipes.search import ingredient_index, search_ingredients
+
+
+class Command(BaseCommand):
+    help = (
+        'Задержка поиска продуктов по 1, 2 и 3 символам: '
+        'индекс в памяти процесса и поиск в базе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        names = list(Ingredient.objects.values_list('name_key', flat=True))
+        if not names:
+            raise CommandError(
+                'Таблица продуктов пуста, запустите import_ingredients.'
+            )
+        generator = random.Random(options['seed'])
+        limit = options['limit']
+        for length in (1, 2, 3):
+            terms = [
+                name[:length]
+                for name in generator.choices(names, k=options['repeat'])
+            ]
+            cases = (
+                ('index', len(names), ingredient_index.search),
+                ('memory', len(names), self.search),
+                ('sql', 0, self.search),
+            )
+            for mode, max_size, search in cases:
+                with override_settings(INGREDIENT_INDEX_MAX_SIZE=max_size):
+                    ingredient_index.clear()
+                    search(terms[0], limit)
+                    terms_iter = iter(terms)
+                    timings = measure(
+                        lambda: search(next(terms_iter), limit),
+                        len(terms)
+                    )
+                self.stdout.write(
+                    f'{length} chars  {mode:<7} {summary(timings)}'
+                )
+        ingredient_index.clear()
+
+    def search(self, term, limit):
+        """
+        Поиск продуктов вместе с загрузкой строк из базы.
+        """
+        return list(search_ingredients(Ingredient.objects.all(), term, limit))
@@ -0,0 +1,177 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from benchmarks.utils import summary
+from recipes.feed import STRATEGIES, fan_out, rebuild_timeline
+from recipes.models import Recipe, Subscribe
+from users.models import User
+
+AUTHOR_PREFIX = 'bench_author'
+READER_PREFIX = 'bench_reader'
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочное сравнение ленты подписок: выборка по подпискам '
+        'при чтении и заранее заполненная лента подписчика.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--following', nargs='+', type=int, default=[10, 100, 1000],
+            help='На сколько авторов подписан читатель.'
+        )
+        parser.add_argument('--recipes-per-author', type=int, default=20)
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--pages', type=int, default=5)
+        parser.add_argument(
+            '--fill',
+            action='store_true',
+            help='Создать авторов, читателей, рецепты и подписки.'
+        )
+
+    def handle(self, *args, **options):
+        authors = max(options['following'])
+        if options['fill']:
+            self.fill(
+                authors,
+                options['following'],
+                options['recipes_per_author']
+            )
+        readers = list(User.objects.filter(
+            username__startswith=READER_PREFIX
+        ).order_by('username'))
+        if len(readers) < len(options['following']):
+            raise CommandError('Нет читателей, запустите с --fill.')
+        for strategy in STRATEGIES:
+            with override_settings(RECIPE_FEED_STRATEGY=strategy):
+                if strategy == 'timeline':
+                    start = time.perf_counter()
+                    entries = rebuild_timeline()
+                    self.stdout.write(
+                        f'rebuild_timeline: {entries} entries '
+                        f'{(time.perf_counter() - start) * 1000:.0f} ms'
+                    )
+                for reader in readers:
+                    self.run_reader(strategy, reader, options)
+                self.run_fan_out(strategy)
+
+    def fill(self, authors, following, recipes_per_author):
+        """
+        Авторы с рецептами и читатели, подписанные на первых
+        following авторов.
+        """
+        usernames = [
+            f'{prefix}{number:05}'
+            for prefix, total in (
+                (AUTHOR_PREFIX, authors),
+                (READER_PREFIX, len(following))
+            )
+            for number in range(total)
+        ]
+        existing = set(User.objects.filter(
+            username__in=usernames
+        ).values_list('username', flat=True))
+        User.objects.bulk_create(
+            (
+                User(username=username, email=f'{username}@example.com')
+                for username in usernames
+                if username not in existing
+            ),
+            batch_size=500
+        )
+        author_ids = list(User.objects.filter(
+            username__startswith=AUTHOR_PREFIX
+        ).order_by('username').values_list('id', flat=True)[:authors])
+        with_recipes = set(Recipe.objects.filter(
+            author_id__in=author_ids
+        ).values_list('author_id', flat=True))
+        Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    author_id=author_id,
+                    name=f'Рецепт {number}',
+                    image='recipes/image/bench.jpg',
+                    text='Описание',
+                    cooking_time=number + 1
+                )
+                for author_id in author_ids
+                if author_id not in with_recipes
+                for number in range(recipes_per_author)
+            ),
+            batch_size=500
+        )
+        readers = User.objects.filter(
+            username__startswith=READER_PREFIX
+        ).order_by('username')
+        for reader, total in zip(readers, sorted(following)):
+            Subscribe.objects.filter(user=reader).delete()
+            Subscribe.objects.bulk_create(
+                (
+                    Subscribe(user=reader, following_id=author_id)
+                    for author_id in author_ids[:total]
+                ),
+                batch_size=500
+            )
+
+    def run_reader(self, strategy, reader, options):
+        """
+        Первые страницы ленты по курсору в несколько потоков.
+        """
+        def walk():
+            client = APIClient()
+            client.force_authenticate(reader)
+            timings = []
+            url = '/api/recipes/feed/?pagination=cursor'
+            for _ in range(options['pages']):
+                start = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - start) * 1000)
+                url = response.json()['next']
+                if not url:
+                    break
+            connection.close()
+            return timings
+
+        following = Subscribe.objects.filter(user=reader).count()
+        walks = max(options['requests'] // options['pages'], 1)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            results = list(pool.map(lambda _: walk(), range(walks)))
+        elapsed = time.perf_counter() - start
+        timings = [timing for result in results for timing in result]
+        self.stdout.write(
+            f'{strategy:<9} following {following:>5}  '
+            f'{len(timings) / elapsed:7.1f} rps  {summary(timings)}'
+        )
+
+    def run_fan_out(self, strategy):
+        """
+        Стоимость публикации рецепта автором с наибольшим
+        числом подписчиков.
+        """
+        author = User.objects.filter(
+            username__startswith=AUTHOR_PREFIX
+        ).order_by('username').first()
+        followers = Subscribe.objects.filter(following=author).count()
+        recipe = Recipe.objects.create(
+            author=author,
+            name='Новый рецепт',
+            image='recipes/image/bench.jpg',
+            text='Описание',
+            cooking_time=1
+        )
+        start = time.perf_counter()
+        fan_out(recipe)
+        elapsed = time.perf_counter() - start
+        recipe.delete()
+        self.stdout.write(
+            f'{strategy:<9} fan-out to {followers} followers '
+            f'{elapsed * 1000:.2f} ms'
+        )
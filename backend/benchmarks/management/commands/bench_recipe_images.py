@@ -0,0 +1,85 @@
+import base64
+import io
+import tempfile
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
+
+from api.fields import StreamingBase64ImageField
+from benchmarks.utils import measure, summary
+from recipes.images import make_variants
+
+
+def make_photo(width, height):
+    """
+    Синтетическое фото: шум плохо сжимается, как и настоящие снимки.
+    """
+    image = Image.effect_noise((width, height), 64).convert('RGB')
+    output = io.BytesIO()
+    image.save(output, 'JPEG', quality=90)
+    return output.getvalue()
+
+
+class Command(BaseCommand):
+    help = (
+        'Задержка загрузки изображения рецепта в base64, время '
+        'подготовки копий и объем изображений на странице ленты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', default=['1600x1200', '4000x3000']
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                for size in options['sizes']:
+                    width, height = map(int, size.split('x'))
+                    self.run_size(
+                        size,
+                        make_photo(width, height),
+                        options['repeat'],
+                        page_size
+                    )
+
+    def run_size(self, size, photo, repeat, page_size):
+        data = 'data:image/jpeg;base64,' + base64.b64encode(photo).decode()
+        fields = (
+            ('base64', Base64ImageField()),
+            ('streaming', StreamingBase64ImageField()),
+        )
+        for name, field in fields:
+            timings = measure(lambda: field.to_internal_value(data), repeat)
+            self.stdout.write(
+                f'{size:>10}  upload {name:<10} {summary(timings)}'
+            )
+        original = default_storage.save(
+            'recipes/image/bench.jpg',
+            io.BytesIO(photo)
+        )
+        manifest = {}
+
+        def variants():
+            manifest.update(make_variants(original))
+
+        timings = measure(variants, repeat)
+        self.stdout.write(
+            f'{size:>10}  variants          {summary(timings)}'
+        )
+        card = manifest[str(settings.RECIPE_CARD_IMAGE_WIDTH)]
+        for name, path in (
+            ('original', original),
+            ('card webp', card['webp']),
+            ('card jpeg', card['jpeg']),
+        ):
+            self.stdout.write(
+                f'{size:>10}  feed page {name:<10} '
+                f'{default_storage.size(path) * page_size:>12} bytes'
+            )
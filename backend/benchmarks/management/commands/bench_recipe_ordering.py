@@ -0,0 +1,120 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from api.filters import RECIPE_ORDERINGS
+from benchmarks.utils import fill_recipes, measure, summary
+from recipes.models import Favorite, Recipe
+from recipes.trending import refresh_trending
+from users.models import User
+
+BENCH_USER_PREFIX = 'bench_fan'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сортировки ленты popular, trending и quick по сохраненным '
+        'значениям с индексом и агрегацией по избранному на лету.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--favorites', type=int, default=1000000)
+        parser.add_argument('--limit', type=int, default=6)
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--fill',
+            action='store_true',
+            help='Создать недостающие рецепты и записи избранного.'
+        )
+
+    def handle(self, *args, **options):
+        fill_recipes(options['recipes'], options['fill'])
+        if options['fill']:
+            self.fill_favorites(
+                options['favorites'], random.Random(options['seed'])
+            )
+            call_command('recount', stdout=self.stdout)
+        start = time.perf_counter()
+        processed = refresh_trending()
+        self.stdout.write(
+            f'refresh_trending: {processed} rows '
+            f'{(time.perf_counter() - start) * 1000:.0f} ms'
+        )
+        limit = options['limit']
+        recent = timezone.now() - timedelta(days=7)
+        cases = (
+            ('popular aggregate', lambda: self.page(
+                Recipe.objects.annotate(
+                    total=Count('favorites')
+                ).order_by('-total', '-id'),
+                limit
+            )),
+            ('popular indexed', lambda: self.page(
+                Recipe.objects.order_by(*RECIPE_ORDERINGS['popular']), limit
+            )),
+            ('trending aggregate', lambda: self.page(
+                Recipe.objects.annotate(total=Count(
+                    'favorites', filter=Q(favorites__created__gte=recent)
+                )).order_by('-total', '-id'),
+                limit
+            )),
+            ('trending indexed', lambda: self.page(
+                Recipe.objects.order_by(*RECIPE_ORDERINGS['trending']), limit
+            )),
+            ('quick indexed', lambda: self.page(
+                Recipe.objects.order_by(*RECIPE_ORDERINGS['quick']), limit
+            )),
+            ('refresh idle', refresh_trending),
+        )
+        for name, func in cases:
+            self.stdout.write(
+                f'{name:<19} {summary(measure(func, options["repeat"]))}'
+            )
+
+    def fill_favorites(self, total, generator):
+        """
+        Синтетическое избранное: случайные рецепты у пользователей
+        bench_fan*, без повторов пары пользователь-рецепт.
+        """
+        missing = total - Favorite.objects.count()
+        if missing <= 0:
+            return
+        recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+        per_user = min(len(recipe_ids), 1000)
+        offset = User.objects.filter(
+            username__startswith=BENCH_USER_PREFIX
+        ).count()
+        users = -(-missing // per_user)
+        User.objects.bulk_create(
+            (
+                User(
+                    username=f'{BENCH_USER_PREFIX}{number}',
+                    email=f'{BENCH_USER_PREFIX}{number}@example.com'
+                )
+                for number in range(offset, offset + users)
+            ),
+            batch_size=500
+        )
+        user_ids = User.objects.filter(
+            username__startswith=BENCH_USER_PREFIX
+        ).order_by('-id').values_list('id', flat=True)[:users]
+        for user_id in user_ids:
+            size = min(per_user, missing)
+            Favorite.objects.bulk_create(
+                (
+                    Favorite(user_id=user_id, recipe_id=recipe_id)
+                    for recipe_id in generator.sample(recipe_ids, size)
+                ),
+                batch_size=500
+            )
+            missing -= size
+
+    def page(self, queryset, limit):
+        return list(queryset.values_list('id', flat=True)[:limit])
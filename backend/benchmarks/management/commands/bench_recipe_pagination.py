@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIClient
+
+from benchmarks.utils import bench_user, fill_recipes, summary
+
+# Границы диапазонов страниц в отчете.
+BUCKETS = (10, 100, 1000, 10000)
+
+
+class Command(BaseCommand):
+    help = (
+        'Обход ленты рецептов со страницы 1 по --pages: '
+        'постраничная пагинация с OFFSET и пагинация по курсору.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=1000)
+        parser.add_argument('--limit', type=int, default=6)
+        parser.add_argument(
+            '--fill',
+            action='store_true',
+            help='Создать недостающие рецепты для обхода всех страниц.'
+        )
+
+    def handle(self, *args, **options):
+        pages, limit = options['pages'], options['limit']
+        fill_recipes(pages * limit, options['fill'])
+        client = APIClient()
+        client.force_authenticate(bench_user())
+        modes = (
+            ('page', self.walk_pages(client, pages, limit)),
+            ('cursor', self.walk_cursor(client, pages, limit)),
+        )
+        for mode, timings in modes:
+            start = 0
+            for end in BUCKETS:
+                if start >= len(timings):
+                    break
+                self.stdout.write(
+                    f'{mode:<7} pages {start + 1:>5}-{min(end, pages):<5} '
+                    f'{summary(timings[start:end])}'
+                )
+                start = end
+
+    def request(self, client, url, timings):
+        start = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            raise CommandError(f'{url}: {response.status_code}')
+        return response.json()
+
+    def walk_pages(self, client, pages, limit):
+        timings = []
+        for page in range(1, pages + 1):
+            self.request(
+                client, f'/api/recipes/?page={page}&limit={limit}', timings
+            )
+        return timings
+
+    def walk_cursor(self, client, pages, limit):
+        timings = []
+        url = f'/api/recipes/?pagination=cursor&limit={limit}'
+        while url and len(timings) < pages:
+            url = self.request(client, url, timings)['next']
+        return timings
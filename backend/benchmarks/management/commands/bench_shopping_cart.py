@@ -0,0 +1,69 @@
+import io
+import tempfile
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from api.utils import canvas_method, render_shopping_cart, shopping_cart_file
+from benchmarks.utils import measure, summary
+
+
+def make_rows(size, salt=''):
+    """
+    Синтетический агрегированный список покупок из size строк.
+    """
+    return [
+        {
+            'ingredient__name': f'продукт {salt}{number}',
+            'ingredient__measurement_unit': 'г',
+            'ingredient_total': number * 10,
+        }
+        for number in range(size)
+    ]
+
+
+def stream(rows):
+    """
+    Полное чтение потокового ответа со списком покупок.
+    """
+    response = canvas_method(rows)
+    content = b''.join(response)
+    response.close()
+    return content
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнение генерации PDF списка покупок: в памяти, '
+        'холодный и теплый кэш, потоковая отдача.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int, default=[10, 100, 1000]
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with override_settings(SHOPPING_CART_CACHE_DIR=cache_dir):
+                for size in options['sizes']:
+                    self.run_size(size, options['repeat'])
+
+    def run_size(self, size, repeat):
+        rows = make_rows(size)
+        shopping_cart_file(rows)
+        cases = (
+            ('in-memory', lambda: render_shopping_cart(rows, io.BytesIO())),
+            ('cold', lambda: shopping_cart_file(
+                make_rows(size, salt=uuid.uuid4().hex)
+            )),
+            ('warm', lambda: shopping_cart_file(rows)),
+            ('streamed', lambda: stream(rows)),
+        )
+        for name, func in cases:
+            self.stdout.write(
+                f'{size:>6} lines  {name:<10} '
+                f'{summary(measure(func, repeat))}'
+            )
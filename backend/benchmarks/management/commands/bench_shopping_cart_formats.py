@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from api.renderers import SHOPPING_CART_RENDERERS
+from benchmarks.management.commands.bench_shopping_cart import make_rows
+from benchmarks.utils import measure, summary
+
+
+class Command(BaseCommand):
+    help = 'Пропускная способность форматов выгрузки списка покупок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int, default=[10, 100, 1000]
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        for size in options['sizes']:
+            rows = make_rows(size)
+            for renderer_class in SHOPPING_CART_RENDERERS:
+                renderer = renderer_class()
+                content = renderer.render(rows)
+                timings = measure(
+                    lambda: renderer.render(rows), options['repeat']
+                )
+                rows_per_second = size * 1000 * len(timings) / sum(timings)
+                self.stdout.write(
+                    f'{size:>6} lines  {renderer.format:<9} '
+                    f'{summary(timings)}  '
+                    f'{rows_per_second:>12.0f} rows/s  '
+                    f'{len(content):>9} bytes'
+                )
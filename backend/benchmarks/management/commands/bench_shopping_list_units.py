@@ -0,0 +1,164 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
+
+from benchmarks.utils import bench_user, measure, summary
+from recipes.models import (
+    Ingredient,
+    ShoppingListItem,
+    TableVersion,
+    normalize_name
+)
+from recipes.units import UNITS, base_totals, display_amount, display_rows
+
+BENCH_PREFIX = 'Бенчмарк'
+# Синтетический продукт встречается во всех этих единицах, чтобы
+# в списке были и переводимые пары, и единицы без перевода.
+BENCH_UNITS = ('г', 'кг', 'мл', 'л', 'шт.')
+
+
+def per_unit(items):
+    """
+    Прежняя выборка: отдельная строка для каждой единицы измерения.
+    """
+    return list(items.values(
+        'ingredient__name',
+        'ingredient__measurement_unit',
+        ingredient_total=F('amount')
+    ).order_by('ingredient__name'))
+
+
+def python_pass(items):
+    """
+    Перевод единиц в Python по всем строкам списка.
+    """
+    totals = defaultdict(int)
+    names = {}
+    for name, name_key, unit, amount in items.values_list(
+        'ingredient__name',
+        'ingredient__name_key',
+        'ingredient__measurement_unit',
+        'amount'
+    ).iterator():
+        base, factor = UNITS.get(unit, (unit, 1))
+        totals[name_key, base] += amount * factor
+        names[name_key, base] = min(name, names.get((name_key, base), name))
+    rows = []
+    for key, total in totals.items():
+        amount, unit = display_amount(total, key[1])
+        rows.append({
+            'ingredient__name': names[key],
+            'ingredient__measurement_unit': unit,
+            'ingredient_total': amount,
+        })
+    return sorted(rows, key=lambda row: (
+        row['ingredient__name'], UNITS.get(
+            row['ingredient__measurement_unit'],
+            (row['ingredient__measurement_unit'],)
+        )[0]
+    ))
+
+
+def sql_case(items):
+    """
+    Перевод единиц выражениями CASE в одном запросе.
+    """
+    return list(display_rows(base_totals(items).iterator()))
+
+
+def rows_set(rows):
+    return {tuple(row.values()) for row in rows}
+
+
+class Command(BaseCommand):
+    help = (
+        'Список покупок с переводом единиц на тысячах строк: без '
+        'перевода, перевод в Python и один запрос с CASE.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lines', nargs='+', type=int, default=[1000, 5000]
+        )
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument(
+            '--fill',
+            action='store_true',
+            help='Создать недостающие синтетические продукты.'
+        )
+
+    def handle(self, *args, **options):
+        self.fill_ingredients(max(options['lines']), options['fill'])
+        user = bench_user()
+        items = ShoppingListItem.objects.filter(user=user)
+        for lines in options['lines']:
+            self.fill_list(user, lines)
+            if rows_set(python_pass(items)) != rows_set(sql_case(items)):
+                raise CommandError('Python и SQL дают разные списки.')
+            cases = (
+                ('per-unit', lambda: per_unit(items)),
+                ('python', lambda: python_pass(items)),
+                ('sql-case', lambda: sql_case(items)),
+            )
+            for name, func in cases:
+                self.stdout.write(
+                    f'{lines:>6} lines  {name:<9} {len(func()):>6} rows  '
+                    f'{summary(measure(func, options["repeat"]))}'
+                )
+
+    def bench_ingredients(self):
+        return Ingredient.objects.filter(
+            name__startswith=BENCH_PREFIX
+        ).order_by('id')
+
+    def fill_ingredients(self, total, fill):
+        """
+        Синтетические продукты: каждое название во всех BENCH_UNITS.
+        """
+        missing = total - self.bench_ingredients().count()
+        if missing <= 0:
+            return
+        if not fill:
+            raise CommandError(
+                f'Не хватает {missing} продуктов, запустите с --fill.'
+            )
+        existing = total - missing
+        Ingredient.objects.bulk_create(
+            (
+                self.bench_ingredient(number)
+                for number in range(existing, total)
+            ),
+            batch_size=500,
+            ignore_conflicts=True
+        )
+        TableVersion.objects.bump(Ingredient)
+
+    def bench_ingredient(self, number):
+        name = f'{BENCH_PREFIX} {number // len(BENCH_UNITS)}'
+        return Ingredient(
+            name=name,
+            name_key=normalize_name(name),
+            measurement_unit=BENCH_UNITS[number % len(BENCH_UNITS)]
+        )
+
+    def fill_list(self, user, lines):
+        """
+        Список покупок пользователя из lines строк.
+        """
+        ShoppingListItem.objects.filter(user=user).delete()
+        ShoppingListItem.objects.bulk_create(
+            (
+                ShoppingListItem(
+                    user=user,
+                    ingredient_id=ingredient_id,
+                    amount=number % 900 + 100
+                )
+                for number, ingredient_id in enumerate(
+                    self.bench_ingredients().values_list(
+                        'id', flat=True
+                    )[:lines]
+                )
+            ),
+            batch_size=500
+        )
@@ -0,0 +1,97 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+
+from api.filters import RecipeFilters
+from benchmarks.utils import fill_recipes, measure, summary
+from recipes.models import Recipe, Tag, TagRecipe
+
+
+class Command(BaseCommand):
+    help = (
+        'Фильтрация ленты по нескольким тегам: JOIN с DISTINCT, '
+        'полусоединение id IN (подзапрос) и режим всех тегов с HAVING.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--tags', type=int, default=3)
+        parser.add_argument('--limit', type=int, default=6)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--fill',
+            action='store_true',
+            help='Создать недостающие рецепты и привязать к ним теги.'
+        )
+
+    def handle(self, *args, **options):
+        fill_recipes(options['recipes'], options['fill'])
+        slugs = list(Tag.objects.values_list('slug', flat=True)[:10])
+        if len(slugs) < options['tags']:
+            raise CommandError(
+                f'Нужно хотя бы {options["tags"]} тегов в базе.'
+            )
+        if options['fill']:
+            self.fill_tags(random.Random(options['seed']))
+        slugs = slugs[:options['tags']]
+        limit = options['limit']
+        cases = (
+            ('join+distinct', lambda: self.page(
+                Recipe.objects.filter(tags__slug__in=slugs).distinct(),
+                limit
+            )),
+            ('semi-join', lambda: self.page(
+                self.filter(slugs, 'any'), limit
+            )),
+            ('all-having', lambda: self.page(
+                self.filter(slugs, 'all'), limit
+            )),
+        )
+        for name, func in cases:
+            count, ids = func()
+            if len(ids) != len(set(ids)):
+                raise CommandError(f'{name}: повторяющиеся рецепты.')
+            self.stdout.write(
+                f'{name:<14} {count:>7} rows  '
+                f'{summary(measure(func, options["repeat"]))}'
+            )
+
+    def fill_tags(self, generator):
+        """
+        Привязка случайных тегов к рецептам без тегов.
+        """
+        tag_ids = list(Tag.objects.values_list('id', flat=True))
+        recipe_ids = Recipe.objects.filter(
+            tagrecipe__isnull=True
+        ).values_list('id', flat=True)
+        TagRecipe.objects.bulk_create(
+            (
+                TagRecipe(recipe_id=recipe_id, tag_id=tag_id)
+                for recipe_id in recipe_ids.iterator()
+                for tag_id in generator.sample(
+                    tag_ids, generator.randint(1, min(3, len(tag_ids)))
+                )
+            ),
+            batch_size=500
+        )
+
+    def filter(self, slugs, mode):
+        data = QueryDict(mutable=True)
+        data.setlist('tags', slugs)
+        data['tags_mode'] = mode
+        filterset = RecipeFilters(data, queryset=Recipe.objects.all())
+        if not filterset.is_valid():
+            raise CommandError(str(filterset.errors))
+        return filterset.qs
+
+    def page(self, queryset, limit):
+        """
+        Число строк и первая страница ленты, как в списке рецептов.
+        """
+        queryset = queryset.order_by('-pub_date', '-id')
+        return (
+            queryset.count(),
+            list(queryset.values_list('id', flat=True)[:limit])
+        )
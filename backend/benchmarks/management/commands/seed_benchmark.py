@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from benchmarks.seed import seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполнение базы для нагрузочного теста bench_api: пользователи, '
+        'рецепты с продуктами из fixtures/ingredients.json и тегами, '
+        'избранное, корзины и подписки с ципфовским распределением.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument(
+            '--favorites', type=int, default=20,
+            help='Среднее число избранных рецептов пользователя.'
+        )
+        parser.add_argument(
+            '--carts', type=int, default=5,
+            help='Среднее число рецептов в корзине пользователя.'
+        )
+        parser.add_argument(
+            '--subscriptions', type=int, default=10,
+            help='Среднее число подписок пользователя.'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Зерно генератора: одинаковое дает одинаковые данные.'
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        users, recipes = seed(
+            options['users'],
+            options['recipes'],
+            options['favorites'],
+            options['carts'],
+            options['subscriptions'],
+            options['seed']
+        )
+        self.stdout.write(
+            f'{users} users, {recipes} recipes '
+            f'{time.perf_counter() - start:.1f} s'
+        )
@@ -0,0 +1,229 @@
+import json
+import re
+import urllib.error
+import urllib.request
+from collections import namedtuple
+from urllib.parse import quote, urlencode, urlsplit
+
+from django.db import connection
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+
+from .seed import PASSWORD, USER_PREFIX
+
+# Однопиксельный GIF для создания рецептов.
+IMAGE = (
+    'data:image/gif;base64,'
+    'R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7'
+)
+PAGE_SIZE = 6
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+Response = namedtuple('Response', 'status data queries')
+
+
+class ScenarioData:
+    """
+    Данные засеянной базы, из которых сценарии составляют запросы.
+    """
+
+    def __init__(self):
+        self.users = list(User.objects.filter(
+            username__startswith=USER_PREFIX
+        ).order_by('id'))
+        self.tags = list(Tag.objects.values_list('id', 'slug'))
+        self.ingredients = list(
+            Ingredient.objects.values_list('id', 'name')
+        )
+        self.pages = max(min(Recipe.objects.count() // PAGE_SIZE, 50), 1)
+
+
+def server_queries(value):
+    """
+    Число запросов к базе из заголовка Server-Timing.
+    """
+    match = SERVER_TIMING_QUERIES.search(value or '')
+    return int(match.group(1)) if match else None
+
+
+class ClientTransport:
+    """
+    Запросы через тестовый клиент в том же процессе. Вход по
+    токену, как у HttpTransport, чтобы число запросов совпадало.
+    """
+
+    def __init__(self, user=None):
+        self.client = APIClient()
+        if user is not None:
+            token, _ = Token.objects.get_or_create(user=user)
+            self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def request(self, method, path, body=None):
+        response = getattr(self.client, method)(path, body, format='json')
+        if response.streaming:
+            b''.join(response.streaming_content)
+        data = None
+        if response.get('Content-Type', '').startswith('application/json'):
+            data = response.json()
+        return Response(
+            response.status_code,
+            data,
+            server_queries(response.get('Server-Timing'))
+        )
+
+    def close(self):
+        connection.close()
+
+
+class HttpTransport:
+    """
+    Запросы к запущенному серверу, например локальному gunicorn.
+    Пользователь входит по токену с паролем из seed_benchmark.
+    """
+
+    def __init__(self, url, user=None):
+        self.url = url.rstrip('/')
+        self.headers = {'Content-Type': 'application/json'}
+        if user is not None:
+            response = self.request(
+                'post',
+                '/api/auth/token/login/',
+                {'email': user.email, 'password': PASSWORD}
+            )
+            if response.status >= 400:
+                raise ValueError(
+                    f'Не удалось войти как {user.email}: {response.data}'
+                )
+            self.headers['Authorization'] = (
+                f'Token {response.data["auth_token"]}'
+            )
+
+    def request(self, method, path, body=None):
+        request = urllib.request.Request(
+            self.url + path,
+            data=None if body is None else json.dumps(body).encode(),
+            headers=self.headers,
+            method=method.upper()
+        )
+        try:
+            response = urllib.request.urlopen(request)
+        except urllib.error.HTTPError as error:
+            response = error
+        with response:
+            content = response.read()
+            data = None
+            if response.headers.get('Content-Type', '').startswith(
+                'application/json'
+            ):
+                data = json.loads(content)
+            return Response(
+                response.status,
+                data,
+                server_queries(response.headers.get('Server-Timing'))
+            )
+
+    def close(self):
+        pass
+
+
+def anonymous_feed(data, generator):
+    """
+    Главная страница без входа: случайная страница списка рецептов.
+    """
+    page = generator.randint(1, data.pages)
+    yield 'get', f'/api/recipes/?page={page}&limit={PAGE_SIZE}', None
+
+
+def tag_browsing(data, generator):
+    """
+    Просмотр рецептов по одному или двум тегам: первая страница
+    и до четырех следующих по ссылкам next, чтобы не запрашивать
+    страницы, которых нет.
+    """
+    slugs = generator.sample(
+        [slug for _, slug in data.tags],
+        min(generator.randint(1, 2), len(data.tags))
+    )
+    query = urlencode(
+        [('tags', slug) for slug in slugs] + [('limit', PAGE_SIZE)]
+    )
+    page = yield 'get', f'/api/recipes/?{query}', None
+    for _ in range(generator.randint(0, 4)):
+        if not page or not page.get('next'):
+            return
+        url = urlsplit(page['next'])
+        page = yield 'get', f'{url.path}?{url.query}', None
+
+
+def ingredient_typeahead(data, generator):
+    """
+    Подсказки продуктов по мере ввода первых букв названия.
+    """
+    _, name = generator.choice(data.ingredients)
+    for length in range(1, min(len(name), 4) + 1):
+        yield 'get', f'/api/ingredients/?name={quote(name[:length])}', None
+
+
+def recipe_payload(data, generator, name):
+    return {
+        'name': name,
+        'text': 'Рецепт нагрузочного теста.',
+        'cooking_time': generator.randint(5, 90),
+        'image': IMAGE,
+        'tags': [
+            tag_id for tag_id, _ in generator.sample(
+                data.tags, min(generator.randint(1, 2), len(data.tags))
+            )
+        ],
+        'ingredients': [
+            {'id': ingredient_id, 'amount': generator.randint(1, 500)}
+            for ingredient_id, _ in generator.sample(
+                data.ingredients, generator.randint(3, 6)
+            )
+        ],
+    }
+
+
+def recipe_write(data, generator):
+    """
+    Создание рецепта, его изменение и удаление: база не растет
+    от запуска к запуску.
+    """
+    recipe = yield 'post', '/api/recipes/', recipe_payload(
+        data, generator, 'Новый рецепт'
+    )
+    if recipe is None or 'id' not in recipe:
+        return
+    path = f'/api/recipes/{recipe["id"]}/'
+    yield 'patch', path, recipe_payload(data, generator, 'Измененный рецепт')
+    yield 'delete', path, None
+
+
+def subscriptions(data, generator):
+    """
+    Список подписок с тремя последними рецептами авторов.
+    """
+    yield 'get', (
+        f'/api/users/subscriptions/?recipes_limit=3&limit={PAGE_SIZE}'
+    ), None
+
+
+def shopping_list(data, generator):
+    """
+    Скачивание списка покупок в PDF.
+    """
+    yield 'get', '/api/recipes/download_shopping_cart/?format=pdf', None
+
+
+# Сценарий и признак того, что он выполняется от имени пользователя.
+SCENARIOS = {
+    'anonymous_feed': (anonymous_feed, False),
+    'tag_browsing': (tag_browsing, False),
+    'ingredient_typeahead': (ingredient_typeahead, False),
+    'recipe_write': (recipe_write, True),
+    'subscriptions': (subscriptions, True),
+    'shopping_list': (shopping_list, True),
+}
@@ -0,0 +1,229 @@
+import io
+import itertools
+import os
+import random
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+
+from recipes.feed import rebuild_timeline, timeline_enabled
+from recipes.models import (
+    Cart,
+    Favorite,
+    Ingredient,
+    IngredientRecipe,
+    Recipe,
+    Subscribe,
+    TableVersion,
+    Tag,
+    TagRecipe
+)
+from recipes.shopping_list import rebuild
+from recipes.trending import refresh_trending
+from users.models import User
+
+USER_PREFIX = 'load_user'
+PASSWORD = 'benchmark-password'
+INGREDIENTS_FIXTURE = os.path.join(
+    settings.BASE_DIR, 'fixtures', 'ingredients.json'
+)
+DEFAULT_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+BATCH_SIZE = 500
+
+
+def zipf_weights(size, exponent=1.1):
+    """
+    Накопленные веса распределения Ципфа: несколько популярных
+    элементов и длинный хвост редких.
+    """
+    return list(itertools.accumulate(
+        1 / (rank + 1) ** exponent for rank in range(size)
+    ))
+
+
+def sample(generator, population, cum_weights, size):
+    """
+    До size различных элементов с учетом весов.
+    """
+    if not population:
+        return []
+    chosen = generator.choices(population, cum_weights=cum_weights, k=size)
+    return list(dict.fromkeys(chosen))
+
+
+def load_ingredients():
+    """
+    Загрузка продуктов из fixtures/ingredients.json, если таблица пуста.
+    """
+    if not Ingredient.objects.exists():
+        call_command(
+            'import_ingredients', INGREDIENTS_FIXTURE, stdout=io.StringIO()
+        )
+
+
+def create_tags():
+    for name, color, slug in DEFAULT_TAGS:
+        Tag.objects.get_or_create(
+            slug=slug, defaults={'name': name, 'color': color}
+        )
+
+
+def create_users(total):
+    """
+    Пользователи load_user0..N с общим паролем PASSWORD.
+    """
+    password = make_password(PASSWORD)
+    existing = User.objects.filter(username__startswith=USER_PREFIX).count()
+    User.objects.bulk_create(
+        (
+            User(
+                username=f'{USER_PREFIX}{number}',
+                email=f'{USER_PREFIX}{number}@example.com',
+                first_name='Нагрузочный',
+                last_name=f'Пользователь {number}',
+                password=password
+            )
+            for number in range(existing, total)
+        ),
+        batch_size=BATCH_SIZE
+    )
+    return list(User.objects.filter(
+        username__startswith=USER_PREFIX
+    ).order_by('id').values_list('id', flat=True))
+
+
+def create_recipes(generator, user_ids, total):
+    """
+    Рецепты с ципфовским распределением по авторам, продуктам и тегам.
+    """
+    last_id = Recipe.objects.order_by('-id').values_list(
+        'id', flat=True
+    ).first() or 0
+    authors = user_ids[:]
+    generator.shuffle(authors)
+    author_weights = zipf_weights(len(authors))
+    Recipe.objects.bulk_create(
+        (
+            Recipe(
+                author_id=generator.choices(
+                    authors, cum_weights=author_weights
+                )[0],
+                name=f'Рецепт нагрузочного теста {number}',
+                image='recipes/image/benchmark.jpg',
+                text='Описание рецепта для нагрузочного теста.',
+                cooking_time=generator.choice((5, 10, 15, 20, 30, 45, 60, 90))
+            )
+            for number in range(total)
+        ),
+        batch_size=BATCH_SIZE
+    )
+    recipe_ids = list(Recipe.objects.filter(
+        id__gt=last_id
+    ).order_by('id').values_list('id', flat=True))
+    ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+    generator.shuffle(ingredient_ids)
+    ingredient_weights = zipf_weights(len(ingredient_ids))
+    tag_ids = list(Tag.objects.order_by('id').values_list('id', flat=True))
+    tag_weights = zipf_weights(len(tag_ids), exponent=0.5)
+    IngredientRecipe.objects.bulk_create(
+        (
+            IngredientRecipe(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=generator.randint(1, 500)
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in sample(
+                generator,
+                ingredient_ids,
+                ingredient_weights,
+                generator.randint(3, 12)
+            )
+        ),
+        batch_size=BATCH_SIZE
+    )
+    TagRecipe.objects.bulk_create(
+        (
+            TagRecipe(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in sample(
+                generator, tag_ids, tag_weights, generator.randint(1, 3)
+            )
+        ),
+        batch_size=BATCH_SIZE
+    )
+    return recipe_ids
+
+
+def create_relations(generator, model, user_ids, targets, average, field):
+    """
+    Записи избранного, корзины или подписок: у каждого пользователя
+    из user_ids в среднем average популярных по Ципфу объектов.
+    """
+    targets = targets[:]
+    generator.shuffle(targets)
+    weights = zipf_weights(len(targets))
+    model.objects.bulk_create(
+        (
+            model(user_id=user_id, **{field: target})
+            for user_id in user_ids
+            for target in sample(
+                generator,
+                targets,
+                weights,
+                generator.randint(0, average * 2)
+            )
+            if target != user_id or field != 'following_id'
+        ),
+        batch_size=BATCH_SIZE
+    )
+
+
+def seed(users, recipes, favorites, carts, subscriptions, seed=0):
+    """
+    Заполнение базы данными для нагрузочного теста. Повторный запуск
+    добавляет только недостающих пользователей с их избранным,
+    корзинами и подписками и новые рецепты.
+    """
+    generator = random.Random(seed)
+    load_ingredients()
+    create_tags()
+    seeded = set(User.objects.filter(
+        username__startswith=USER_PREFIX
+    ).values_list('id', flat=True))
+    user_ids = create_users(users)
+    new_user_ids = [
+        user_id for user_id in user_ids if user_id not in seeded
+    ]
+    missing = recipes - Recipe.objects.filter(
+        author_id__in=user_ids
+    ).count()
+    recipe_ids = list(Recipe.objects.filter(
+        author_id__in=user_ids
+    ).values_list('id', flat=True))
+    if missing > 0:
+        recipe_ids += create_recipes(generator, user_ids, missing)
+    create_relations(
+        generator, Favorite, new_user_ids, recipe_ids, favorites,
+        'recipe_id'
+    )
+    create_relations(
+        generator, Cart, new_user_ids, recipe_ids, carts, 'recipe_id'
+    )
+    create_relations(
+        generator, Subscribe, new_user_ids, user_ids, subscriptions,
+        'following_id'
+    )
+    call_command('recount', stdout=io.StringIO())
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        rebuild(user_ids[start:start + BATCH_SIZE])
+    refresh_trending()
+    if timeline_enabled():
+        rebuild_timeline()
+    TableVersion.objects.bump(Recipe)
+    return len(user_ids), len(recipe_ids)
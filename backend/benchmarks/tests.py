@@ -0,0 +1,112 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from benchmarks.scenarios import SCENARIOS
+from benchmarks.seed import USER_PREFIX, seed
+from recipes.models import (
+    Cart,
+    Favorite,
+    Ingredient,
+    IngredientRecipe,
+    Recipe,
+    ShoppingListItem,
+    Subscribe,
+    Tag
+)
+from users.models import User
+
+# Небольшая база: 10 пользователей и 40 рецептов.
+SEED_OPTIONS = {
+    'users': 10,
+    'recipes': 40,
+    'favorites': 3,
+    'carts': 2,
+    'subscriptions': 2,
+}
+
+
+def counts():
+    return {
+        model.__name__: model.objects.count()
+        for model in (
+            User, Recipe, IngredientRecipe, Favorite, Cart, Subscribe,
+            ShoppingListItem
+        )
+    }
+
+
+class SeedTest(TestCase):
+    """
+    Заполнение базы для нагрузочного теста.
+    """
+
+    def test_seed(self):
+        self.assertEqual(seed(**SEED_OPTIONS), (10, 40))
+        self.assertEqual(
+            User.objects.filter(username__startswith=USER_PREFIX).count(),
+            10
+        )
+        self.assertEqual(Recipe.objects.count(), 40)
+        self.assertTrue(Ingredient.objects.exists())
+        self.assertTrue(Tag.objects.exists())
+        self.assertFalse(Recipe.objects.filter(ingredients=None).exists())
+        self.assertFalse(
+            Subscribe.objects.filter(user_id=F('following_id')).exists()
+        )
+
+    def test_repeat_adds_nothing(self):
+        seed(**SEED_OPTIONS)
+        before = counts()
+        self.assertEqual(seed(**SEED_OPTIONS), (10, 40))
+        self.assertEqual(counts(), before)
+
+    def test_repeat_adds_missing(self):
+        seed(**SEED_OPTIONS)
+        self.assertEqual(
+            seed(**{**SEED_OPTIONS, 'users': 12, 'recipes': 50}), (12, 50)
+        )
+
+
+class BenchApiTest(TransactionTestCase):
+    """
+    Все сценарии bench_api через тестовый клиент проходят без ошибок.
+    """
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.results = os.path.join(media_root, 'results.json')
+        seed(**SEED_OPTIONS)
+
+    def test_scenarios(self):
+        call_command(
+            'bench_api',
+            requests=4,
+            concurrency=1,
+            save_baseline=self.results,
+            stdout=io.StringIO()
+        )
+        with open(self.results) as results:
+            results = json.load(results)
+        self.assertEqual(set(results), set(SCENARIOS))
+        for name, result in results.items():
+            with self.subTest(scenario=name):
+                self.assertGreaterEqual(result['requests'], 4)
+                self.assertEqual(result['errors'], 0)
+                self.assertIsNotNone(result['queries'])
+
+    def test_unseeded_database(self):
+        User.objects.filter(username__startswith=USER_PREFIX).delete()
+        with self.assertRaises(CommandError):
+            call_command('bench_api', requests=1, stdout=io.StringIO())
@@ -0,0 +1,81 @@
+import statistics
+import time
+
+from django.core.management.base import CommandError
+
+from recipes.models import Recipe
+from users.models import User
+
+BENCH_USERNAME = 'bench'
+
+
+def measure(func, repeat):
+    """
+    Выполнение func repeat раз, время каждого запуска в миллисекундах.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def percentile(timings, percent):
+    """
+    Перцентиль выборки времени выполнения.
+    """
+    ordered = sorted(timings)
+    index = round(percent / 100 * (len(ordered) - 1))
+    return ordered[index]
+
+
+def summary(timings):
+    """
+    Сводка по времени выполнения: медиана, p95 и среднее.
+    """
+    return (
+        f'p50 {statistics.median(timings):9.2f} ms  '
+        f'p95 {percentile(timings, 95):9.2f} ms  '
+        f'mean {statistics.mean(timings):9.2f} ms'
+    )
+
+
+def bench_user():
+    """
+    Пользователь, от имени которого выполняются бенчмарки.
+    """
+    user, _ = User.objects.get_or_create(
+        username=BENCH_USERNAME,
+        defaults={'email': f'{BENCH_USERNAME}@example.com'}
+    )
+    return user
+
+
+def fill_recipes(total, fill):
+    """
+    Дополнение таблицы рецептов синтетическими до total строк.
+    Без fill при нехватке рецептов бенчмарк завершается ошибкой.
+    """
+    missing = total - Recipe.objects.count()
+    if missing <= 0:
+        return 0
+    if not fill:
+        raise CommandError(
+            f'Не хватает {missing} рецептов, запустите с --fill.'
+        )
+    author = bench_user()
+    Recipe.objects.bulk_create(
+        (
+            Recipe(
+                author=author,
+                name=f'Рецепт {number}',
+                image='recipes/image/bench.jpg',
+                text='Описание',
+                cooking_time=number % 120 + 1
+            )
+            for number in range(missing)
+        ),
+        batch_size=500
+    )
+    return missing
@@ -27,10 +27,13 @@ INSTALLED_APPS = [
     'users',
     'colorfield',
     'django_filters',
+    'benchmarks',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.instrumentation.InstrumentationMiddleware',
+    'api.querycheck.QueryCheckMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -75,6 +78,23 @@ DATABASES = {
 }
 
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'recipes': {
+        'BACKEND': os.getenv(
+            'RECIPE_CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('RECIPE_CACHE_LOCATION', default='recipes'),
+        'TIMEOUT': int(os.getenv('RECIPE_CACHE_TIMEOUT', default=5 * 60)),
+    },
+}
+
+RECIPE_CACHE_ALIAS = 'recipes'
+
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -138,3 +158,67 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 STATIC_URL = '/staticfiles/'
 
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+SHOPPING_CART_CACHE_DIR = os.getenv(
+    'SHOPPING_CART_CACHE_DIR',
+    default=os.path.join(BASE_DIR, 'cache', 'shopping_cart')
+)
+
+SHOPPING_CART_CACHE_TIMEOUT = int(
+    os.getenv('SHOPPING_CART_CACHE_TIMEOUT', default=7 * 24 * 60 * 60)
+)
+
+SHOPPING_CART_JOB_TIMEOUT = int(
+    os.getenv('SHOPPING_CART_JOB_TIMEOUT', default=24 * 60 * 60)
+)
+
+INGREDIENT_SEARCH_LIMIT = int(
+    os.getenv('INGREDIENT_SEARCH_LIMIT', default=50)
+)
+
+INGREDIENT_INDEX_MAX_SIZE = int(
+    os.getenv('INGREDIENT_INDEX_MAX_SIZE', default=20000)
+)
+
+INGREDIENT_INDEX_TIMEOUT = int(
+    os.getenv('INGREDIENT_INDEX_TIMEOUT', default=5 * 60)
+)
+
+CATALOG_CACHE_SIZE = int(os.getenv('CATALOG_CACHE_SIZE', default=20000))
+
+CATALOG_CACHE_CHECK_INTERVAL = float(
+    os.getenv('CATALOG_CACHE_CHECK_INTERVAL', default=1)
+)
+
+RECIPE_IMAGE_WIDTHS = (360, 720, 1200)
+
+RECIPE_IMAGE_QUALITY = 80
+
+RECIPE_CARD_IMAGE_WIDTH = 720
+
+RECIPE_PREVIEW_IMAGE_WIDTH = 360
+
+TRENDING_HALF_LIFE = int(
+    os.getenv('TRENDING_HALF_LIFE', default=3 * 24 * 60 * 60)
+)
+
+TRENDING_INTERVAL = int(os.getenv('TRENDING_INTERVAL', default=60))
+
+# Лента подписок: subquery - выборка по подпискам при чтении,
+# timeline - заранее заполненная лента каждого подписчика.
+RECIPE_FEED_STRATEGY = os.getenv('RECIPE_FEED_STRATEGY', default='subquery')
+
+# Сколько последних рецептов автора добавлять в ленту при подписке.
+RECIPE_TIMELINE_BACKFILL = int(
+    os.getenv('RECIPE_TIMELINE_BACKFILL', default=100)
+)
+
+METRICS_ALLOWED_IPS = os.getenv(
+    'METRICS_ALLOWED_IPS', default='127.0.0.1'
+).split(',')
+
+# Поиск N+1 и бюджеты запросов: off, warn или raise.
+QUERY_CHECK = os.getenv('QUERY_CHECK', default='off')
+
+# Сколько раз один запрос может повториться за обработку запроса.
+QUERY_REPEAT_LIMIT = int(os.getenv('QUERY_REPEAT_LIMIT', default=5))
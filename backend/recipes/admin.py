@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.db import transaction
 
 from users.models import User
 from .models import (
@@ -12,6 +13,59 @@ from .models import (
     Tag,
     TagRecipe
 )
+from .shopping_list import cart_users, rebuild
+
+
+class ShoppingListAdminMixin:
+    """
+    Админ зона моделей, изменения которых меняют списки покупок мимо
+    API: списки затронутых пользователей пересоздаются по корзинам.
+    """
+    rebuild_on_save = True
+
+    def shopping_list_users(self, queryset):
+        """
+        Пользователи, чьи списки покупок зависят от объектов queryset.
+        """
+        raise NotImplementedError(
+            'ShoppingListAdminMixin.shopping_list_users() must be '
+            'implemented.'
+        )
+
+    def object_users(self, obj):
+        return set(self.shopping_list_users(
+            self.model.objects.filter(pk=obj.pk)
+        ))
+
+    def rebuild_lists(self, user_ids):
+        with transaction.atomic():
+            rebuild(list(user_ids))
+
+    def save_model(self, request, obj, form, change):
+        # Прежние пользователи: объект мог сменить владельца.
+        request.shopping_list_users = (
+            self.object_users(obj) if change and self.rebuild_on_save
+            else set()
+        )
+        super().save_model(request, obj, form, change)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        if self.rebuild_on_save:
+            self.rebuild_lists(
+                request.shopping_list_users
+                | self.object_users(form.instance)
+            )
+
+    def delete_model(self, request, obj):
+        user_ids = self.object_users(obj)
+        super().delete_model(request, obj)
+        self.rebuild_lists(user_ids)
+
+    def delete_queryset(self, request, queryset):
+        user_ids = set(self.shopping_list_users(queryset))
+        super().delete_queryset(request, queryset)
+        self.rebuild_lists(user_ids)
 
 
 class IngredientRecipeInline(admin.TabularInline):
@@ -30,15 +84,20 @@ class TagRecipeInline(admin.TabularInline):
     extra = 0
 
 
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(ShoppingListAdminMixin, UserAdmin):
     """
-    Параметры админ зоны пользователя.
+    Параметры админ зоны пользователя. Удаление пользователя удаляет
+    его рецепты из корзин других пользователей.
     """
+    rebuild_on_save = False
     list_display = ('username', 'email', 'id')
     search_fields = ('username', 'email')
     empty_value_display = '-пусто-'
     list_filter = ('username', 'email')
 
+    def shopping_list_users(self, queryset):
+        return cart_users(Recipe.objects.filter(author__in=queryset))
+
 
 class IngredientAdmin(admin.ModelAdmin):
     """
@@ -59,7 +118,7 @@ class TagAdmin(admin.ModelAdmin):
     list_filter = ('name',)
 
 
-class CartAdmin(admin.ModelAdmin):
+class CartAdmin(ShoppingListAdminMixin, admin.ModelAdmin):
     """
     Параметры админ зоны продуктовой корзины.
     """
@@ -68,6 +127,9 @@ class CartAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
     list_filter = ('user',)
 
+    def shopping_list_users(self, queryset):
+        return queryset.values_list('user_id', flat=True)
+
 
 class FavoriteAdmin(admin.ModelAdmin):
     """
@@ -79,7 +141,7 @@ class FavoriteAdmin(admin.ModelAdmin):
     list_filter = ('user',)
 
 
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(ShoppingListAdminMixin, admin.ModelAdmin):
     """
     Параметры админ зоны рецептов.
     """
@@ -96,15 +158,19 @@ class RecipeAdmin(admin.ModelAdmin):
     search_fields = ('name', 'author', 'tags')
     empty_value_display = '-пусто-'
     list_filter = ('name', 'author', 'tags')
+    readonly_fields = ('favorites_count', 'carts_count')
 
     def count_favorite(self, obj):
         """
         Метод для подсчета общего числа добавлений этого рецепта в избранное.
         """
-        return Favorite.objects.filter(recipe=obj).count()
+        return obj.favorites_count
 
     count_favorite.short_description = 'Число добавлении в избранное'
 
+    def shopping_list_users(self, queryset):
+        return cart_users(queryset)
+
 
 class SubscribeAdmin(admin.ModelAdmin):
     """
@@ -3,3 +3,9 @@ from django.apps import AppConfig
 
 class RecipesConfig(AppConfig):
     name = 'recipes'
+
+    def ready(self):
+        """
+        Подключение обработчиков сигналов.
+        """
+        from . import search  # noqa: F401
@@ -0,0 +1,182 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Ingredient, TableVersion, Tag
+
+
+class CatalogVersions:
+    """
+    Проверка версий таблиц всех кэшей справочников одним запросом
+    к TableVersion не чаще раза в CATALOG_CACHE_CHECK_INTERVAL секунд,
+    так изменения в других воркерах gunicorn сбрасывают кэши.
+    """
+
+    def __init__(self):
+        self.caches = []
+        self._checked_at = None
+
+    def register(self, cache):
+        self.caches.append(cache)
+
+    def reset(self):
+        """
+        Сброс всех кэшей справочников: следующее обращение проверит
+        версии и загрузит объекты заново, как после старта процесса.
+        """
+        for cache in self.caches:
+            cache.clear()
+        self._checked_at = None
+
+    def check(self):
+        if (
+            self._checked_at is not None
+            and time.monotonic() - self._checked_at
+            < settings.CATALOG_CACHE_CHECK_INTERVAL
+        ):
+            return
+        versions = TableVersion.objects.versions(
+            *(cache.model for cache in self.caches)
+        )
+        for cache in self.caches:
+            cache.set_version(versions[cache.model][0])
+        self._checked_at = time.monotonic()
+
+
+catalog_versions = CatalogVersions()
+
+
+class CatalogCache:
+    """
+    Кэш справочника в памяти процесса: не больше CATALOG_CACHE_SIZE
+    ключей, давно не использованные вытесняются первыми. Объекты
+    доступны по id и по полям из fields. Актуальность по версии
+    таблицы проверяет catalog_versions.
+    """
+
+    def __init__(self, model, fields=()):
+        self.model = model
+        self.fields = ('id',) + tuple(fields)
+        self._lock = threading.Lock()
+        self._version = None
+        self.clear()
+        catalog_versions.register(self)
+
+    def __deepcopy__(self, memo):
+        """
+        Поля фильтров и сериализаторов копируются для каждого
+        запроса, кэш при этом остается общим.
+        """
+        return self
+
+    def clear(self):
+        with self._lock:
+            self._items = OrderedDict()
+
+    def set_version(self, version):
+        """
+        Сброс кэша, если версия таблицы изменилась.
+        """
+        if version != self._version:
+            self.clear()
+            self._version = version
+
+    def _store(self, obj):
+        for field in self.fields:
+            key = (field, getattr(obj, field))
+            self._items[key] = obj
+            self._items.move_to_end(key)
+        while len(self._items) > settings.CATALOG_CACHE_SIZE:
+            self._items.popitem(last=False)
+
+    def get_many(self, field, values):
+        """
+        Словарь значение поля - объект. Отсутствующие в кэше объекты
+        загружаются одним запросом, несуществующие не попадают
+        в результат.
+        """
+        catalog_versions.check()
+        found = {}
+        missing = []
+        with self._lock:
+            for value in values:
+                obj = self._items.get((field, value))
+                if obj is None:
+                    missing.append(value)
+                    continue
+                self._items.move_to_end((field, value))
+                found[value] = obj
+        if missing:
+            loaded = list(
+                self.model.objects.filter(**{f'{field}__in': missing})
+            )
+            with self._lock:
+                for obj in loaded:
+                    self._store(obj)
+                    found[getattr(obj, field)] = obj
+        return found
+
+    def get(self, field, value):
+        return self.get_many(field, [value]).get(value)
+
+
+tag_cache = CatalogCache(Tag, ('slug',))
+ingredient_cache = CatalogCache(Ingredient)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def clear_tag_cache(**kwargs):
+    """
+    Сброс кэша процесса при изменении тегов. Остальные процессы
+    увидят новую версию таблицы при следующей проверке.
+    """
+    tag_cache.clear()
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def clear_ingredient_cache(**kwargs):
+    """
+    Сброс кэша процесса при изменении продуктов.
+    """
+    ingredient_cache.clear()
+
+
+def attach_catalog(recipes):
+    """
+    Подстановка тегов и продуктов рецептов из кэша справочников.
+    У рецептов должны быть предзагружены tagrecipe_set и
+    ingredientrecipes: запросы к справочникам выполняются только
+    для объектов, которых нет в кэше.
+    """
+    recipes = [
+        recipe for recipe in recipes
+        if not hasattr(recipe, 'catalog_tags')
+    ]
+    if not recipes:
+        return
+    rows = [
+        row for recipe in recipes for row in recipe.ingredientrecipes.all()
+    ]
+    ingredients = ingredient_cache.get_many(
+        'id', {row.ingredient_id for row in rows}
+    )
+    for row in rows:
+        if row.ingredient_id in ingredients:
+            row.ingredient = ingredients[row.ingredient_id]
+    links = {
+        recipe.id: [link.tag_id for link in recipe.tagrecipe_set.all()]
+        for recipe in recipes
+    }
+    tags = tag_cache.get_many(
+        'id', {tag_id for tag_ids in links.values() for tag_id in tag_ids}
+    )
+    for recipe in recipes:
+        recipe.catalog_tags = [
+            tags[tag_id] for tag_id in links[recipe.id] if tag_id in tags
+        ]
@@ -0,0 +1,118 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .models import Recipe, Subscribe, TimelineEntry
+
+STRATEGIES = ('subquery', 'timeline')
+FAN_OUT_BATCH = 1000
+
+
+def timeline_enabled():
+    return settings.RECIPE_FEED_STRATEGY == 'timeline'
+
+
+def feed_keyset():
+    """
+    Поля даты и id, по которым сортируется и листается лента.
+    В режиме timeline это столбцы записи ленты, чтобы выборка шла
+    по индексу (user, -pub_date, -recipe) без сортировки всей ленты.
+    """
+    if timeline_enabled():
+        return 'feed_pub_date', 'feed_recipe_id'
+    return 'pub_date', 'id'
+
+
+def feed_queryset(queryset, user):
+    """
+    Рецепты авторов, на которых подписан пользователь, новые первыми.
+    subquery: author_id IN (SELECT following_id ...) по индексу
+    (author, -pub_date, -id). timeline: готовая лента подписчика.
+    """
+    if timeline_enabled():
+        queryset = queryset.filter(timeline_entries__user=user).annotate(
+            feed_pub_date=F('timeline_entries__pub_date'),
+            feed_recipe_id=F('timeline_entries__recipe_id')
+        )
+    else:
+        queryset = queryset.filter(
+            author_id__in=Subscribe.objects.filter(
+                user=user
+            ).values('following_id')
+        )
+    return queryset.order_by(*(f'-{field}' for field in feed_keyset()))
+
+
+def fan_out(recipe):
+    """
+    Добавление нового рецепта в ленты всех подписчиков автора.
+    """
+    if not timeline_enabled():
+        return
+    followers = Subscribe.objects.filter(
+        following_id=recipe.author_id
+    ).values_list('user_id', flat=True)
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(
+                user_id=user_id,
+                recipe_id=recipe.id,
+                pub_date=recipe.pub_date
+            )
+            for user_id in followers.iterator()
+        ),
+        batch_size=FAN_OUT_BATCH
+    )
+
+
+def backfill(user_id, author_id):
+    """
+    Последние RECIPE_TIMELINE_BACKFILL рецептов автора в ленте
+    подписчика.
+    """
+    recipes = Recipe.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id'
+    ).values_list('id', 'pub_date')[:settings.RECIPE_TIMELINE_BACKFILL]
+    return TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(
+                user_id=user_id, recipe_id=recipe_id, pub_date=pub_date
+            )
+            for recipe_id, pub_date in recipes
+        ),
+        batch_size=FAN_OUT_BATCH
+    )
+
+
+def follow(user_id, author_id):
+    """
+    Добавление последних рецептов автора в ленту нового подписчика.
+    """
+    if timeline_enabled():
+        backfill(user_id, author_id)
+
+
+def unfollow(user_id, author_id):
+    """
+    Удаление рецептов автора из ленты бывшего подписчика.
+    """
+    if timeline_enabled():
+        TimelineEntry.objects.filter(
+            user_id=user_id, recipe__author_id=author_id
+        ).delete()
+
+
+@transaction.atomic
+def rebuild_timeline():
+    """
+    Полное заполнение лент подписчиков по текущим подпискам,
+    например при переключении RECIPE_FEED_STRATEGY на timeline.
+    """
+    TimelineEntry.objects.all().delete()
+    created = 0
+    subscriptions = Subscribe.objects.order_by('id').values_list(
+        'user_id', 'following_id'
+    )
+    for user_id, author_id in list(subscriptions):
+        created += len(backfill(user_id, author_id))
+    return created
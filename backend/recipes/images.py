@@ -0,0 +1,53 @@
+import io
+import json
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+# Форматы Pillow и расширения файлов уменьшенных копий.
+VARIANT_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+
+
+def make_variants(name):
+    """
+    Уменьшенные копии изображения рецепта нужных ширин
+    в форматах WebP и JPEG. Возвращает манифест путей.
+    """
+    with default_storage.open(name) as source:
+        image = Image.open(source)
+        image.load()
+    image = ImageOps.exif_transpose(image).convert('RGB')
+    stem = os.path.splitext(os.path.basename(name))[0]
+    manifest = {}
+    for width in settings.RECIPE_IMAGE_WIDTHS:
+        resized = image.copy()
+        resized.thumbnail((width, image.height), Image.LANCZOS)
+        for extension, pillow_format in VARIANT_FORMATS.items():
+            output = io.BytesIO()
+            resized.save(
+                output,
+                pillow_format,
+                quality=settings.RECIPE_IMAGE_QUALITY
+            )
+            manifest.setdefault(str(width), {})[extension] = (
+                default_storage.save(
+                    f'recipes/image/variants/{stem}-{width}.{extension}',
+                    ContentFile(output.getvalue())
+                )
+            )
+    return manifest
+
+
+def variant_name(recipe, width, extension='webp'):
+    """
+    Путь к уменьшенной копии изображения рецепта. Если копии
+    еще не готовы, возвращается исходное изображение.
+    """
+    if recipe.image_variants:
+        variants = json.loads(recipe.image_variants).get(str(width))
+        if variants and extension in variants:
+            return variants[extension]
+    return recipe.image.name
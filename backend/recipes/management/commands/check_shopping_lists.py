@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.models import ShoppingListItem
+from recipes.shopping_list import cart_totals, rebuild
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверка таблицы списков покупок с суммами, посчитанными заново '
+        'по корзинам, пачками по --batch пользователей. С --fix списки '
+        'с расхождениями пересоздаются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch', type=int, default=1000,
+            help='Сколько пользователей проверять за один проход.'
+        )
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Пересоздать списки покупок с расхождениями.'
+        )
+
+    def handle(self, *args, **options):
+        missing = extra = wrong = 0
+        drifted = []
+        last_id = 0
+        while True:
+            ids = list(User.objects.filter(id__gt=last_id).order_by(
+                'id'
+            ).values_list('id', flat=True)[:options['batch']])
+            if not ids:
+                break
+            last_id = ids[-1]
+            expected = {
+                (user_id, ingredient_id): total
+                for user_id, ingredient_id, total in cart_totals(ids)
+            }
+            actual = {
+                (user_id, ingredient_id): amount
+                for user_id, ingredient_id, amount in
+                ShoppingListItem.objects.filter(user_id__in=ids).values_list(
+                    'user_id', 'ingredient_id', 'amount'
+                )
+            }
+            users = set()
+            for key in expected.keys() | actual.keys():
+                if key not in actual:
+                    missing += 1
+                elif key not in expected:
+                    extra += 1
+                elif actual[key] != expected[key]:
+                    wrong += 1
+                else:
+                    continue
+                users.add(key[0])
+            drifted.extend(sorted(users))
+        self.stdout.write(
+            f'пользователей с расхождениями {len(drifted)}: '
+            f'нет строк {missing}, лишних {extra}, '
+            f'неверное количество {wrong}'
+        )
+        if not drifted:
+            return
+        if not options['fix']:
+            raise CommandError(
+                'Списки покупок расходятся с корзинами, '
+                'запустите команду с --fix.'
+            )
+        for start in range(0, len(drifted), options['batch']):
+            with transaction.atomic():
+                rebuild(drifted[start:start + options['batch']])
+        self.stdout.write(f'пересоздано списков {len(drifted)}')
@@ -0,0 +1,194 @@
+import csv
+import io
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from recipes.models import Ingredient, TableVersion, normalize_name
+from recipes.search import ingredient_index
+
+CHUNK_SIZE = 64 * 1024
+NAME_LENGTH = Ingredient._meta.get_field('name').max_length
+UNIT_LENGTH = Ingredient._meta.get_field('measurement_unit').max_length
+CSV_HEADER = ['name', 'measurement_unit']
+COPY_TABLE = 'ingredient_import'
+
+
+def iter_json(file):
+    """
+    Потоковый разбор JSON-массива: элементы читаются по одному,
+    файл целиком в память не загружается.
+    """
+    decoder = json.JSONDecoder()
+    buffer = file.read(CHUNK_SIZE).lstrip()
+    if not buffer.startswith('['):
+        raise CommandError('Ожидается JSON-массив.')
+    position = 1
+    eof = False
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if position < len(buffer) and buffer[position] == ']':
+            return
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise CommandError('Некорректный или обрезанный JSON.')
+            chunk = file.read(CHUNK_SIZE)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        yield item
+
+
+def json_rows(file):
+    """
+    Название и единица измерения из фикстуры Django
+    ({"fields": {...}}) или из плоских объектов.
+    """
+    for item in iter_json(file):
+        fields = item.get('fields', item) if isinstance(item, dict) else {}
+        yield fields.get('name'), fields.get('measurement_unit')
+
+
+def csv_rows(file):
+    """
+    Строки CSV: название, единица измерения. Заголовок необязателен.
+    """
+    for number, row in enumerate(csv.reader(file)):
+        if number == 0 and [cell.strip() for cell in row] == CSV_HEADER:
+            continue
+        yield tuple(row[:2]) if len(row) >= 2 else (None, None)
+
+
+READERS = {'json': json_rows, 'csv': csv_rows}
+
+
+def copy_batch(batch):
+    """
+    Загрузка пачки через COPY во временную таблицу и перенос строк,
+    ключа которых еще нет в справочнике.
+    """
+    table = Ingredient._meta.db_table
+    data = io.StringIO()
+    csv.writer(data).writerows(batch)
+    data.seek(0)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMP TABLE IF NOT EXISTS {COPY_TABLE} '
+            f'(name varchar({NAME_LENGTH}), '
+            f'name_key varchar({NAME_LENGTH}), '
+            f'measurement_unit varchar({UNIT_LENGTH})) '
+            'ON COMMIT DELETE ROWS'
+        )
+        cursor.copy_expert(
+            f'COPY {COPY_TABLE} FROM STDIN WITH (FORMAT csv)', data
+        )
+        cursor.execute(
+            f'INSERT INTO {table} (name, name_key, measurement_unit) '
+            f'SELECT name, name_key, measurement_unit FROM {COPY_TABLE} '
+            'ON CONFLICT (name_key, measurement_unit) DO NOTHING'
+        )
+
+
+def bulk_batch(batch):
+    Ingredient.objects.bulk_create(
+        (
+            Ingredient(name=name, name_key=name_key, measurement_unit=unit)
+            for name, name_key, unit in batch
+        ),
+        ignore_conflicts=True
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Быстрый импорт справочника продуктов из JSON или CSV: потоковый '
+        'разбор, пропуск дубликатов по ключу названия и единице, '
+        'вставка пачками. Повторный запуск ничего не дублирует.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл JSON или CSV.')
+        parser.add_argument(
+            '--format', choices=READERS,
+            help='Формат файла, по умолчанию по расширению.'
+        )
+        parser.add_argument(
+            '--batch', type=int, default=5000,
+            help='Сколько строк вставлять одним запросом.'
+        )
+        parser.add_argument(
+            '--method', choices=('auto', 'bulk', 'copy'), default='auto',
+            help=(
+                'bulk - bulk_create, copy - COPY PostgreSQL, '
+                'auto - COPY на PostgreSQL, иначе bulk_create.'
+            )
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or os.path.splitext(
+            path
+        )[1].lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError('Укажите --format json или --format csv.')
+        method = options['method']
+        if method == 'auto':
+            method = 'copy' if connection.vendor == 'postgresql' else 'bulk'
+        if method == 'copy' and connection.vendor != 'postgresql':
+            raise CommandError('COPY доступен только в PostgreSQL.')
+        insert = copy_batch if method == 'copy' else bulk_batch
+        start = time.perf_counter()
+        before = Ingredient.objects.count()
+        seen = set(
+            Ingredient.objects.values_list(
+                'name_key', 'measurement_unit'
+            ).iterator()
+        )
+        read = duplicates = invalid = 0
+        batch = []
+        with open(path, encoding='utf-8-sig', newline='') as file:
+            for name, unit in READERS[file_format](file):
+                read += 1
+                if not isinstance(name, str) or not isinstance(unit, str):
+                    invalid += 1
+                    continue
+                name, unit = name.strip(), unit.strip()
+                if (
+                    not name or not unit
+                    or len(name) > NAME_LENGTH
+                    or len(unit) > UNIT_LENGTH
+                ):
+                    invalid += 1
+                    continue
+                key = (normalize_name(name), unit)
+                if key in seen:
+                    duplicates += 1
+                    continue
+                seen.add(key)
+                batch.append((name, key[0], unit))
+                if len(batch) >= options['batch']:
+                    self.flush(insert, batch)
+                    batch = []
+        self.flush(insert, batch)
+        inserted = Ingredient.objects.count() - before
+        if inserted:
+            TableVersion.objects.bump(Ingredient)
+            ingredient_index.clear()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'прочитано {read}, добавлено {inserted}, '
+            f'дубликатов {duplicates}, пропущено {invalid}, '
+            f'{read / elapsed:.0f} строк/с ({method})'
+        )
+
+    def flush(self, insert, batch):
+        if batch:
+            with transaction.atomic():
+                insert(batch)
@@ -0,0 +1,79 @@
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.images import make_variants
+from recipes.models import Recipe, TableVersion
+
+
+class Command(BaseCommand):
+    help = (
+        'Фоновая подготовка уменьшенных копий изображений рецептов. '
+        'Изменение размера и кодирование выполняются в пуле процессов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=2,
+            help='Количество процессов обработки изображений.'
+        )
+        parser.add_argument(
+            '--batch', type=int, default=20,
+            help='Сколько рецептов обрабатывать за раз.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=2.0,
+            help='Пауза между опросами, если новых изображений нет.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Обработать текущие изображения и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        with ProcessPoolExecutor(
+            max_workers=options['workers'],
+            initializer=django.setup
+        ) as pool:
+            while True:
+                recipes = list(
+                    Recipe.objects.filter(image_variants='').order_by(
+                        'id'
+                    ).values_list('id', 'image')[:options['batch']]
+                )
+                if recipes:
+                    self.process(pool, recipes)
+                    continue
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+
+    def process(self, pool, recipes):
+        """
+        Сохранение манифеста копий. Если изображение успели
+        заменить, манифест не записывается. Обновление идет мимо
+        сигналов, поэтому версия рецептов увеличивается явно.
+        """
+        futures = {
+            (recipe_id, image): pool.submit(make_variants, image)
+            for recipe_id, image in recipes
+        }
+        for (recipe_id, image), future in futures.items():
+            if future.exception() is None:
+                manifest = future.result()
+            else:
+                self.stderr.write(f'{image}: {future.exception()!r}')
+                manifest = {}
+            Recipe.objects.filter(
+                id=recipe_id,
+                image=image,
+                image_variants=''
+            ).update(
+                image_variants=json.dumps(manifest),
+                updated_at=timezone.now()
+            )
+        TableVersion.objects.bump(Recipe)
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from recipes.feed import rebuild_timeline
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполнение лент подписок по текущим подпискам. Нужно '
+        'запустить при переключении RECIPE_FEED_STRATEGY на timeline.'
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Записей в лентах: {rebuild_timeline()}')
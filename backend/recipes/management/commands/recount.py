@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand
+from django.db import models
+from django.db.models.functions import Coalesce
+
+from recipes.models import Cart, Favorite, Recipe, Subscribe
+from users.models import User
+
+# Денормализованные счетчики: модель, поле и связанная модель с полем,
+# по которому считаются строки.
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (Recipe, 'carts_count', Cart, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Subscribe, 'following'),
+)
+
+
+def actual_count(model, field):
+    """
+    Подзапрос с фактическим числом строк model, ссылающихся на запись.
+    """
+    return Coalesce(models.Subquery(
+        model.objects.filter(**{field: models.OuterRef('pk')}).order_by(
+        ).values(field).annotate(total=models.Count('pk')).values('total'),
+        output_field=models.PositiveIntegerField()
+    ), 0)
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчет денормализованных счетчиков избранного, корзин, '
+        'рецептов и подписчиков пачками по --batch записей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch', type=int, default=1000,
+            help='Сколько записей проверять за один запрос.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать число расхождений.'
+        )
+
+    def handle(self, *args, **options):
+        for model, counter, related, field in COUNTERS:
+            drift = self.recount(
+                model,
+                counter,
+                actual_count(related, field),
+                options['batch'],
+                options['dry_run']
+            )
+            self.stdout.write(
+                f'{model._meta.label}.{counter}: расхождений {drift}'
+            )
+
+    def recount(self, model, counter, actual, batch, dry_run):
+        """
+        Поиск записей, у которых счетчик разошелся с фактом, и их
+        исправление. Значение вычисляется заново в самом UPDATE,
+        поэтому параллельные изменения F() не теряются.
+        """
+        drift = 0
+        last_id = 0
+        while True:
+            ids = list(model.objects.filter(id__gt=last_id).order_by(
+                'id'
+            ).values_list('id', flat=True)[:batch])
+            if not ids:
+                return drift
+            last_id = ids[-1]
+            drifted = list(model.objects.filter(id__in=ids).annotate(
+                actual=actual
+            ).exclude(**{counter: models.F('actual')}).values_list(
+                'id', flat=True
+            ))
+            drift += len(drifted)
+            if drifted and not dry_run:
+                model.objects.filter(id__in=drifted).update(
+                    **{counter: actual}
+                )
@@ -0,0 +1,36 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.trending import refresh_trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Периодический пересчет рейтинга популярности рецептов '
+        'по новым добавлениям в избранное и корзину.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch', type=int, default=10000,
+            help='Сколько записей читать за один запрос.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=settings.TRENDING_INTERVAL,
+            help='Пауза между пересчетами в секундах.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Пересчитать один раз и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = refresh_trending(options['batch'])
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Учтено добавлений: {processed}')
+            if options['once']:
+                return
+            time.sleep(options['interval'])
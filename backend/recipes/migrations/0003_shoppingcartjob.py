@@ -0,0 +1,34 @@
+# Generated by Django 2.2.19 on 2026-10-17 06:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0002_auto_20230514_0001'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingCartJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Готово'), ('failed', 'Ошибка')], default='pending', help_text='Статус задачи', max_length=16, verbose_name='Статус')),
+                ('rows', models.TextField(help_text='Агрегированный список покупок в формате JSON', verbose_name='Список покупок')),
+                ('key', models.CharField(help_text='Хэш содержимого списка покупок', max_length=64, verbose_name='Ключ кэша')),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True, help_text='Добавить дату создания', verbose_name='Дата создания')),
+                ('finished', models.DateTimeField(blank=True, help_text='Дата завершения задачи', null=True, verbose_name='Дата завершения')),
+                ('user', models.ForeignKey(help_text='Выберите пользователя', on_delete=django.db.models.deletion.CASCADE, related_name='shopping_cart_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Задача списка покупок',
+                'verbose_name_plural': 'Задачи списка покупок',
+                'ordering': ('created',),
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 2.2.19 on 2026-10-17 06:28
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def fill_versions(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    TableVersion = apps.get_model('recipes', 'TableVersion')
+    Recipe.objects.update(updated_at=models.F('pub_date'))
+    for table in ('recipes_tag', 'recipes_ingredient'):
+        TableVersion.objects.get_or_create(table=table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_ingredient_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(help_text='Имя таблицы базы данных', max_length=200, unique=True, verbose_name='Таблица')),
+                ('version', models.PositiveIntegerField(default=1, help_text='Увеличивается при каждом изменении таблицы', verbose_name='Версия')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Дата последнего изменения таблицы', verbose_name='Дата изменения')),
+            ],
+            options={
+                'verbose_name': 'Версия таблицы',
+                'verbose_name_plural': 'Версии таблиц',
+            },
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Дата последнего изменения', verbose_name='Дата изменения'),
+        ),
+        migrations.RunPython(fill_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 2.2.19 on 2026-10-17 06:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_table_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_variants',
+            field=models.TextField(blank=True, default='', help_text='Манифест уменьшенных копий в формате JSON', verbose_name='Уменьшенные копии изображения'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(image_variants=''), fields=['id'], name='recipe_image_pending_idx'),
+        ),
+    ]
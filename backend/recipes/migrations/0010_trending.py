@@ -0,0 +1,85 @@
+# Generated by Django 2.2.19 on 2026-10-17 06:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingState',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('epoch', models.DateTimeField(default=django.utils.timezone.now, help_text='Момент, относительно которого считаются веса', verbose_name='Точка отсчета')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Дата последнего пересчета рейтинга', verbose_name='Дата пересчета')),
+            ],
+            options={
+                'verbose_name': 'Состояние рейтинга',
+                'verbose_name_plural': 'Состояние рейтинга',
+            },
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, help_text='Дата добавления рецепта', verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='favorite',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, help_text='Дата добавления рецепта', verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+        # Существующие записи считаются уже учтенными: иначе первый
+        # refresh_trending принял бы всю историю за новые добавления.
+        migrations.AddField(
+            model_name='cart',
+            name='scored',
+            field=models.BooleanField(default=True, help_text='Добавление учтено в рейтинге популярности', verbose_name='Учтено в рейтинге'),
+        ),
+        migrations.AddField(
+            model_name='favorite',
+            name='scored',
+            field=models.BooleanField(default=True, help_text='Добавление учтено в рейтинге популярности', verbose_name='Учтено в рейтинге'),
+        ),
+        migrations.AlterField(
+            model_name='cart',
+            name='scored',
+            field=models.BooleanField(default=False, help_text='Добавление учтено в рейтинге популярности', verbose_name='Учтено в рейтинге'),
+        ),
+        migrations.AlterField(
+            model_name='favorite',
+            name='scored',
+            field=models.BooleanField(default=False, help_text='Добавление учтено в рейтинге популярности', verbose_name='Учтено в рейтинге'),
+        ),
+        migrations.AddIndex(
+            model_name='cart',
+            index=models.Index(condition=models.Q(scored=False), fields=['id'], name='cart_unscored_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='favorite',
+            index=models.Index(condition=models.Q(scored=False), fields=['id'], name='favorite_unscored_idx'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='trending_score',
+            field=models.FloatField(default=0, help_text='Затухающая сумма недавних добавлений в избранное и корзину, пересчитывается refresh_trending', verbose_name='Рейтинг популярности'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-favorites_count', '-id'], name='recipe_popular_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-trending_score', '-id'], name='recipe_trending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['cooking_time', '-id'], name='recipe_quick_idx'),
+        ),
+    ]
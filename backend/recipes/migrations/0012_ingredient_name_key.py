@@ -0,0 +1,47 @@
+# Generated by Django 2.2.19 on 2026-10-17 06:52
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def normalize_name(name):
+    """
+    Копия recipes.models.normalize_name на момент миграции.
+    """
+    return ' '.join(name.casefold().replace('ё', 'е').split())
+
+
+def fill_name_keys(apps, schema_editor):
+    """
+    Заполнение ключей названий пачками по BATCH_SIZE продуктов.
+    """
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    last_id = 0
+    while True:
+        batch = list(Ingredient.objects.filter(id__gt=last_id).order_by(
+            'id'
+        ).only('id', 'name')[:BATCH_SIZE])
+        if not batch:
+            return
+        last_id = batch[-1].id
+        for ingredient in batch:
+            ingredient.name_key = normalize_name(ingredient.name)
+        Ingredient.objects.bulk_update(batch, ['name_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_timeline_entry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='name_key',
+            field=models.CharField(default='', editable=False, help_text='Нормализованное название для поиска и уникальности', max_length=200, verbose_name='Ключ названия'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_name_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 2.2.19 on 2026-10-17 06:52
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def merge_batch(Ingredient, IngredientRecipe, duplicates):
+    """
+    Перенос продуктов рецептов с дубликатов на основную запись.
+    Если в рецепте есть оба продукта, количества складываются.
+    """
+    rows = IngredientRecipe.objects.filter(
+        ingredient_id__in=list(duplicates) + list(set(duplicates.values()))
+    ).order_by('id')
+    kept = {}
+    changed = {}
+    removed = []
+    for row in rows:
+        target = duplicates.get(row.ingredient_id, row.ingredient_id)
+        key = (row.recipe_id, target)
+        if key in kept:
+            kept[key].amount += row.amount
+            changed[kept[key].id] = kept[key]
+            removed.append(row.id)
+            continue
+        kept[key] = row
+        if row.ingredient_id != target:
+            row.ingredient_id = target
+            changed[row.id] = row
+    IngredientRecipe.objects.filter(id__in=removed).delete()
+    IngredientRecipe.objects.bulk_update(
+        changed.values(), ['ingredient', 'amount'], batch_size=BATCH_SIZE
+    )
+    Ingredient.objects.filter(id__in=list(duplicates)).delete()
+
+
+def merge_duplicates(apps, schema_editor):
+    """
+    Слияние продуктов с одинаковыми ключом названия и единицей:
+    остается запись с наименьшим id, пачками по BATCH_SIZE групп.
+    """
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientRecipe = apps.get_model('recipes', 'IngredientRecipe')
+    TableVersion = apps.get_model('recipes', 'TableVersion')
+    groups = list(Ingredient.objects.values(
+        'name_key', 'measurement_unit'
+    ).annotate(
+        keep=models.Min('id'), total=models.Count('id')
+    ).filter(total__gt=1).order_by('keep').values_list(
+        'name_key', 'measurement_unit', 'keep'
+    ))
+    merged = 0
+    for start in range(0, len(groups), BATCH_SIZE):
+        keep = {
+            (name_key, unit): pk
+            for name_key, unit, pk in groups[start:start + BATCH_SIZE]
+        }
+        duplicates = {
+            pk: keep[name_key, unit]
+            for pk, name_key, unit in Ingredient.objects.filter(
+                name_key__in={name_key for name_key, _ in keep}
+            ).values_list('id', 'name_key', 'measurement_unit')
+            if keep.get((name_key, unit), pk) != pk
+        }
+        merge_batch(Ingredient, IngredientRecipe, duplicates)
+        merged += len(duplicates)
+    if merged:
+        TableVersion.objects.filter(
+            table__in=('recipes_ingredient', 'recipes_recipe')
+        ).update(version=models.F('version') + 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_ingredient_name_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 2.2.19 on 2026-10-17 06:53
+
+from django.db import migrations, models
+
+CREATE_INDEXES = (
+    'DROP INDEX IF EXISTS recipes_ingredient_name_prefix_idx',
+    'DROP INDEX IF EXISTS recipes_ingredient_name_trgm_idx',
+    'CREATE INDEX IF NOT EXISTS recipes_ingredient_name_key_prefix_idx '
+    'ON recipes_ingredient (name_key varchar_pattern_ops)',
+    'CREATE INDEX IF NOT EXISTS recipes_ingredient_name_key_trgm_idx '
+    'ON recipes_ingredient USING gin (name_key gin_trgm_ops)',
+)
+
+DROP_INDEXES = (
+    'DROP INDEX IF EXISTS recipes_ingredient_name_key_prefix_idx',
+    'DROP INDEX IF EXISTS recipes_ingredient_name_key_trgm_idx',
+    'CREATE INDEX IF NOT EXISTS recipes_ingredient_name_prefix_idx '
+    'ON recipes_ingredient (UPPER(name::text) text_pattern_ops)',
+    'CREATE INDEX IF NOT EXISTS recipes_ingredient_name_trgm_idx '
+    'ON recipes_ingredient USING gin (UPPER(name::text) gin_trgm_ops)',
+)
+
+
+def run_on_postgresql(statements):
+    """
+    Поиск идет по name_key без UPPER(): индексы по выражению над name
+    заменяются индексами по name_key для startswith и contains.
+    """
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_merge_duplicate_ingredients'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name_key', 'measurement_unit'), name='unique_ingredient_name_key'),
+        ),
+        migrations.RunPython(
+            run_on_postgresql(CREATE_INDEXES),
+            run_on_postgresql(DROP_INDEXES),
+        ),
+    ]
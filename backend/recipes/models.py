@@ -1,11 +1,27 @@
+import threading
+import uuid
+from contextlib import contextmanager
+
 from colorfield.fields import ColorField
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.functions import RowNumber
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils import timezone
 from django.core.validators import MinValueValidator
 
 User = get_user_model()
 
 
+def normalize_name(name):
+    """
+    Ключ названия продукта: без учета регистра, лишних пробелов
+    и разницы между ё и е.
+    """
+    return ' '.join(name.casefold().replace('ё', 'е').split())
+
+
 class Ingredient(models.Model):
     """
     Модели ингридиентов.
@@ -15,6 +31,12 @@ class Ingredient(models.Model):
         verbose_name='Название',
         help_text='Введите название продуктов'
     )
+    name_key = models.CharField(
+        max_length=200,
+        editable=False,
+        verbose_name='Ключ названия',
+        help_text='Нормализованное название для поиска и уникальности'
+    )
     measurement_unit = models.CharField(
         max_length=200,
         verbose_name='Единицы измерения',
@@ -27,6 +49,12 @@ class Ingredient(models.Model):
         """
         verbose_name = 'Продукт'
         verbose_name_plural = 'Продукты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name_key', 'measurement_unit'],
+                name='unique_ingredient_name_key'
+            )
+        ]
 
     def __str__(self):
         """"
@@ -34,6 +62,22 @@ class Ingredient(models.Model):
         """
         return self.name
 
+    def clean(self):
+        """
+        Проверка, что такого продукта с той же единицей еще нет.
+        """
+        if Ingredient.objects.filter(
+            name_key=normalize_name(self.name),
+            measurement_unit=self.measurement_unit
+        ).exclude(pk=self.pk).exists():
+            raise ValidationError(
+                {'name': 'Такой продукт с этой единицей уже есть.'}
+            )
+
+    def save(self, *args, **kwargs):
+        self.name_key = normalize_name(self.name)
+        super().save(*args, **kwargs)
+
 
 class Tag(models.Model):
     """
@@ -70,6 +114,50 @@ class Tag(models.Model):
         return self.slug
 
 
+class RecipeQuerySet(models.QuerySet):
+    """
+    Выборка рецептов с признаками, зависящими от пользователя.
+    """
+
+    def with_user_flags(self, user):
+        """
+        Аннотация признаков is_favorited и is_in_shopping_cart
+        подзапросами EXISTS для текущего пользователя.
+        """
+        if not user.is_authenticated:
+            return self
+        return self.annotate(
+            is_favorited=models.Exists(Favorite.objects.filter(
+                user=user,
+                recipe=models.OuterRef('pk')
+            )),
+            is_in_shopping_cart=models.Exists(Cart.objects.filter(
+                user=user,
+                recipe=models.OuterRef('pk')
+            ))
+        )
+
+    def first_by_author(self, limit):
+        """
+        Первые limit рецептов каждого автора выборки одним запросом
+        с оконной функцией ROW_NUMBER() OVER (PARTITION BY author_id).
+        """
+        queryset = self.order_by().annotate(
+            row_number=models.Window(
+                expression=RowNumber(),
+                partition_by=[models.F('author_id')],
+                order_by=models.F('id').asc()
+            )
+        )
+        sql, params = queryset.query.get_compiler(using=self.db).as_sql()
+        return self.model.objects.db_manager(self.db).raw(
+            f'SELECT * FROM ({sql}) ranked '
+            'WHERE ranked.row_number <= %s '
+            'ORDER BY ranked.author_id, ranked.row_number',
+            (*params, limit)
+        )
+
+
 class Recipe(models.Model):
     """
     Модели рецептов.
@@ -91,6 +179,12 @@ class Recipe(models.Model):
         upload_to='recipes/image/',
         help_text='Выберите изображение рецепта'
     )
+    image_variants = models.TextField(
+        blank=True,
+        default='',
+        verbose_name='Уменьшенные копии изображения',
+        help_text='Манифест уменьшенных копий в формате JSON'
+    )
     text = models.TextField(
         verbose_name='Описание рецепта',
         help_text='Введите описания рецепта'
@@ -119,6 +213,29 @@ class Recipe(models.Model):
         verbose_name='Дата создания',
         help_text='Добавить дату создания'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+        help_text='Дата последнего изменения'
+    )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число добавлений в избранное',
+        help_text='Обновляется при добавлении и удалении из избранного'
+    )
+    carts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число добавлений в корзину',
+        help_text='Обновляется при добавлении и удалении из корзины'
+    )
+    trending_score = models.FloatField(
+        default=0,
+        verbose_name='Рейтинг популярности',
+        help_text='Затухающая сумма недавних добавлений в избранное '
+                  'и корзину, пересчитывается refresh_trending'
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         """
@@ -127,6 +244,33 @@ class Recipe(models.Model):
         ordering = ('-pub_date', )
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='recipe_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['-favorites_count', '-id'],
+                name='recipe_popular_idx'
+            ),
+            models.Index(
+                fields=['-trending_score', '-id'],
+                name='recipe_trending_idx'
+            ),
+            models.Index(
+                fields=['cooking_time', '-id'],
+                name='recipe_quick_idx'
+            ),
+            models.Index(
+                fields=['id'],
+                name='recipe_image_pending_idx',
+                condition=models.Q(image_variants='')
+            )
+        ]
 
     def __str__(self):
         """"
@@ -152,6 +296,16 @@ class Cart(models.Model):
         verbose_name='Рецепты',
         help_text='Выберите рецепты для добавления в корзины'
     )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата добавления',
+        help_text='Дата добавления рецепта'
+    )
+    scored = models.BooleanField(
+        default=False,
+        verbose_name='Учтено в рейтинге',
+        help_text='Добавление учтено в рейтинге популярности'
+    )
 
     class Meta:
         """
@@ -165,6 +319,19 @@ class Cart(models.Model):
                 name='unique_cart'
             )
         ]
+        indexes = [
+            # Обратный поиск: в чьих корзинах рецепт.
+            models.Index(
+                fields=['recipe', 'user'],
+                name='cart_recipe_user_idx'
+            ),
+            # Еще не учтенные в рейтинге добавления.
+            models.Index(
+                fields=['id'],
+                name='cart_unscored_idx',
+                condition=models.Q(scored=False)
+            )
+        ]
 
     def __str__(self):
         """"
@@ -204,6 +371,13 @@ class Subscribe(models.Model):
                 name='unique_subscribe'
             )
         ]
+        indexes = [
+            # Обратный поиск: подписчики автора.
+            models.Index(
+                fields=['following', 'user'],
+                name='subscribe_following_user_idx'
+            )
+        ]
 
     def __str__(self):
         """"
@@ -311,6 +485,16 @@ class Favorite(models.Model):
         verbose_name='Рецепт',
         help_text='Выберите рецепт'
     )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата добавления',
+        help_text='Дата добавления рецепта'
+    )
+    scored = models.BooleanField(
+        default=False,
+        verbose_name='Учтено в рейтинге',
+        help_text='Добавление учтено в рейтинге популярности'
+    )
 
     class Meta:
         """
@@ -324,9 +508,330 @@ class Favorite(models.Model):
                 name='unique_favorite'
             )
         ]
+        indexes = [
+            # Обратный поиск: сколько раз рецепт добавлен в избранное.
+            models.Index(
+                fields=['recipe', 'user'],
+                name='favorite_recipe_user_idx'
+            ),
+            # Еще не учтенные в рейтинге добавления.
+            models.Index(
+                fields=['id'],
+                name='favorite_unscored_idx',
+                condition=models.Q(scored=False)
+            )
+        ]
 
     def __str__(self):
         """"
         Строковое представление модели.
         """
         return f'{self.recipe} {self.user}'
+
+
+class TimelineEntry(models.Model):
+    """
+    Модель ленты подписок, заполняемой при публикации рецепта.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик',
+        help_text='Пользователь, в ленту которого попал рецепт'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Рецепт',
+        help_text='Рецепт автора, на которого подписан пользователь'
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+        help_text='Копия даты публикации рецепта для сортировки'
+    )
+
+    class Meta:
+        """
+        Мета параметры модели.
+        """
+        verbose_name = 'Запись ленты подписок'
+        verbose_name_plural = 'Лента подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_timelineentry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-recipe'],
+                name='timeline_user_pub_date_idx'
+            )
+        ]
+
+    def __str__(self):
+        """"
+        Строковое представление модели.
+        """
+        return f'{self.user} {self.recipe}'
+
+
+class ShoppingListItem(models.Model):
+    """
+    Модель строки списка покупок: сумма количества продукта
+    по всем рецептам в корзине пользователя. Обновляется вместе
+    с корзиной и продуктами рецептов.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Пользователь',
+        help_text='Владелец списка покупок'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Продукт',
+        help_text='Продукт из рецептов корзины'
+    )
+    amount = models.PositiveIntegerField(
+        verbose_name='Количество',
+        help_text='Сумма количества продукта в рецептах корзины'
+    )
+
+    class Meta:
+        """
+        Мета параметры модели.
+        """
+        verbose_name = 'Строка списка покупок'
+        verbose_name_plural = 'Списки покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shoppinglistitem'
+            )
+        ]
+
+    def __str__(self):
+        """"
+        Строковое представление модели.
+        """
+        return f'{self.user} {self.ingredient} {self.amount}'
+
+
+class ShoppingCartJob(models.Model):
+    """
+    Модель задачи фоновой генерации PDF списка покупок.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_cart_jobs',
+        verbose_name='Пользователь',
+        help_text='Выберите пользователя'
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        verbose_name='Статус',
+        help_text='Статус задачи'
+    )
+    rows = models.TextField(
+        verbose_name='Список покупок',
+        help_text='Агрегированный список покупок в формате JSON'
+    )
+    key = models.CharField(
+        max_length=64,
+        verbose_name='Ключ кэша',
+        help_text='Хэш содержимого списка покупок'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Дата создания',
+        help_text='Добавить дату создания'
+    )
+    finished = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата завершения',
+        help_text='Дата завершения задачи'
+    )
+
+    class Meta:
+        """
+        Мета параметры модели.
+        """
+        ordering = ('created', )
+        verbose_name = 'Задача списка покупок'
+        verbose_name_plural = 'Задачи списка покупок'
+
+    def __str__(self):
+        """"
+        Строковое представление модели.
+        """
+        return f'{self.user} {self.status}'
+
+
+class TrendingState(models.Model):
+    """
+    Модель состояния пересчета рейтинга популярности рецептов.
+    """
+    epoch = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Точка отсчета',
+        help_text='Момент, относительно которого считаются веса'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата пересчета',
+        help_text='Дата последнего пересчета рейтинга'
+    )
+
+    class Meta:
+        """
+        Мета параметры модели.
+        """
+        verbose_name = 'Состояние рейтинга'
+        verbose_name_plural = 'Состояние рейтинга'
+
+    def __str__(self):
+        """"
+        Строковое представление модели.
+        """
+        return f'{self.epoch} {self.updated_at}'
+
+
+class TableVersionManager(models.Manager):
+    """
+    Менеджер счетчиков версий таблиц.
+    """
+
+    def bump(self, model):
+        """
+        Увеличение версии таблицы модели.
+        """
+        table = model._meta.db_table
+        updated = self.filter(table=table).update(
+            version=models.F('version') + 1,
+            updated_at=timezone.now()
+        )
+        if not updated:
+            self.get_or_create(table=table)
+
+    def versions(self, *models):
+        """
+        Версии и даты изменения таблиц моделей одним запросом.
+        """
+        tables = {model._meta.db_table: model for model in models}
+        result = {model: (0, None) for model in models}
+        for table, version, updated_at in self.filter(
+            table__in=tables
+        ).values_list('table', 'version', 'updated_at'):
+            result[tables[table]] = (version, updated_at)
+        return result
+
+
+class TableVersion(models.Model):
+    """
+    Модель счетчика версий таблицы для условных HTTP-запросов.
+    """
+    table = models.CharField(
+        max_length=200,
+        unique=True,
+        verbose_name='Таблица',
+        help_text='Имя таблицы базы данных'
+    )
+    version = models.PositiveIntegerField(
+        default=1,
+        verbose_name='Версия',
+        help_text='Увеличивается при каждом изменении таблицы'
+    )
+    updated_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Дата изменения',
+        help_text='Дата последнего изменения таблицы'
+    )
+
+    objects = TableVersionManager()
+
+    class Meta:
+        """
+        Мета параметры модели.
+        """
+        verbose_name = 'Версия таблицы'
+        verbose_name_plural = 'Версии таблиц'
+
+    def __str__(self):
+        """"
+        Строковое представление модели.
+        """
+        return f'{self.table} {self.version}'
+
+
+def bump_table_version(sender, **kwargs):
+    """
+    Обработчик сигналов изменения справочников.
+    """
+    TableVersion.objects.bump(sender)
+
+
+def bump_recipe_version(sender, action=None, **kwargs):
+    """
+    Обработчик сигналов изменения рецептов, их тегов и продуктов:
+    все они меняют одно поколение кэша рецептов.
+    """
+    if getattr(_recipe_write, 'active', False):
+        return
+    if action is None or action.startswith('post_'):
+        TableVersion.objects.bump(Recipe)
+
+
+_recipe_write = threading.local()
+
+
+@contextmanager
+def recipe_write():
+    """
+    Изменение рецепта вместе со строками тегов и продуктов увеличивает
+    версию рецептов один раз в конце блока, а не на каждую строку.
+    """
+    if getattr(_recipe_write, 'active', False):
+        yield
+        return
+    _recipe_write.active = True
+    try:
+        yield
+    finally:
+        _recipe_write.active = False
+    TableVersion.objects.bump(Recipe)
+
+
+for versioned_model in (Tag, Ingredient):
+    post_save.connect(bump_table_version, sender=versioned_model)
+    post_delete.connect(bump_table_version, sender=versioned_model)
+
+for recipe_model in (Recipe, IngredientRecipe, TagRecipe):
+    post_save.connect(bump_recipe_version, sender=recipe_model)
+    post_delete.connect(bump_recipe_version, sender=recipe_model)
+m2m_changed.connect(bump_recipe_version, sender=Recipe.tags.through)
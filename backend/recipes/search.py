@@ -0,0 +1,127 @@
+import bisect
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Case, IntegerField, When
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Ingredient, normalize_name
+
+
+class IngredientIndex:
+    """
+    Индекс продуктов в памяти процесса: отсортированный массив
+    нормализованных названий, поиск по префиксу через bisect.
+    Если продуктов больше INGREDIENT_INDEX_MAX_SIZE, индекс
+    не строится и поиск выполняется в базе.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """
+        Сброс индекса, он будет перестроен при следующем поиске.
+        """
+        self._index = None
+        self._built_at = None
+
+    def _expired(self):
+        return (
+            self._built_at is None
+            or time.monotonic() - self._built_at
+            > settings.INGREDIENT_INDEX_TIMEOUT
+        )
+
+    def _build(self):
+        with self._lock:
+            if not self._expired():
+                return
+            if Ingredient.objects.count() > settings.INGREDIENT_INDEX_MAX_SIZE:
+                self._index = None
+            else:
+                entries = sorted(
+                    (name_key, pk)
+                    for pk, name_key in Ingredient.objects.values_list(
+                        'id', 'name_key'
+                    ).iterator()
+                )
+                # Названия и id заменяются одним присваиванием, чтобы
+                # поиск в другом потоке не увидел их от разных версий.
+                self._index = (
+                    [name for name, _ in entries],
+                    [pk for _, pk in entries]
+                )
+            self._built_at = time.monotonic()
+
+    def search(self, term, limit):
+        """
+        Идентификаторы продуктов: сначала совпадения по началу
+        названия, затем по вхождению. None, если индекс не построен.
+        """
+        if self._expired():
+            self._build()
+        index = self._index
+        if index is None:
+            return None
+        names, ids = index
+        term = normalize_name(term)
+        result = []
+        position = bisect.bisect_left(names, term)
+        while (
+            position < len(names)
+            and len(result) < limit
+            and names[position].startswith(term)
+        ):
+            result.append(ids[position])
+            position += 1
+        for name, pk in zip(names, ids):
+            if len(result) >= limit:
+                break
+            if term in name and not name.startswith(term):
+                result.append(pk)
+        return result
+
+
+ingredient_index = IngredientIndex()
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def clear_ingredient_index(**kwargs):
+    """
+    Сброс индекса процесса при изменении продуктов.
+    Остальные процессы перестроят индекс по таймауту.
+    """
+    ingredient_index.clear()
+
+
+def search_ingredients(queryset, term, limit):
+    """
+    Поиск продуктов с ранжированием и ограничением числа результатов.
+    Сравнение идет по нормализованному ключу name_key, для которого
+    в PostgreSQL есть индексы под startswith и contains.
+    """
+    ids = ingredient_index.search(term, limit)
+    if ids is None:
+        key = normalize_name(term)
+        ids = list(
+            queryset.filter(name_key__contains=key).annotate(
+                rank=Case(
+                    When(name_key__startswith=key, then=0),
+                    default=1,
+                    output_field=IntegerField()
+                )
+            ).order_by('rank', 'name_key').values_list(
+                'id', flat=True
+            )[:limit]
+        )
+    return queryset.filter(id__in=ids).order_by(
+        Case(
+            *[When(id=pk, then=rank) for rank, pk in enumerate(ids)],
+            output_field=IntegerField()
+        )
+    )
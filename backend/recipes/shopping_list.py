@@ -0,0 +1,101 @@
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.db.models.functions import Greatest
+
+from .models import Cart, IngredientRecipe, ShoppingListItem
+
+BATCH_SIZE = 500
+
+
+def cart_totals(user_ids=None):
+    """
+    Список покупок, посчитанный заново по корзинам: кортежи
+    (пользователь, продукт, сумма количества).
+    """
+    carts = Cart.objects.filter(recipe__ingredientrecipes__isnull=False)
+    if user_ids is not None:
+        carts = carts.filter(user_id__in=user_ids)
+    return carts.values_list(
+        'user_id', 'recipe__ingredientrecipes__ingredient_id'
+    ).order_by().annotate(total=Sum('recipe__ingredientrecipes__amount'))
+
+
+def recipe_deltas(recipe_id, sign):
+    """
+    Изменения списка покупок при добавлении (sign=1) или удалении
+    (sign=-1) рецепта из корзины.
+    """
+    return {
+        ingredient_id: sign * amount
+        for ingredient_id, amount in IngredientRecipe.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('ingredient_id', 'amount')
+    }
+
+
+def apply_deltas(user_ids, deltas):
+    """
+    Прибавление deltas ({продукт: изменение}) к спискам покупок
+    пользователей из списка user_ids. Недостающие строки
+    для положительных изменений вставляются с нулем и пропускаются при
+    конфликте: параллельная вставка той же строки ждет на уникальном
+    индексе, а не падает с IntegrityError. Затем все строки меняются
+    одним UPDATE, строки с нулевым количеством удаляются. Вызывается
+    в транзакции изменения корзины или рецепта.
+    """
+    deltas = {
+        ingredient_id: delta
+        for ingredient_id, delta in deltas.items() if delta
+    }
+    if not deltas:
+        return
+    ShoppingListItem.objects.bulk_create(
+        (
+            ShoppingListItem(
+                user_id=user_id, ingredient_id=ingredient_id, amount=0
+            )
+            for user_id in user_ids
+            for ingredient_id, delta in deltas.items() if delta > 0
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True
+    )
+    items = ShoppingListItem.objects.filter(
+        user_id__in=user_ids, ingredient_id__in=list(deltas)
+    )
+    items.update(amount=Greatest(F('amount') + Case(
+        *(
+            When(ingredient_id=ingredient_id, then=Value(delta))
+            for ingredient_id, delta in deltas.items()
+        ),
+        default=Value(0),
+        output_field=IntegerField()
+    ), 0))
+    items.filter(amount=0).delete()
+
+
+def cart_users(recipes):
+    """
+    Пользователи, у которых рецепты recipes - список или выборка -
+    лежат в корзине.
+    """
+    return set(Cart.objects.filter(recipe__in=recipes).values_list(
+        'user_id', flat=True
+    ))
+
+
+def rebuild(user_ids):
+    """
+    Пересоздание списков покупок пользователей по их корзинам.
+    """
+    ShoppingListItem.objects.filter(user_id__in=user_ids).delete()
+    ShoppingListItem.objects.bulk_create(
+        (
+            ShoppingListItem(
+                user_id=user_id, ingredient_id=ingredient_id, amount=total
+            )
+            for user_id, ingredient_id, total in cart_totals(
+                user_ids
+            ).iterator()
+        ),
+        batch_size=BATCH_SIZE
+    )
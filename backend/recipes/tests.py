@@ -0,0 +1,100 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from users.models import User
+from .models import Ingredient, ShoppingListItem
+from .search import IngredientIndex
+from .units import base_totals, display_amount, display_rows
+
+
+class DisplayAmountTest(SimpleTestCase):
+    """
+    Количество в базовой единице в самой крупной подходящей единице.
+    """
+
+    def test_display_amount(self):
+        for total, unit, expected in (
+            (1500, 'г', (1.5, 'кг')),
+            (2000, 'г', (2, 'кг')),
+            (1000, 'г', (1, 'кг')),
+            (999, 'г', (999, 'г')),
+            (1, 'г', (1, 'г')),
+            (1250, 'мл', (1.25, 'л')),
+            (250, 'мл', (250, 'мл')),
+            (1234567, 'г', (1234.567, 'кг')),
+            (1500, 'шт.', (1500, 'шт.')),
+            (3, 'ст. л.', (3, 'ст. л.')),
+        ):
+            with self.subTest(total=total, unit=unit):
+                self.assertEqual(display_amount(total, unit), expected)
+
+    def test_whole_amount_is_int(self):
+        amount, _ = display_amount(3000, 'г')
+        self.assertIsInstance(amount, int)
+
+
+class BaseTotalsTest(TestCase):
+    """
+    Строки одного продукта в переводимых единицах складываются в одну.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='buyer', email='buyer@example.com', password='password'
+        )
+        amounts = (
+            ('Мука', 'г', 500),
+            ('Мука', 'кг', 2),
+            ('Молоко', 'мл', 250),
+            ('молоко', 'л', 1),
+            ('Яйца', 'шт.', 3),
+            ('Соль', 'г', 5),
+            ('Соль', 'по вкусу', 1),
+        )
+        ShoppingListItem.objects.bulk_create(
+            ShoppingListItem(
+                user=cls.user,
+                ingredient=Ingredient.objects.create(
+                    name=name, measurement_unit=unit
+                ),
+                amount=amount
+            )
+            for name, unit, amount in amounts
+        )
+
+    def rows(self):
+        return [
+            tuple(row.values()) for row in display_rows(base_totals(
+                ShoppingListItem.objects.filter(user=self.user)
+            ))
+        ]
+
+    def test_merged_rows(self):
+        with self.assertNumQueries(1):
+            rows = self.rows()
+        self.assertEqual(rows, [
+            ('Молоко', 'л', 1.25),
+            ('Мука', 'кг', 2.5),
+            ('Соль', 'г', 5),
+            ('Соль', 'по вкусу', 1),
+            ('Яйца', 'шт.', 3),
+        ])
+
+
+class IngredientIndexTest(TestCase):
+    """
+    Индекс продуктов строится при первом поиске независимо от
+    времени, прошедшего с запуска системы.
+    """
+
+    def test_first_search_builds_index(self):
+        ingredient = Ingredient.objects.create(
+            name='Капуста', measurement_unit='кг'
+        )
+        # Часы time.monotonic отсчитываются от запуска системы.
+        with mock.patch('recipes.search.time.monotonic', return_value=1):
+            self.assertEqual(
+                IngredientIndex().search('кап', 10), [ingredient.id]
+            )
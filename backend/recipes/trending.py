@@ -0,0 +1,107 @@
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.utils import timezone
+
+from .models import Cart, Favorite, Recipe, TableVersion, TrendingState
+
+# Источники рейтинга: модель и вес одного добавления.
+SOURCES = (
+    (Favorite, 1.0),
+    (Cart, 0.5),
+)
+# Через сколько периодов полураспада веса пересчитываются к новой
+# точке отсчета, чтобы не выйти за пределы float.
+REBASE_HALF_LIVES = 64
+UPDATE_BATCH = 500
+
+
+def weight(created, epoch):
+    """
+    Вес добавления относительно точки отсчета: 2^(t / T).
+    Со временем растут веса новых добавлений, а не уменьшаются
+    старые, поэтому порядок рецептов меняется без пересчета всех
+    строк, а сумма равна затухающему рейтингу с точностью до
+    общего множителя.
+    """
+    seconds = (created - epoch).total_seconds()
+    return 2 ** (seconds / settings.TRENDING_HALF_LIFE)
+
+
+def rebase(state, now):
+    """
+    Перенос точки отсчета ближе к текущему моменту с делением
+    всех рейтингов на 2^shift.
+    """
+    shift = math.floor(
+        (now - state.epoch).total_seconds() / settings.TRENDING_HALF_LIFE
+    )
+    if shift < REBASE_HALF_LIVES:
+        return
+    Recipe.objects.filter(trending_score__gt=0).update(
+        trending_score=F('trending_score') * Value(2.0 ** -shift)
+    )
+    state.epoch += timedelta(seconds=shift * settings.TRENDING_HALF_LIFE)
+
+
+def add_scores(scores):
+    """
+    Прибавление весов к рейтингам рецептов пачками одним UPDATE.
+    """
+    items = sorted(scores.items())
+    for start in range(0, len(items), UPDATE_BATCH):
+        chunk = items[start:start + UPDATE_BATCH]
+        Recipe.objects.filter(
+            id__in=[recipe_id for recipe_id, _ in chunk]
+        ).update(trending_score=F('trending_score') + Case(
+            *(
+                When(id=recipe_id, then=Value(score))
+                for recipe_id, score in chunk
+            ),
+            default=Value(0.0),
+            output_field=FloatField()
+        ))
+
+
+@transaction.atomic
+def refresh_trending(batch=10000):
+    """
+    Инкрементальный пересчет рейтинга: учитываются записи избранного
+    и корзины, еще не отмеченные как учтенные. Запись, закоммиченная
+    позже записи с большим id, попадет в следующий запуск, а не
+    пропустится, как при пересчете от последнего id. Удаление
+    из избранного рейтинг не уменьшает, его вес со временем затухает.
+    Возвращает число учтенных записей.
+    """
+    state, _ = TrendingState.objects.select_for_update().get_or_create(
+        id=1
+    )
+    rebase(state, timezone.now())
+    scores = defaultdict(float)
+    processed = 0
+    for model, source_weight in SOURCES:
+        while True:
+            rows = list(model.objects.filter(
+                scored=False
+            ).order_by('id').values_list('id', 'recipe_id', 'created')[:batch])
+            if not rows:
+                break
+            for _, recipe_id, created in rows:
+                scores[recipe_id] += source_weight * weight(
+                    created, state.epoch
+                )
+            model.objects.filter(
+                id__in=[row_id for row_id, _, _ in rows]
+            ).update(scored=True)
+            processed += len(rows)
+    add_scores(scores)
+    if scores:
+        # UPDATE рейтингов не посылает сигналов: новая версия рецептов
+        # сбрасывает кэш ответов с сортировкой trending.
+        TableVersion.objects.bump(Recipe)
+    state.save()
+    return processed
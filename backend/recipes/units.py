@@ -0,0 +1,106 @@
+from django.db.models import (
+    Case,
+    CharField,
+    F,
+    IntegerField,
+    Min,
+    Sum,
+    Value,
+    When
+)
+
+# Единицы измерения из fixtures/ingredients.json, которые переводятся
+# друг в друга: единица - базовая единица и множитель. Ложки, стаканы,
+# штуки и остальные единицы суммируются как есть: их вес или объем
+# зависит от продукта.
+UNITS = {
+    'г': ('г', 1),
+    'кг': ('г', 1000),
+    'мл': ('мл', 1),
+    'л': ('мл', 1000),
+}
+
+# Единицы отображения для каждой базовой единицы, от крупной к мелкой.
+DISPLAY_UNITS = {
+    base: sorted(
+        (
+            (factor, unit) for unit, (unit_base, factor) in UNITS.items()
+            if unit_base == base
+        ),
+        reverse=True
+    )
+    for base, _ in UNITS.values()
+}
+
+
+def base_unit(field):
+    """
+    Выражение CASE с базовой единицей для единицы из field.
+    """
+    return Case(
+        *(
+            When(**{field: unit}, then=Value(base))
+            for unit, (base, _) in UNITS.items() if unit != base
+        ),
+        default=F(field),
+        output_field=CharField()
+    )
+
+
+def unit_factor(field):
+    """
+    Выражение CASE с множителем перевода в базовую единицу.
+    """
+    return Case(
+        *(
+            When(**{field: unit}, then=Value(factor))
+            for unit, (_, factor) in UNITS.items() if factor != 1
+        ),
+        default=Value(1),
+        output_field=IntegerField()
+    )
+
+
+def base_totals(items):
+    """
+    Суммы строк списка покупок по продукту и базовой единице за один
+    проход SQL: одинаковые названия в г и кг, мл и л попадают в одну
+    строку. Продукт сравнивается по ключу названия.
+    """
+    return items.annotate(
+        unit=base_unit('ingredient__measurement_unit')
+    ).values('ingredient__name_key', 'unit').annotate(
+        name=Min('ingredient__name'),
+        total=Sum(
+            F('amount') * unit_factor('ingredient__measurement_unit'),
+            output_field=IntegerField()
+        )
+    ).order_by('name', 'unit')
+
+
+def display_amount(total, unit):
+    """
+    Количество в самой крупной единице, в которой оно не меньше
+    единицы: 1500 г - 1.5 кг, 250 мл - 250 мл.
+    """
+    for factor, display_unit in DISPLAY_UNITS.get(unit, ()):
+        if total >= factor:
+            break
+    else:
+        return total, unit
+    if total % factor == 0:
+        return total // factor, display_unit
+    return round(total / factor, 3), display_unit
+
+
+def display_rows(rows):
+    """
+    Строки списка покупок в формате рендереров из строк base_totals.
+    """
+    for row in rows:
+        total, unit = display_amount(row['total'], row['unit'])
+        yield {
+            'ingredient__name': row['name'],
+            'ingredient__measurement_unit': unit,
+            'ingredient_total': total,
+        }
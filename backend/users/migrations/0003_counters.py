@@ -0,0 +1,23 @@
+# Generated by Django 2.2.19 on 2026-10-17 06:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_auto_20261017_0621'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, help_text='Обновляется при подписке и отписке', verbose_name='Число подписчиков'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, help_text='Обновляется при создании и удалении рецептов', verbose_name='Число рецептов'),
+        ),
+    ]
@@ -1,7 +1,36 @@
+from django.apps import apps
 from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import UserManager as BaseUserManager
 from django.db import models
 
 
+class UserQuerySet(models.QuerySet):
+    """
+    Выборка пользователей с признаком подписки.
+    """
+
+    def with_subscribed(self, user):
+        """
+        Аннотация признака подписки текущего пользователя
+        на каждого пользователя выборки подзапросом EXISTS.
+        """
+        if not user.is_authenticated:
+            return self
+        subscribe = apps.get_model('recipes', 'Subscribe')
+        return self.annotate(
+            subscribed=models.Exists(subscribe.objects.filter(
+                user=user,
+                following=models.OuterRef('pk')
+            ))
+        )
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
+    """
+    Менеджер пользователей с методами выборки UserQuerySet.
+    """
+
+
 class User(AbstractUser):
     """
     Кастомная модель пользователя.
@@ -35,6 +64,18 @@ class User(AbstractUser):
         verbose_name='Подписка на данного пользователя',
         help_text='Отметьте для подписки на данного пользователя'
     )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число рецептов',
+        help_text='Обновляется при создании и удалении рецептов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число подписчиков',
+        help_text='Обновляется при подписке и отписке'
+    )
+    objects = UserManager()
+
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name', 'password']
 